@@ -0,0 +1,6 @@
+"""Entry point for ``python -m BioSUR`` (headless batch runner, see BioSUR.cli)."""
+import sys
+
+from BioSUR.cli import main
+
+sys.exit(main())
@@ -0,0 +1,749 @@
+"""Vectorized characterization of many samples at once.
+
+characterize_batch mirrors BioSUR.calculate_output_composition operation for
+operation (same formulas, same evaluation order), so every row reproduces the
+scalar result -- to rounding, as the scalar path solves with the cached inverse
+of its ReferenceTriangle -- and the golden values in
+tests/golden_composition.json exactly, while the whole batch runs as a handful
+of NumPy array expressions.
+"""
+import math
+
+import numpy as np
+
+from BioSUR.core import (BiomassType, ExtrapolationMethod, OPTIMIZATION_PARAMETERS,
+                         OUTPUT_DTYPE, _CENTROID_EXIT_MARGIN, _CHO_SPECIES, _SPECIES_HULL,
+                         HullSolution, _centroid_ray_exit, _decompose_species_hull_rows)
+from BioSUR.diagnostics import Flag, HIGH_NITROGEN_THRESHOLD, count_flags, report
+from BioSUR.species import REFERENCE_SPECIES
+
+# Species columns used by the reference mixtures and the output assembly. Values
+# are the exact table entries promoted to float64, as in the scalar path.
+_SPECIES_NAMES = ('CELL', 'HCELL', 'LIGO', 'LIGH', 'LIGC', 'TANN', 'TGL',
+                  'PROTC', 'PROTH', 'PROTO')
+
+
+def _column(key: str) -> dict:
+    return {s: float(REFERENCE_SPECIES[s][key]) for s in _SPECIES_NAMES}
+
+
+_ATOMS = {element: _column(element) for element in ('C', 'H', 'O')}
+_FRAC = {element: _column(f'{element}_frac') for element in ('C', 'H', 'N')}
+_MW = _column('MW')
+
+# Inputs the columns of info['jacobian'] (characterize_batch(jacobian=True)) refer to.
+JACOBIAN_INPUTS = ('C', 'H', 'N', 'ASH', 'MOIST')
+
+# Upper bound on the legacy 1% centroid march; a sample reaches the centroid
+# (which is always inside) after 100 steps, so this is never hit in practice.
+_CENTROID_MAX_STEPS = 1000
+
+# |det| of the reference-mixture system below which a row's triangle counts as
+# degenerate (well-formed triangles are above 1e-4).
+_DEGENERATE_DET = 1e-12
+
+
+def _as_rows(value, n: int, name: str) -> np.ndarray:
+    arr = np.asarray(value, dtype=float).ravel()
+    if arr.size == 1:
+        return np.full(n, arr[0])
+    if arr.size != n:
+        raise ValueError(f"{name} has {arr.size} values, expected {n}")
+    return arr.copy()
+
+
+def _mix(weights: tuple, species: tuple) -> tuple:
+    """Vectorized ReferenceMixture.mix_species: atoms, MW and mass fractions."""
+    atoms = {}
+    for element in ('C', 'H', 'O'):
+        total = weights[0] * _ATOMS[element][species[0]]
+        for w, s in zip(weights[1:], species[1:]):
+            total = total + w * _ATOMS[element][s]
+        atoms[element] = total
+    if np.any(atoms['C'] < 0) or np.any(atoms['H'] < 0) or np.any(atoms['O'] < 0):
+        raise ValueError("Composition must be positive")
+    MW = atoms['C'] * 12 + atoms['H'] * 1 + atoms['O'] * 16
+    return MW, atoms['C'] * 12 / MW, atoms['H'] * 1 / MW, atoms['O'] * 16 / MW
+
+
+def barycentric_coordinates(C, H, vertices) -> np.ndarray:
+    """Barycentric coordinates of the points (C, H) in one or many triangles.
+
+    vertices has shape (..., 3, 2) -- the (C, H) corners of each triangle -- and
+    broadcasts against C and H: a single (3, 2) triangle for every point, an
+    (n, 3, 2) stack with one triangle per point, or e.g. (T, 1, 3, 2) to test n
+    points against T triangles. Returns an array of shape broadcast(...) + (3,)
+    computed exactly as BioSUR.is_outside_triangle does.
+    """
+    V = np.asarray(vertices, dtype=float)
+    if V.shape[-2:] != (3, 2):
+        raise ValueError(f"vertices must have shape (..., 3, 2), got {V.shape}")
+    C = np.asarray(C, dtype=float)
+    H = np.asarray(H, dtype=float)
+    (x1, y1), (x2, y2), (x3, y3) = (np.moveaxis(V[..., k, :], -1, 0) for k in range(3))
+    area = 0.5 * (x1*(y2 - y3) + x2*(y3 - y1) + x3*(y1 - y2))
+    coord1 = (C*(y2 - y3) + x2*(y3 - H) + x3*(H - y2)) / (2*area)
+    coord2 = (x1*(H - y3) + C*(y3 - y1) + x3*(y1 - H)) / (2*area)
+    coord3 = 1 - coord1 - coord2
+    return np.stack(np.broadcast_arrays(coord1, coord2, coord3), axis=-1)
+
+
+def _outside(C, H, V) -> np.ndarray:
+    """Vectorized BioSUR.is_outside_triangle; V is ((x1, y1), (x2, y2), (x3, y3))."""
+    (x1, y1), (x2, y2), (x3, y3) = V
+    area = 0.5 * (x1*(y2 - y3) + x2*(y3 - y1) + x3*(y1 - y2))
+    coord1 = (C*(y2 - y3) + x2*(y3 - H) + x3*(H - y2)) / (2*area)
+    coord2 = (x1*(H - y3) + C*(y3 - y1) + x3*(y1 - H)) / (2*area)
+    coord3 = 1 - coord1 - coord2
+    return (coord1 < 0) | (coord2 < 0) | (coord3 < 0)
+
+
+def _extrapolate_centroid_stepped(C, H, V) -> tuple:
+    """Vectorized legacy BioSUR._extrapolate_centroid (1% march toward the centroid)."""
+    (x1, y1), (x2, y2), (x3, y3) = V
+    bx = (x1 + x2 + x3) / 3
+    by = (y1 + y2 + y3) / 3
+    vx = C - bx
+    vy = H - by
+    eC = C.copy()
+    eH = H.copy()
+    active = _outside(eC, eH, V)
+    for _ in range(_CENTROID_MAX_STEPS):
+        if not active.any():
+            break
+        eC[active] -= vx[active] * 0.01
+        eH[active] -= vy[active] * 0.01
+        active[active] = _outside(eC[active], eH[active], tuple((x[active], y[active]) for x, y in V))
+    return eC, eH
+
+
+def _extrapolate_nearest_point(C, H, V) -> tuple:
+    """Vectorized BioSUR._extrapolate_nearest_point (closest point on the boundary)."""
+    cands = []
+    d2s = []
+    for (ax, ay), (bx, by) in ((V[0], V[1]), (V[1], V[2]), (V[2], V[0])):
+        abx = bx - ax
+        aby = by - ay
+        denom = abx*abx + aby*aby
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.where(denom == 0, 0.0, ((C - ax)*abx + (H - ay)*aby) / denom)
+        t = np.clip(t, 0.0, 1.0)
+        cx = ax + t*abx
+        cy = ay + t*aby
+        cands.append((cx, cy))
+        d2s.append((C - cx)**2 + (H - cy)**2)
+    best = np.argmin(np.stack(d2s), axis=0)  # first edge wins ties, as in the scalar loop
+    eC = np.choose(best, [c[0] for c in cands])
+    eH = np.choose(best, [c[1] for c in cands])
+    return eC, eH
+
+
+def _protein_mix_nitrogen(split) -> float:
+    """Nitrogen mass fraction of the protein mixture (calculate_protein_fraction)."""
+    return (split[0] * _FRAC['N']['PROTC'] + split[1] * _FRAC['N']['PROTH']
+            + split[2] * _FRAC['N']['PROTO'])
+
+
+def invalid_rows(C, H, N=0.0, use_N_rich_characterization: bool = False,
+                 protein_splitting_parameter=(1./3., 1./3., 1./3.)) -> np.ndarray:
+    """Boolean mask of the rows characterize_batch would reject as unrepresentable.
+
+    A row is invalid when oxygen by difference is negative (C + H + N > 1) or,
+    with N-rich characterization, when its nitrogen implies a protein fraction
+    >= 1. Rows whose reference mixtures turn out degenerate depend on the
+    biomass type as well and are only detected by characterize_batch itself.
+    """
+    C = np.asarray(C, dtype=float)
+    N = np.asarray(N, dtype=float)
+    bad = C + np.asarray(H, dtype=float) + N > 1.0 + 1e-9
+    if use_N_rich_characterization:
+        prot_mix_N = _protein_mix_nitrogen(np.asarray(protein_splitting_parameter, dtype=float))
+        if prot_mix_N > 0:
+            bad = bad | ((N > 0) & (N / prot_mix_N >= 1))
+    return bad
+
+
+def _reference_mixtures(C, H, bt) -> tuple:
+    """Per-row splitting parameters, RM weights and (MW, C, H, O) of RM1..RM3."""
+    P = OPTIMIZATION_PARAMETERS[np.where(bt >= 2, 2, bt)]
+    sp = (P[:, 0, :] * 1.0 + P[:, 1, :] * C[:, None] + P[:, 2, :] * H[:, None]).clip(0, 1)
+    alpha, beta, gamma, delta, epsilon = sp.T
+
+    rm1_w = (alpha, 1-alpha)
+    rm2_w = (delta*beta, delta*(1-beta), 1 - delta*beta - delta*(1-beta))
+    rm3_w = (epsilon*gamma, epsilon*(1-gamma), 1 - epsilon*gamma - epsilon*(1-gamma))
+    mixes = (_mix(rm1_w, ('CELL', 'HCELL')),
+             _mix(rm2_w, ('LIGH', 'LIGC', 'TGL')),
+             _mix(rm3_w, ('LIGO', 'LIGC', 'TANN')))
+    return sp, rm1_w, rm2_w, rm3_w, mixes
+
+
+# Element rows (C, H, O) of the CHO species: atoms per molecule, and atomic masses.
+_SPECIES_ATOMS = np.array([[_ATOMS[element][s] for s in _CHO_SPECIES] for element in ('C', 'H', 'O')])
+_ATOMIC_MASS = np.array([12.0, 1.0, 16.0])
+_SPECIES_MW = np.array([_MW[s] for s in _CHO_SPECIES])
+
+
+def _barycentric_jacobian(P, dP, V, dV) -> tuple:
+    """Barycentric coordinates (m, 3) of P in V and their derivatives (m, 3, k).
+
+    P is (m, 2) with derivative dP (m, 2, k); V is (m, 3, 2) with dV (m, 3, 2, k).
+    """
+    (x1, y1), (x2, y2), (x3, y3) = (V[:, r].T for r in range(3))
+    (dx1, dy1), (dx2, dy2), (dx3, dy3) = (dV[:, r].transpose(1, 0, 2) for r in range(3))
+    C, H = P.T
+    dC, dH = dP.transpose(1, 0, 2)
+    col = lambda v: v[:, None]
+    area2 = x1*(y2 - y3) + x2*(y3 - y1) + x3*(y1 - y2)
+    darea2 = (dx1*col(y2 - y3) + col(x1)*(dy2 - dy3) + dx2*col(y3 - y1) + col(x2)*(dy3 - dy1)
+              + dx3*col(y1 - y2) + col(x3)*(dy1 - dy2))
+    n1 = C*(y2 - y3) + x2*(y3 - H) + x3*(H - y2)
+    dn1 = (dC*col(y2 - y3) + col(C)*(dy2 - dy3) + dx2*col(y3 - H) + col(x2)*(dy3 - dH)
+           + dx3*col(H - y2) + col(x3)*(dH - dy2))
+    n2 = x1*(H - y3) + C*(y3 - y1) + x3*(y1 - H)
+    dn2 = (dx1*col(H - y3) + col(x1)*(dH - dy3) + dC*col(y3 - y1) + col(C)*(dy3 - dy1)
+           + dx3*col(y1 - H) + col(x3)*(dy1 - dH))
+    l1, l2 = n1 / area2, n2 / area2
+    dl1 = (dn1 - col(l1) * darea2) / col(area2)
+    dl2 = (dn2 - col(l2) * darea2) / col(area2)
+    return np.column_stack([l1, l2, 1 - l1 - l2]), np.stack([dl1, dl2, -dl1 - dl2], axis=1)
+
+
+def _projection_jacobian(P, V, dV, extrapolation_method, legacy_centroid_stepping) -> tuple:
+    """Extrapolated point of samples P (m, 2) outside triangles V and its derivative.
+
+    Values come from the same functions characterize_batch uses; the derivative
+    (m, 2, 2) with respect to the sample (C, H) accounts for the triangle moving
+    with the sample (dV, (m, 3, 2, 2)). The active edge, clip or step count is
+    held fixed, i.e. the derivative is that of the branch taken at P.
+    """
+    m = len(P)
+    eye = np.broadcast_to(np.eye(2), (m, 2, 2))
+    Vt = tuple((V[:, r, 0], V[:, r, 1]) for r in range(3))
+    G = V.mean(axis=1)
+    dG = dV.mean(axis=1)
+    if extrapolation_method == ExtrapolationMethod.NEAREST_POINT:
+        E = np.column_stack(_extrapolate_nearest_point(P[:, 0], P[:, 1], Vt))
+        candidates, slopes, distances = [], [], []
+        for i, j in ((0, 1), (1, 2), (2, 0)):
+            a, ab = V[:, i], V[:, j] - V[:, i]
+            da, dab = dV[:, i], dV[:, j] - dV[:, i]
+            denom = np.einsum('mc,mc->m', ab, ab)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                u = np.where(denom == 0, 0.0, np.einsum('mc,mc->m', P - a, ab) / denom)
+                du = (np.einsum('mck,mc->mk', eye - da, ab) + np.einsum('mc,mck->mk', P - a, dab)
+                      - 2 * u[:, None] * np.einsum('mc,mck->mk', ab, dab)) / denom[:, None]
+            t = np.clip(u, 0.0, 1.0)
+            dt = np.where(((u > 0) & (u < 1))[:, None], du, 0.0)
+            point = a + t[:, None] * ab
+            candidates.append(point)
+            slopes.append(da + ab[:, :, None] * dt[:, None, :] + t[:, None, None] * dab)
+            distances.append(((P - point) ** 2).sum(axis=1))
+        best = np.argmin(np.stack(distances), axis=0)
+        return E, np.stack(slopes)[best, np.arange(m)]
+    if legacy_centroid_stepping:
+        E = np.column_stack(_extrapolate_centroid_stepped(P[:, 0], P[:, 1], Vt))
+        # E = P - 0.01 k (P - G) after k steps of the march.
+        k = np.rint(np.hypot(*(P - E).T) / np.hypot(*(0.01 * (P - G)).T))
+        return E, eye - 0.01 * k[:, None, None] * (eye - dG)
+    E = np.column_stack(_centroid_ray_exit(P[:, 0], P[:, 1], Vt))
+    coords, dcoords = _barycentric_jacobian(P, eye, V, dV)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(coords < 0, coords / (coords - 1/3), 0.0)
+        dt = np.where((coords < 0)[..., None], (-1/3) * dcoords / ((coords - 1/3) ** 2)[..., None], 0.0)
+    last = np.argmax(t, axis=1)
+    t, dt = t[np.arange(m), last], dt[np.arange(m), last]
+    pushed = t * (1 + _CENTROID_EXIT_MARGIN) + _CENTROID_EXIT_MARGIN
+    dt = np.where((pushed < 1)[:, None], (1 + _CENTROID_EXIT_MARGIN) * dt, 0.0)
+    t = np.minimum(pushed, 1.0)
+    return E, eye + (G - P)[:, :, None] * dt[:, None, :] + t[:, None, None] * (dG - eye)
+
+
+def _cho_fractions_jacobian(C, H, bt, moved=None,
+                            extrapolation_method=ExtrapolationMethod.CENTROID,
+                            legacy_centroid_stepping: bool = False) -> tuple:
+    """CHO species mass fractions of the RM system and their (C, H) derivatives.
+
+    Evaluates the map (C, H) -> normalized _CHO_SPECIES mass fractions of
+    calculate_output_composition (no protein or ash scaling; rows in `moved`
+    are first extrapolated onto their triangle) and carries the exact
+    derivatives along every step by the chain rule: the splitting-parameter
+    correlation (linear in C and H, zero slope where clipped to [0, 1]), the RM
+    species weights and element fractions, the extrapolation, the 3x3 solve
+    (dx = A^-1 (db - dA x)) and the mole/mass normalizations. Returns fractions
+    (n, 7) and jacobian (n, 7, 2), the last axis being (d/dC, d/dH). Agrees
+    with characterize_batch to rounding.
+    """
+    n = C.size
+    P = OPTIMIZATION_PARAMETERS[np.where(bt >= 2, 2, bt)]
+    raw = P[:, 0, :] + P[:, 1, :] * C[:, None] + P[:, 2, :] * H[:, None]
+    sp = raw.clip(0, 1)
+    dsp = np.where(((raw > 0) & (raw < 1))[:, :, None], P[:, 1:, :].transpose(0, 2, 1), 0.0)
+    (a, b, g, d, e), (da, db, dg, dd, de) = sp.T, dsp.transpose(1, 0, 2)
+
+    # Species moles per mole of RM1..RM3 (columns) and their derivatives.
+    k = {s: i for i, s in enumerate(_CHO_SPECIES)}
+    W = np.zeros((n, len(_CHO_SPECIES), 3))
+    dW = np.zeros((n, len(_CHO_SPECIES), 3, 2))
+    a_, b_, g_, d_, e_ = (v[:, None] for v in (a, b, g, d, e))
+    for species, rm, value, slope in (
+            ('CELL', 0, a, da), ('HCELL', 0, 1 - a, -da),
+            ('LIGH', 1, d * b, dd * b_ + d_ * db), ('LIGC', 1, d * (1 - b), dd * (1 - b_) - d_ * db),
+            ('TGL', 1, 1 - d, -dd),
+            ('LIGO', 2, e * g, de * g_ + e_ * dg), ('LIGC', 2, e * (1 - g), de * (1 - g_) - e_ * dg),
+            ('TANN', 2, 1 - e, -de)):
+        W[:, k[species], rm] = value
+        dW[:, k[species], rm] = slope
+
+    # Element fractions of the RMs: A[e, r] = m_e * atoms[e, r] / MW[r].
+    atoms = np.einsum('es,nsr->ner', _SPECIES_ATOMS, W)
+    datoms = np.einsum('es,nsrk->nerk', _SPECIES_ATOMS, dW)
+    MW = np.einsum('e,ner->nr', _ATOMIC_MASS, atoms)
+    dMW = np.einsum('e,nerk->nrk', _ATOMIC_MASS, datoms)
+    A = _ATOMIC_MASS[:, None] * atoms / MW[:, None, :]
+    dA = (_ATOMIC_MASS[:, None, None] * datoms - A[..., None] * dMW[:, None]) / MW[:, None, :, None]
+
+    # Right-hand side: the sample, or its extrapolation onto the (moving) triangle.
+    point = np.column_stack([C, H])
+    dpoint = np.broadcast_to(np.eye(2), (n, 2, 2)).copy()
+    if moved is not None and moved.any():
+        V = A[moved, :2, :].transpose(0, 2, 1)
+        dV = dA[moved, :2, :, :].transpose(0, 2, 1, 3)
+        point[moved], dpoint[moved] = _projection_jacobian(point[moved], V, dV, extrapolation_method,
+                                                           legacy_centroid_stepping)
+    rhs = np.column_stack([point, 1 - point.sum(axis=1)])
+    drhs = np.concatenate([dpoint, -dpoint.sum(axis=1, keepdims=True)], axis=1)
+
+    # Mass fractions of the RMs: A x = rhs.
+    inverse = np.linalg.inv(A)
+    x = np.einsum('nij,nj->ni', inverse, rhs)
+    dx = np.einsum('nij,njk->nik', inverse, drhs - np.einsum('nijk,nj->nik', dA, x))
+
+    # RM mole fractions, species moles, species mass fractions.
+    moles = x / MW
+    dmoles = (dx - moles[..., None] * dMW) / MW[..., None]
+    f = moles / moles.sum(axis=1, keepdims=True)
+    df = (dmoles - f[..., None] * dmoles.sum(axis=1)[:, None]) / moles.sum(axis=1)[:, None, None]
+    s = np.einsum('nsr,nr->ns', W, f)
+    ds = np.einsum('nsrk,nr->nsk', dW, f) + np.einsum('nsr,nrk->nsk', W, df)
+    mass = s * _SPECIES_MW
+    dmass = ds * _SPECIES_MW[:, None]
+    total = mass.sum(axis=1, keepdims=True)
+    fractions = mass / total
+    jacobian = (dmass - fractions[..., None] * dmass.sum(axis=1)[:, None]) / total[..., None]
+    return fractions, jacobian
+
+
+def _species_hull_jacobian(C, H, passive) -> np.ndarray:
+    """(m, 7, 2) derivative of the species-hull weights at fixed passive sets.
+
+    On a fixed passive set the NNLS solution is pinv @ rhs(C, H), normalized to
+    sum 1, so its derivative follows from the C and H columns of the pseudo-inverse.
+    """
+    pinv = _SPECIES_HULL._table()[passive @ _SPECIES_HULL._bits]
+    x = np.einsum('mkj,mj->mk', pinv, _SPECIES_HULL._rhs(C, H))
+    dx = _SPECIES_HULL.big * pinv[:, :, :2]
+    total = x.sum(axis=1)
+    w = x / total[:, None]
+    return (dx - w[..., None] * dx.sum(axis=1)[:, None, :]) / total[:, None, None]
+
+
+def triangle_vertices(C, H, biomass_type=BiomassType.OTHERS) -> np.ndarray:
+    """(n, 3, 2) corners (C, H) of the RM1..RM3 triangle each sample is tested against.
+
+    The triangle depends on the sample through the splitting-parameter
+    correlation, so C and H here are the composition the triangle is built for
+    (the N-corrected one when nitrogen is present).
+    """
+    C = np.asarray(C, dtype=float).ravel()
+    H = _as_rows(H, C.size, 'H')
+    bt = np.asarray(biomass_type, dtype=int).ravel()
+    bt = np.full(C.size, bt[0]) if bt.size == 1 else bt
+    if bt.size != C.size:
+        raise ValueError(f"biomass_type has {bt.size} values, expected {C.size}")
+    if not ((bt >= min(BiomassType)) & (bt <= max(BiomassType))).all():
+        raise ValueError(f"Unknown biomass type in {np.unique(bt)}")
+    mixes = _reference_mixtures(C, H, bt)[-1]
+    return np.stack([np.column_stack([c, h]) for _, c, h, _ in mixes], axis=1)
+
+
+def locate_in_triangles(C, H, vertices=None, biomass_type=BiomassType.OTHERS) -> tuple:
+    """Point-in-triangle test for many samples: (outside, coordinates).
+
+    With vertices=None each sample is tested against its own reference
+    triangle for biomass_type (a single type, one per row, or -- to screen a
+    database under several types at once -- a sequence of types given as a
+    (T, 1) array, which yields results of shape (T, n)). Otherwise vertices is
+    any (..., 3, 2) stack accepted by barycentric_coordinates.
+
+    outside is a boolean mask equal to BioSUR.is_outside_triangle row by row;
+    coordinates holds the barycentric coordinates, shape outside.shape + (3,).
+    """
+    if vertices is None:
+        C = np.asarray(C, dtype=float).ravel()
+        H = _as_rows(H, C.size, 'H')
+        bt = np.asarray(biomass_type, dtype=int)
+        if bt.ndim == 2:
+            vertices = np.stack([triangle_vertices(C, H, t) for t in bt[:, 0]])
+        else:
+            vertices = triangle_vertices(C, H, bt)
+    coords = barycentric_coordinates(C, H, vertices)
+    return (coords < 0).any(axis=-1), coords
+
+
+def decompose_species_hull(C, H, warm_start=None, maxiter: int = 100) -> HullSolution:
+    """Species-hull decomposition (ExtrapolationMethod.SPECIES_HULL) of many samples.
+
+    Solves the regularized NNLS of BioSUR._decompose_species_hull for every
+    (C, H) at once and returns a HullSolution: species weights (n, 7) in
+    _CHO_SPECIES order, residual (feasible where < 1e-4), final passive sets and
+    per-sample iteration counts (least-squares solves). warm_start may be
+    'neighbours' or the passive sets of an earlier solution of nearby samples.
+    """
+    return _SPECIES_HULL.solve(C, H, warm_start=warm_start, maxiter=maxiter)
+
+
+def characterize_batch(C, H, N=0.0, ASH=0.0, MOIST=0.0,
+                       biomass_type=BiomassType.OTHERS,
+                       use_extrapolation: bool = False,
+                       extrapolation_method: ExtrapolationMethod = ExtrapolationMethod.CENTROID,
+                       legacy_centroid_stepping: bool = False,
+                       use_N_rich_characterization: bool = False,
+                       protein_splitting_parameter=(1./3., 1./3., 1./3.),
+                       structured: bool = False,
+                       full_output: bool = False,
+                       errors: str = 'raise',
+                       report_diagnostics: bool = True,
+                       jacobian: bool = False):
+    """Characterize many samples in one vectorized pass.
+
+    C, H, N, ASH and MOIST are array-likes of equal length (scalars broadcast);
+    biomass_type may be a single BiomassType or one per row. The options mirror
+    the BioSUR setters (enable_extrapolation, set_extrapolation_method,
+    enable_legacy_centroid_stepping, enable_N_rich_characterization,
+    set_protein_splitting_parameter).
+
+    Returns an (n, 12) float array in output_composition field order, or an (n,)
+    structured array of OUTPUT_DTYPE when structured=True. With full_output=True
+    a second value is returned: a dict of per-row arrays holding the intermediate
+    results the scalar API exposes as attributes ('splitting_parameters',
+    'RM_fraction', 'RM_C_frac', 'RM_H_frac', 'RM_O_frac', 'is_outside',
+    'extrapolated', 'extrapolation_applied', 'extrapolation_error',
+    'extrapolation_feasible', 'valid', 'species_hull_iterations', 'flags').
+
+    With errors='raise' (default) a ValueError naming the first offending row
+    is raised wherever the scalar path would raise. With errors='nan' such rows
+    -- and rows with non-finite inputs or an unknown biomass type -- are skipped
+    instead: their outputs are NaN and info['valid'] is False for them.
+
+    info['flags'] holds the BioSUR.diagnostics.Flag bits of every row. Unless
+    report_diagnostics is False the flag counts of the whole batch are reported
+    once (see BioSUR.diagnostics), instead of one message per sample.
+
+    jacobian=True implies full_output and adds info['jacobian'], the (n, 12, 5)
+    derivatives of every output field with respect to JACOBIAN_INPUTS (C, H, N,
+    ASH, MOIST), computed analytically alongside the composition (see
+    _output_jacobian). At N = 0 the N column is the derivative for increasing N.
+    """
+    full_output = full_output or jacobian
+    if errors not in ('raise', 'nan'):
+        raise ValueError(f"errors must be 'raise' or 'nan', got {errors!r}")
+    C = np.asarray(C, dtype=float).ravel().copy()
+    n = C.size
+    H = _as_rows(H, n, 'H')
+    N = _as_rows(N, n, 'N')
+    ASH = _as_rows(ASH, n, 'ASH')
+    MOIST = _as_rows(MOIST, n, 'MOIST')
+    bt = np.asarray(biomass_type, dtype=int).ravel()
+    bt = np.full(n, bt[0]) if bt.size == 1 else bt
+    if bt.size != n:
+        raise ValueError(f"biomass_type has {bt.size} values, expected {n}")
+    known_type = (bt >= min(BiomassType)) & (bt <= max(BiomassType))
+
+    if errors == 'nan':
+        valid = (np.isfinite(C) & np.isfinite(H) & np.isfinite(N) & np.isfinite(ASH)
+                 & np.isfinite(MOIST) & known_type
+                 & ~invalid_rows(C, H, N, use_N_rich_characterization, protein_splitting_parameter))
+        if not valid.all():
+            return _characterize_valid_rows(
+                valid, (C, H, N, ASH, MOIST, bt), use_extrapolation, extrapolation_method,
+                legacy_centroid_stepping, use_N_rich_characterization, protein_splitting_parameter,
+                structured, full_output, report_diagnostics, jacobian)
+    elif not known_type.all():
+        i = int(np.argmax(~known_type))
+        raise ValueError(f"Unknown biomass type {bt[i]} in row {i}")
+
+    bad = C + H + N > 1.0 + 1e-9
+    if bad.any():
+        i = int(np.argmax(bad))
+        raise ValueError(
+            f"Invalid composition in row {i}: C + H + N = {C[i] + H[i] + N[i]:.4f} exceeds 1 "
+            f"(oxygen by difference would be negative)"
+        )
+    O = 1.0 - C - H - N
+    inputs = (C, H, N, ASH, MOIST, bt)
+
+    # Nitrogen handling (see calculate_output_composition).
+    prot_fraction = np.zeros(n)
+    split = np.zeros(3)
+    has_N = N > 0
+    if has_N.any():
+        if use_N_rich_characterization:
+            split = np.asarray(protein_splitting_parameter, dtype=float)
+            if not math.isclose(split.sum(), 1.0, rel_tol=1e-5):
+                raise ValueError("Protein splitting parameters must sum to 1")
+            prot_mix_N = _protein_mix_nitrogen(split)
+            if prot_mix_N > 0:
+                prot_fraction = np.where(has_N, N / prot_mix_N, 0.0)
+            too_high = prot_fraction >= 1
+            if too_high.any():
+                i = int(np.argmax(too_high))
+                raise ValueError(
+                    f"Nitrogen content ({N[i]:.4f}) in row {i} is too high "
+                    f"for N-rich characterization: the protein fraction reaches "
+                    f"{prot_fraction[i]:.3f} (>= 1). The sample cannot be represented."
+                )
+            new = {}
+            for element, values in (('C', C), ('H', H)):
+                prot_element = (split[0] * _FRAC[element]['PROTC'] + split[1] * _FRAC[element]['PROTH']
+                                + split[2] * _FRAC[element]['PROTO'])
+                new[element] = (values - prot_fraction * prot_element) / (1 - prot_fraction)
+            C = np.where(has_N, new['C'], C)
+            H = np.where(has_N, new['H'], H)
+            O = np.where(has_N, 1 - C - H, O)
+        else:
+            total_without_N = C + H + O
+            C = np.where(has_N, C / total_without_N, C)
+            H = np.where(has_N, H / total_without_N, H)
+            O = np.where(has_N, 1 - C - H, O)
+
+    # Splitting parameters and reference mixtures.
+    sp, rm1_w, rm2_w, rm3_w, mixes = _reference_mixtures(C, H, bt)
+    (MW1, C1, H1, O1), (MW2, C2, H2, O2), (MW3, C3, H3, O3) = mixes
+    A = np.stack([np.column_stack([C1, C2, C3]),
+                  np.column_stack([H1, H2, H3]),
+                  np.column_stack([O1, O2, O3])], axis=1)
+    # Clipped splitting parameters can make two mixtures identical (e.g. N-rich
+    # wood, RM2 = RM3 = pure LIGC): the triangle has no area and no solution.
+    degenerate = ~(np.abs(np.linalg.det(A)) > _DEGENERATE_DET)
+    if degenerate.any():
+        if errors == 'nan':
+            return _characterize_valid_rows(
+                ~degenerate, inputs, use_extrapolation, extrapolation_method,
+                legacy_centroid_stepping, use_N_rich_characterization, protein_splitting_parameter,
+                structured, full_output, report_diagnostics, jacobian)
+        i = int(np.argmax(degenerate))
+        raise ValueError(f"Reference mixtures of row {i} are degenerate (the triangle has no area); "
+                         f"the sample cannot be represented")
+    V = ((C1, H1), (C2, H2), (C3, H3))
+
+    is_outside = _outside(C, H, V)
+    outside = is_outside & bool(use_extrapolation)
+    hull = outside & (extrapolation_method == ExtrapolationMethod.SPECIES_HULL)
+    moved = outside & ~hull
+
+    extrapolated = np.zeros((n, 3))
+    extrapolation_error = np.zeros(n)
+    extrapolation_feasible = np.ones(n, dtype=bool)
+
+    # Right-hand side of the RM linear system, moved onto the triangle if needed.
+    bC, bH, bO = C.copy(), H.copy(), O.copy()
+    if moved.any():
+        Vm = tuple((x[moved], y[moved]) for x, y in V)
+        if extrapolation_method == ExtrapolationMethod.NEAREST_POINT:
+            eC, eH = _extrapolate_nearest_point(C[moved], H[moved], Vm)
+        elif legacy_centroid_stepping:
+            eC, eH = _extrapolate_centroid_stepped(C[moved], H[moved], Vm)
+        else:
+            eC, eH = _centroid_ray_exit(C[moved], H[moved], Vm)
+        bC[moved], bH[moved], bO[moved] = eC, eH, 1 - eC - eH
+        extrapolated[moved] = np.column_stack([bC[moved], bH[moved], bO[moved]])
+        extrapolation_error[moved] = np.hypot(C[moved] - eC, H[moved] - eH)
+
+    b = np.column_stack([bC, bH, bO])
+    solve = ~hull
+    x = np.zeros((n, 3))
+    if solve.any():
+        x[solve] = np.linalg.solve(A[solve], b[solve][:, :, None])[:, :, 0]
+    total = x[:, 0] + x[:, 1] + x[:, 2]
+    failed = solve & ~(np.abs(total - 1) <= 1e-9 * np.maximum(np.abs(total), 1.0))
+    if failed.any():
+        raise ValueError(f"Solution of the linear sistem failed in row {int(np.argmax(failed))}: "
+                         f"sum of fractions is not 1")
+
+    # Mass -> mole fractions of the reference mixtures (species-hull rows, which
+    # skip the solve, come out as 0/0 here and are overwritten below).
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denom = x[:, 0]/MW1 + x[:, 1]/MW2 + x[:, 2]/MW3
+        f1 = x[:, 0] / MW1 / denom
+        f2 = x[:, 1] / MW2 / denom
+        f3 = x[:, 2] / MW3 / denom
+
+    # Species mole fractions, then mass fractions.
+    species = {
+        'CELL': rm1_w[0] * f1,
+        'HCELL': rm1_w[1] * f1,
+        'LIGO': rm3_w[0] * f3,
+        'LIGH': rm2_w[0] * f2,
+        'LIGC': rm2_w[1] * f2 + rm3_w[1] * f3,
+        'TANN': rm3_w[2] * f3,
+        'TGL': rm2_w[2] * f2,
+    }
+    weighted = [species[s] * _MW[s] for s in _CHO_SPECIES]
+    avg_MW = weighted[0]
+    for w in weighted[1:]:
+        avg_MW = avg_MW + w
+    out = np.zeros((n, len(OUTPUT_DTYPE.names)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for j, s in enumerate(_CHO_SPECIES):
+            out[:, j] = weighted[j] / avg_MW
+
+    # Species-hull rows: the decomposition already gives species mass fractions.
+    hull_iterations = np.zeros(n, dtype=int)
+    if hull.any():
+        decomposition = _decompose_species_hull_rows(C[hull], H[hull])
+        out[hull, :len(_CHO_SPECIES)] = decomposition.weights
+        extrapolation_feasible[hull] = decomposition.residual < 1e-4
+        extrapolation_error[hull] = decomposition.residual
+        extrapolated[hull] = np.column_stack([C[hull], H[hull], O[hull]])
+        hull_iterations[hull] = decomposition.iterations
+
+    if jacobian:
+        output_jacobian = _output_jacobian(
+            C, H, N, ASH, MOIST, bt, out[:, :len(_CHO_SPECIES)].copy(), prot_fraction, moved, hull,
+            decomposition.passive if hull.any() else None, extrapolation_method, legacy_centroid_stepping,
+            use_N_rich_characterization, protein_splitting_parameter)
+
+    # Protein pseudo-species, then scale to the solid fraction (output_composition order).
+    out[:, :len(_CHO_SPECIES)] *= (1 - prot_fraction)[:, None]
+    for j, p in enumerate(split):
+        out[:, len(_CHO_SPECIES) + j] = prot_fraction * p
+    solid_fraction = 1 - ASH - MOIST
+    out[:, :-2] *= solid_fraction[:, None]
+    out[:, -2] = ASH
+    out[:, -1] = MOIST
+
+    flags = (np.where(is_outside, np.uint8(Flag.OUTSIDE_TRIANGLE), np.uint8(0))
+             | np.where(outside, np.uint8(Flag.EXTRAPOLATED), np.uint8(0))
+             | np.where(extrapolation_feasible, np.uint8(0), np.uint8(Flag.EXTRAPOLATION_INFEASIBLE)))
+    if not use_N_rich_characterization:
+        flags |= np.where(N > HIGH_NITROGEN_THRESHOLD, np.uint8(Flag.HIGH_NITROGEN), np.uint8(0))
+    if report_diagnostics:
+        report(count_flags(flags), n)
+
+    if structured:
+        out = _as_structured(out)
+
+    if not full_output:
+        return out
+
+    fractions = np.where(hull[:, None], 0.0, np.column_stack([f1, f2, f3]))
+    info = {
+        'splitting_parameters': sp,
+        'RM_fraction': fractions,
+        'RM_C_frac': np.column_stack([C1, C2, C3]),
+        'RM_H_frac': np.column_stack([H1, H2, H3]),
+        'RM_O_frac': np.column_stack([O1, O2, O3]),
+        'is_outside': is_outside,
+        'extrapolated': extrapolated,
+        'extrapolation_applied': outside,
+        'extrapolation_error': extrapolation_error,
+        'extrapolation_feasible': extrapolation_feasible,
+        'valid': np.ones(n, dtype=bool),
+        'species_hull_iterations': hull_iterations,
+        'flags': flags,
+    }
+    if jacobian:
+        info['jacobian'] = output_jacobian
+    return out, info
+
+
+def _output_jacobian(C, H, N, ASH, MOIST, bt, y, prot_fraction, moved, hull, hull_passive,
+                     extrapolation_method, legacy_centroid_stepping,
+                     use_N_rich_characterization, protein_splitting_parameter) -> np.ndarray:
+    """(n, 12, 5) d(output fields)/d(C, H, N, ASH, MOIST) for characterize_batch.
+
+    C and H are the N-corrected compositions fed to the RM system and y the
+    normalized CHO species fractions before protein and solid scaling. The
+    chain runs inputs -> N correction -> CHO fractions (_cho_fractions_jacobian,
+    or the species-hull pseudo-inverse on its passive set) -> protein and solid
+    scaling. Each row gets the derivative of the branch it took (clipped
+    splitting parameters, extrapolation edge, passive set), so kinks are
+    one-sided rather than smeared as with finite differences.
+    """
+    n = C.size
+    split = np.asarray(protein_splitting_parameter, dtype=float)
+    prot_mix_N = _protein_mix_nitrogen(split)
+
+    # d(C', H')/d(C, H, N) of the nitrogen handling, and dp/dN of the protein fraction.
+    T = np.zeros((n, 2, 3))
+    if use_N_rich_characterization and prot_mix_N > 0:
+        p = prot_fraction
+        dp = np.full(n, 1 / prot_mix_N)
+        for row, (element, values) in enumerate((('C', C), ('H', H))):
+            prot_element = (split[0] * _FRAC[element]['PROTC'] + split[1] * _FRAC[element]['PROTH']
+                            + split[2] * _FRAC[element]['PROTO'])
+            T[:, row, row] = 1 / (1 - p)
+            T[:, row, 2] = (values - prot_element) / (1 - p) * dp
+    else:
+        p, dp = np.zeros(n), np.zeros(n)
+        for row, values in enumerate((C, H)):
+            T[:, row, row] = 1 / (1 - N)
+            T[:, row, 2] = values / (1 - N)
+
+    dy = np.zeros((n, len(_CHO_SPECIES), 2))
+    solve = ~hull
+    if solve.any():
+        dy[solve] = _cho_fractions_jacobian(C[solve], H[solve], bt[solve], moved[solve],
+                                            extrapolation_method, legacy_centroid_stepping)[1]
+    if hull.any():
+        dy[hull] = _species_hull_jacobian(C[hull], H[hull], hull_passive)
+
+    solid = 1 - ASH - MOIST
+    J = np.zeros((n, len(OUTPUT_DTYPE.names), 5))
+    cho = slice(0, len(_CHO_SPECIES))
+    prot = slice(len(_CHO_SPECIES), len(_CHO_SPECIES) + 3)
+    J[:, cho, :3] = np.einsum('nsk,nkj->nsj', dy, T) * ((1 - p) * solid)[:, None, None]
+    J[:, cho, 2] -= y * (dp * solid)[:, None]
+    J[:, cho, 3] = J[:, cho, 4] = -y * (1 - p)[:, None]
+    J[:, prot, 2] = (dp * solid)[:, None] * split
+    J[:, prot, 3] = J[:, prot, 4] = -p[:, None] * split
+    J[:, -2, 3] = 1.0
+    J[:, -1, 4] = 1.0
+    return J
+
+
+def _characterize_valid_rows(valid, inputs, use_extrapolation, extrapolation_method,
+                             legacy_centroid_stepping, use_N_rich_characterization,
+                             protein_splitting_parameter, structured, full_output,
+                             report_diagnostics, jacobian):
+    """characterize_batch(errors='nan') of the valid rows, the others flagged INVALID."""
+    n = valid.size
+    out, info = characterize_batch(
+        *(column[valid] for column in inputs),
+        use_extrapolation, extrapolation_method, legacy_centroid_stepping,
+        use_N_rich_characterization, protein_splitting_parameter, full_output=True,
+        errors='nan', report_diagnostics=False, jacobian=jacobian)
+    out, info = _scatter_rows(valid, out, info, structured)
+    info['flags'][~valid] = Flag.INVALID
+    if report_diagnostics:
+        report(count_flags(info['flags']), n)
+    return (out, info) if full_output else out
+
+
+def _as_structured(out: np.ndarray) -> np.ndarray:
+    return np.rec.fromarrays(out.T, dtype=OUTPUT_DTYPE).view(np.ndarray)
+
+
+def _scatter_rows(valid, out, info, structured):
+    """Expand results computed on the valid rows back to every row (errors='nan')."""
+    full = np.full((valid.size, out.shape[1]), np.nan)
+    full[valid] = out
+    if structured:
+        full = _as_structured(full)
+    expanded = {}
+    for key, values in info.items():
+        fill = False if values.dtype == bool else 0 if values.dtype.kind in 'iu' else np.nan
+        expanded[key] = np.full((valid.size,) + values.shape[1:], fill, dtype=values.dtype)
+        expanded[key][valid] = values
+    return full, expanded
@@ -0,0 +1,367 @@
+"""Headless batch runner: ``python -m BioSUR INPUT [-o OUTPUT] [options]``.
+
+Streams a table of samples -- CSV, or Parquet/Feather when pyarrow is installed --
+through characterize_batch one chunk at a time and writes every input column
+followed by the surrogate composition and the extrapolation bookkeeping. Only
+one chunk is held in memory, and neither matplotlib nor customtkinter is
+imported.
+
+Recognized input columns (case-insensitive): C and H (required), N, ASH and
+MOIST (blank/missing -> 0) and biomass_type (an index 0-3 or a name such as
+"Hardwood"; missing -> --biomass-type). Rows that cannot be characterized are
+kept, with empty composition columns and the reason in the `error` column;
+the `flags` column holds the BioSUR.diagnostics.Flag bits of every row.
+"""
+import argparse
+import csv
+import functools
+import itertools
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+from BioSUR.batch import characterize_batch
+from BioSUR.core import BiomassType, ExtrapolationMethod, OUTPUT_DTYPE
+from BioSUR.diagnostics import collect
+
+INPUT_COLUMNS = ('C', 'H', 'N', 'ASH', 'MOIST')
+BIOMASS_TYPE_COLUMN = 'biomass_type'
+FLAG_COLUMNS = ('extrapolation_applied', 'extrapolation_error', 'extrapolation_feasible', 'flags', 'error')
+
+# --extrapolation choice -> (use_extrapolation, extrapolation_method)
+EXTRAPOLATION_CHOICES = {
+    'off': (False, ExtrapolationMethod.CENTROID),
+    'centroid': (True, ExtrapolationMethod.CENTROID),
+    'nearest-point': (True, ExtrapolationMethod.NEAREST_POINT),
+    'species-hull': (True, ExtrapolationMethod.SPECIES_HULL),
+}
+
+_ARROW_FORMATS = ('.parquet', '.feather', '.arrow')
+
+
+def _table_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if path == '-' or ext not in _ARROW_FORMATS:
+        return 'csv'
+    return 'parquet' if ext == '.parquet' else 'feather'
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise SystemExit("Parquet/Feather files need pyarrow (pip install pyarrow); "
+                         "use CSV otherwise.") from None
+    return pyarrow
+
+
+# --- Readers: yield one {column: sequence} dict per chunk ---------------------
+
+def _read_csv(path: str, chunk_size: int, delimiter: str):
+    f = sys.stdin if path == '-' else open(path, newline='')
+    try:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        width = len(header)
+        while True:
+            rows = list(itertools.islice(reader, chunk_size))
+            if not rows:
+                return
+            rows = [row + [''] * (width - len(row)) if len(row) < width else row[:width] for row in rows]
+            yield dict(zip(header, (list(column) for column in zip(*rows))))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _read_arrow(path: str, chunk_size: int, fmt: str):
+    pa = _require_pyarrow()
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size)
+    else:
+        import pyarrow.ipc
+        reader = pa.ipc.open_file(pa.memory_map(path))
+        batches = (reader.get_batch(i).slice(start, chunk_size)
+                   for i in range(reader.num_record_batches)
+                   for start in range(0, reader.get_batch(i).num_rows, chunk_size))
+    for batch in batches:
+        # Nulls are blanks (None), not NaN, so _to_float can give them the default.
+        yield {name: column.to_numpy(zero_copy_only=False) if column.null_count == 0
+               else np.array(column.to_pylist(), dtype=object)
+               for name, column in zip(batch.schema.names, batch.columns)}
+
+
+def read_chunks(path: str, chunk_size: int, delimiter: str = ','):
+    """Iterate over the input table in chunks of at most chunk_size rows."""
+    fmt = _table_format(path)
+    if fmt == 'csv':
+        return _read_csv(path, chunk_size, delimiter)
+    return _read_arrow(path, chunk_size, fmt)
+
+
+# --- Writers -------------------------------------------------------------------
+
+class _CSVWriter:
+    def __init__(self, path: str, delimiter: str):
+        self._file = sys.stdout if path == '-' else open(path, 'w', newline='')
+        self._writer = csv.writer(self._file, delimiter=delimiter)
+        self._header_written = False
+
+    def write(self, columns: dict) -> None:
+        if not self._header_written:
+            self._writer.writerow(columns.keys())
+            self._header_written = True
+        cells = []
+        for values in columns.values():
+            values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+            cells.append(['' if v is None or (isinstance(v, float) and v != v) else v for v in values])
+        self._writer.writerows(zip(*cells))
+
+    def close(self) -> None:
+        if self._file is sys.stdout:
+            self._file.flush()
+        else:
+            self._file.close()
+
+
+class _ArrowWriter:
+    def __init__(self, path: str, fmt: str):
+        self._pa = _require_pyarrow()
+        self._path = path
+        self._fmt = fmt
+        self._writer = None
+
+    def write(self, columns: dict) -> None:
+        table = self._pa.table({name: list(values) if isinstance(values, list) else values
+                                for name, values in columns.items()})
+        if self._writer is None:
+            if self._fmt == 'parquet':
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self._path, table.schema)
+            else:
+                import pyarrow.ipc
+                self._writer = self._pa.ipc.new_file(self._path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_writer(path: str, delimiter: str = ','):
+    fmt = _table_format(path)
+    if fmt == 'csv':
+        return _CSVWriter(path, delimiter)
+    return _ArrowWriter(path, fmt)
+
+
+# --- Parsing and characterization --------------------------------------------
+
+def _to_float(values, default: float) -> np.ndarray:
+    """Numeric column; blanks (empty or null) -> default, anything else unparseable -> NaN.
+
+    An explicit NaN stays NaN, so characterize_batch reports the row invalid
+    instead of treating a missing measurement as 0.
+    """
+    try:
+        arr = np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        pass
+    else:
+        # NumPy converts None to NaN as well; only those are blanks.
+        for i in np.flatnonzero(np.isnan(arr)):
+            if values[i] is None:
+                arr[i] = default
+        return arr
+    arr = np.empty(len(values))
+    for i, v in enumerate(values):
+        if v is None or (isinstance(v, str) and not v.strip()):
+            arr[i] = default
+            continue
+        try:
+            arr[i] = float(v)
+        except (TypeError, ValueError):
+            arr[i] = np.nan
+    return arr
+
+
+def parse_biomass_type(value) -> int:
+    """Biomass-type index from an index or a name; -1 when not recognized."""
+    if isinstance(value, (bool, np.bool_)):
+        return -1  # true would otherwise pass as 1 (GRASS)
+    if isinstance(value, str):
+        value = value.strip()
+        if value.upper() in BiomassType.__members__:
+            return int(BiomassType[value.upper()])
+    try:
+        index = float(value)
+    except (TypeError, ValueError):
+        return -1
+    return int(index) if index.is_integer() and index in set(BiomassType) else -1
+
+
+def _biomass_types(values, default: BiomassType) -> np.ndarray:
+    """Biomass-type column; blanks -> default, anything unrecognized -> -1."""
+    cache = {}
+    out = np.empty(len(values), dtype=int)
+    for i, v in enumerate(values):
+        key = v.item() if isinstance(v, np.generic) else v
+        if key not in cache:
+            blank = key is None or (isinstance(key, str) and not key.strip())
+            cache[key] = int(default) if blank else parse_biomass_type(key)
+        out[i] = cache[key]
+    return out
+
+
+def _find_columns(columns: dict) -> dict:
+    by_upper = {name.strip().upper(): name for name in columns}
+    wanted = INPUT_COLUMNS + (BIOMASS_TYPE_COLUMN,)
+    return {name: by_upper[name.upper()] for name in wanted if name.upper() in by_upper}
+
+
+def characterize_columns(columns: dict, biomass_type: BiomassType, options: dict,
+                         characterize=characterize_batch) -> dict:
+    """Characterize one chunk; returns the output columns in output order.
+
+    Input columns are passed through (except the ones the output composition
+    replaces: ASH, MOIST), followed by the output_composition fields and
+    FLAG_COLUMNS. `characterize` computes (out, info) from the parsed arrays
+    and defaults to the single-process batch path.
+    """
+    found = _find_columns(columns)
+    if 'C' not in found or 'H' not in found:
+        raise SystemExit(f"Input must have C and H columns; found {list(columns)}")
+    n = len(columns[found['C']])
+    arrays = {name: _to_float(columns[found[name]], np.nan if name in ('C', 'H') else 0.0)
+              if name in found else np.zeros(n) for name in INPUT_COLUMNS}
+    bt = (_biomass_types(columns[found[BIOMASS_TYPE_COLUMN]], biomass_type)
+          if BIOMASS_TYPE_COLUMN in found else np.full(n, int(biomass_type)))
+
+    out, info = characterize(arrays['C'], arrays['H'], arrays['N'], arrays['ASH'], arrays['MOIST'], bt,
+                             full_output=True, errors='nan', **options)
+
+    finite = np.ones(n, dtype=bool)
+    for values in arrays.values():
+        finite &= np.isfinite(values)
+    error = np.where(info['valid'], '',
+                     np.where(~finite, 'missing or non-numeric input',
+                              np.where(bt < 0, 'unknown biomass type',
+                                       'composition cannot be represented')))
+
+    result = {name: values for name, values in columns.items()
+              if name.strip().upper() not in OUTPUT_DTYPE.names}
+    for j, name in enumerate(OUTPUT_DTYPE.names):
+        result[name] = out[:, j]
+    result['extrapolation_applied'] = info['extrapolation_applied']
+    result['extrapolation_error'] = np.where(info['valid'], info['extrapolation_error'], np.nan)
+    result['extrapolation_feasible'] = info['extrapolation_feasible']
+    result['flags'] = info['flags']
+    result['error'] = error.tolist()
+    return result
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m BioSUR',
+        description="Characterize a table of biomass samples with BioSUR (headless).")
+    parser.add_argument('input', help="input table (.csv, .parquet, .feather; '-' for CSV on stdin)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="output table, format from the extension (default: CSV on stdout)")
+    parser.add_argument('--biomass-type', default='Others', type=str,
+                        help="biomass type for rows without a biomass_type value (default: Others)")
+    parser.add_argument('--extrapolation', choices=EXTRAPOLATION_CHOICES, default='off',
+                        help="extrapolation of out-of-triangle samples (default: off)")
+    parser.add_argument('--legacy-centroid', action='store_true',
+                        help="use the historical 1%%-step march for centroid extrapolation")
+    parser.add_argument('--n-rich', action='store_true',
+                        help="characterize nitrogen as protein (PROTC/PROTH/PROTO)")
+    parser.add_argument('--protein-split', nargs=3, type=float, metavar=('PROTC', 'PROTH', 'PROTO'),
+                        default=(1./3., 1./3., 1./3.), help="protein split for --n-rich (default: equal)")
+    parser.add_argument('--chunk-size', type=int, default=50_000, help="rows per chunk (default: 50000)")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="worker processes (0: one per CPU; default: 1, no pool)")
+    parser.add_argument('--cache', metavar='PATH',
+                        help="result cache directory: rows characterized before are read from it, "
+                             "new rows are added (see BioSUR.result_cache)")
+    parser.add_argument('--delimiter', default=',', help="CSV delimiter (default: ',')")
+    parser.add_argument('-q', '--quiet', action='store_true', help="do not print the summary to stderr")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="print the throughput of every shard to stderr (with --workers)")
+    return parser
+
+
+def characterization_options(args) -> dict:
+    """characterize_batch keyword options from the parsed command line."""
+    use_extrapolation, method = EXTRAPOLATION_CHOICES[args.extrapolation]
+    return dict(use_extrapolation=use_extrapolation,
+                extrapolation_method=method,
+                legacy_centroid_stepping=args.legacy_centroid,
+                use_N_rich_characterization=args.n_rich,
+                protein_splitting_parameter=tuple(args.protein_split))
+
+
+def _print_chunk(stats) -> None:
+    print(f"BioSUR: shard {stats.index} ({stats.rows} rows) in {stats.seconds:.3f} s "
+          f"({stats.rows_per_second:.0f} rows/s, pid {stats.pid})", file=sys.stderr)
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.chunk_size <= 0:
+        raise SystemExit("--chunk-size must be positive")
+    biomass_type = parse_biomass_type(args.biomass_type)
+    if biomass_type < 0:
+        raise SystemExit(f"Unknown biomass type {args.biomass_type!r}; "
+                         f"use one of {[t.name.capitalize() for t in BiomassType]} or 0-3")
+    if args.workers < 0:
+        raise SystemExit("--workers must be >= 0")
+    options = characterization_options(args)
+
+    start = time.perf_counter()
+    rows = invalid = 0
+    characterize, executor = characterize_batch, None
+    if args.workers != 1:
+        from concurrent.futures import ProcessPoolExecutor
+        from BioSUR.parallel import characterize_parallel
+        workers = args.workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=workers)
+        characterize = functools.partial(characterize_parallel, executor=executor, workers=workers,
+                                         progress=_print_chunk if args.verbose else None)
+    cache = None
+    if args.cache:
+        from BioSUR.result_cache import ResultCache
+        cache = ResultCache(args.cache, compute=characterize)
+        characterize = cache.characterize_batch
+    writer = open_writer(args.output, args.delimiter)
+    try:
+        with collect(log_level=logging.DEBUG) as diagnostics:
+            for columns in read_chunks(args.input, args.chunk_size, args.delimiter):
+                result = characterize_columns(columns, BiomassType(biomass_type), options, characterize)
+                writer.write(result)
+                rows += len(result['error'])
+                invalid += sum(1 for e in result['error'] if e)
+    finally:
+        writer.close()
+        if executor is not None:
+            executor.shutdown()
+        if cache is not None:
+            cache_info = cache.info()
+            cache.close()
+
+    if not args.quiet:
+        elapsed = time.perf_counter() - start
+        print(f"BioSUR: {rows} rows ({invalid} not characterized) in {elapsed:.2f} s "
+              f"({rows / elapsed if elapsed > 0 else 0:.0f} rows/s)", file=sys.stderr)
+        if cache is not None:
+            print(f"BioSUR: cache {cache_info.hits} hits, {cache_info.misses} misses "
+                  f"({cache_info.currsize} rows in {args.cache})", file=sys.stderr)
+        if diagnostics.counts:
+            print("BioSUR: flags " + ", ".join(f"{name}={count}" for name, count in diagnostics.summary().items()),
+                  file=sys.stderr)
+    return 0
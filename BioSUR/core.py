@@ -1,8 +1,11 @@
+from collections import OrderedDict, namedtuple
 from dataclasses import dataclass, field
 import numpy as np
 from enum import IntEnum, Enum
 from BioSUR.species import ReferenceMixture, REFERENCE_SPECIES
+from BioSUR.diagnostics import Flag, HIGH_NITROGEN_THRESHOLD, report_sample
 import math
+import threading
 
 class BiomassType(IntEnum):
     OTHERS = 0
@@ -13,8 +16,10 @@ class BiomassType(IntEnum):
 class ExtrapolationMethod(Enum):
     """How to handle a sample that falls outside the reference-mixture triangle.
 
-    CENTROID       - march the sample toward the triangle centroid in fixed steps
-                     until it lands inside (historical default).
+    CENTROID       - move the sample along the line toward the triangle centroid
+                     until it reaches the triangle (default). Closed form; the
+                     historical 1%-step march is kept behind
+                     BioSUR.enable_legacy_centroid_stepping.
     NEAREST_POINT  - project the sample onto the closest point of the triangle
                      boundary (minimum distortion of C/H).
     SPECIES_HULL   - keep the sample fixed and instead solve for a non-negative
@@ -68,62 +73,466 @@ def _nnls(A: np.ndarray, b: np.ndarray, maxiter: int = 100) -> np.ndarray:
         w = A.T @ (b - A @ x)
     return x
 
+
+# Result of a species-hull decomposition of n samples: weights (n, 7) ordered as
+# _CHO_SPECIES, |dC| + |dH| residual (n,), final passive sets (n, 7) usable as a
+# warm start, and the number of least-squares solves spent on each sample.
+HullSolution = namedtuple('HullSolution', ['weights', 'residual', 'passive', 'iterations'])
+
+
+class _SpeciesHullSolver:
+    """Lawson-Hanson NNLS for the fixed species-hull system, many samples at once.
+
+    The system matrix never changes -- only the (C, H) entries of the right-hand
+    side do -- so the least-squares solution on every possible passive set is a
+    precomputed pseudo-inverse (2**7 of them, built on first use) and each
+    active-set iteration is one gathered matrix-vector product per sample. All
+    samples iterate in lockstep; those already optimal drop out. It follows
+    _nnls step for step (same tolerance, same entering/leaving rules).
+    """
+    big = 1e3      # weight pinning the C, H and sum-to-1 equality rows
+    reg = 1e-3     # ridge on the identity block -> minimum-norm (most balanced) fit
+    tol = 1e-10
+    seed_stride = 64   # warm start 'neighbours': one cold-solved seed per this many rows
+
+    def __init__(self, species=_CHO_SPECIES):
+        self.species = tuple(species)
+        k = len(self.species)
+        self.c_row = np.array([REFERENCE_SPECIES[s]['C_frac'] for s in self.species], dtype=float)
+        self.h_row = np.array([REFERENCE_SPECIES[s]['H_frac'] for s in self.species], dtype=float)
+        self.A = np.vstack([self.big * self.c_row, self.big * self.h_row, self.big * np.ones(k),
+                            self.reg * np.eye(k)])
+        self._bits = 1 << np.arange(k)
+        self._pinv = None
+        self._lock = threading.Lock()
+
+    def _table(self) -> np.ndarray:
+        """(2**k, k, m) pseudo-inverses of A restricted to each passive set (zero rows elsewhere)."""
+        if self._pinv is None:
+            with self._lock:
+                if self._pinv is None:
+                    m, k = self.A.shape
+                    table = np.zeros((1 << k, k, m))
+                    for mask in range(1, 1 << k):
+                        cols = np.flatnonzero(mask & self._bits)
+                        table[mask, cols] = np.linalg.pinv(self.A[:, cols])
+                    table.flags.writeable = False
+                    self._pinv = table
+        return self._pinv
+
+    def _rhs(self, C, H) -> np.ndarray:
+        b = np.zeros((C.size, self.A.shape[0]))
+        b[:, 0] = self.big * C
+        b[:, 1] = self.big * H
+        b[:, 2] = self.big * 1.0
+        return b
+
+    def _least_squares(self, P, b) -> np.ndarray:
+        return np.einsum('nkm,nm->nk', self._table()[P @ self._bits], b)
+
+    def _warm_passive(self, C, H, warm_start):
+        if isinstance(warm_start, str):
+            if warm_start != 'neighbours':
+                raise ValueError(f"warm_start must be None, 'neighbours' or passive sets, got {warm_start!r}")
+            n = C.size
+            if n < 2 * self.seed_stride:
+                return None, None
+            # Neighbouring samples share their optimal passive set: order the
+            # samples along a coarse C grid, solve every seed_stride-th one cold
+            # and offer its passive set to the samples that follow it.
+            order = np.lexsort((H, np.floor(C / 0.005)))
+            seeds = order[::self.seed_stride]
+            seed_solution = self.solve(C[seeds], H[seeds])
+            P0 = np.empty((n, len(self.species)), dtype=bool)
+            P0[order] = seed_solution.passive[np.arange(n) // self.seed_stride]
+            # The cold solves count towards the seeds they were spent on.
+            seed_iterations = np.zeros(n, dtype=int)
+            seed_iterations[seeds] = seed_solution.iterations
+            return P0, seed_iterations
+        P0 = np.asarray(warm_start, dtype=bool)
+        if P0.shape != (C.size, len(self.species)):
+            raise ValueError(f"warm_start passive sets must have shape {(C.size, len(self.species))}")
+        return P0, None
+
+    def solve(self, C, H, warm_start=None, maxiter: int = 100) -> HullSolution:
+        """Decompose every (C, H) onto the species hull; see HullSolution.
+
+        warm_start: None (cold start), 'neighbours' (seed from nearby samples of
+        the same call) or an (n, 7) bool array of candidate passive sets, e.g.
+        HullSolution.passive of a previous call. A candidate is kept only if its
+        least-squares solution is strictly positive; Lawson-Hanson then proceeds
+        from it. Warm and cold starts agree except for near-ties, where two passive
+        sets both satisfy the optimality conditions within tol (weights may then
+        differ by ~1e-4 between almost equally good fits); the scalar path always
+        starts cold.
+        """
+        C, H = np.broadcast_arrays(np.atleast_1d(np.asarray(C, dtype=float)).ravel(),
+                                   np.atleast_1d(np.asarray(H, dtype=float)).ravel())
+        n, k, tol = C.size, len(self.species), self.tol
+        A = self.A
+        b = self._rhs(C, H)
+        x = np.zeros((n, k))
+        P = np.zeros((n, k), dtype=bool)
+        iterations = np.zeros(n, dtype=int)
+
+        if warm_start is not None:
+            P0, seed_iterations = self._warm_passive(C, H, warm_start)
+            if P0 is not None:
+                tried = P0.any(axis=1)
+                s = self._least_squares(P0, b)
+                iterations += tried
+                if seed_iterations is not None:
+                    iterations += seed_iterations
+                ok = tried & np.all(np.where(P0, s > tol, True), axis=1)
+                x[ok] = s[ok]
+                P[ok] = P0[ok]
+
+        todo = np.arange(n)
+        for _ in range(maxiter * k):
+            w = (b[todo] - x[todo] @ A.T) @ A
+            Pt = P[todo]
+            go = ~Pt.all(axis=1) & np.any(~Pt & (w > tol), axis=1)
+            todo = todo[go]
+            if todo.size == 0:
+                break
+            # Bring the most promising variable of each sample into its passive set.
+            j = np.argmax(np.where(Pt[go], -np.inf, w[go]), axis=1)
+            P[todo, j] = True
+            inner = todo
+            while inner.size:
+                Pi = P[inner]
+                s = self._least_squares(Pi, b[inner])
+                iterations[inner] += 1
+                ok = np.all(np.where(Pi, s > tol, True), axis=1)
+                x[inner[ok]] = s[ok]
+                inner, s, Pi = inner[~ok], s[~ok], Pi[~ok]
+                if inner.size == 0:
+                    break
+                # Step only as far as the first passive variable hitting zero.
+                xr = x[inner]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    alpha = np.where(Pi & (s <= tol), xr / (xr - s), np.inf).min(axis=1)
+                xr = xr + alpha[:, None] * (s - xr)
+                x[inner] = xr
+                P[inner] = Pi & ~(xr <= tol)
+
+        total = x.sum(axis=1)
+        w = np.where(total[:, None] > 0, x / np.where(total > 0, total, 1.0)[:, None], x)  # exact sum-to-1
+        residual = np.abs(w @ self.c_row - C) + np.abs(w @ self.h_row - H)
+        return HullSolution(w, residual, P, iterations)
+
+
+_SPECIES_HULL = _SpeciesHullSolver()
+
+# Optional precomputed grid (BioSUR.hull_table.SpeciesHullTable) consulted before
+# the exact solve; see set_species_hull_table.
+_SPECIES_HULL_TABLE = None
+
+
+def set_species_hull_table(table) -> None:
+    """Use a precomputed species-hull table for SPECIES_HULL extrapolation.
+
+    table is a SpeciesHullTable, the path of a saved one (built and saved there
+    first if missing or stale), or None to go back to the exact solve.
+    Interpolated weights match the exact solve to within table.max_error.
+    """
+    global _SPECIES_HULL_TABLE
+    if table is not None and not hasattr(table, 'decompose'):
+        from BioSUR.hull_table import SpeciesHullTable
+        table = SpeciesHullTable.load_or_build(table)
+    _SPECIES_HULL_TABLE = table
+
+
+def species_hull_table():
+    """The species-hull table in use, or None."""
+    return _SPECIES_HULL_TABLE
+
+
+def _decompose_species_hull_rows(C, H) -> HullSolution:
+    """Species-hull decomposition of many samples, from the table when one is set."""
+    table = _SPECIES_HULL_TABLE
+    if table is not None:
+        return table.decompose(C, H)
+    return _SPECIES_HULL.solve(C, H)
+
+
+def _species_hull_weights(C: float, H: float) -> tuple:
+    """Minimum-norm non-negative mix of the CHO species reproducing (C, H).
+
+    Returns (w, residual): the species mass fractions (ordered as _CHO_SPECIES,
+    summing to 1) and the |dC| + |dH| error of the reproduced composition, which
+    is ~0 inside the reference-species hull and grows outside it.
+    """
+    solution = _decompose_species_hull_rows(C, H)
+    return solution.weights[0], float(solution.residual[0])
+
+# Relative push past the triangle edge for the closed-form centroid extrapolation,
+# so the landing point tests as inside despite rounding (moves C/H by ~1e-10).
+_CENTROID_EXIT_MARGIN = 1e-9
+
+
+def _centroid_ray_exit(C, H, V):
+    """Point where the ray from (C, H) to the triangle centroid enters the triangle.
+
+    V holds the vertices ((C1, H1), (C2, H2), (C3, H3)). Along the ray every
+    barycentric coordinate moves linearly from its value at the sample to 1/3 at
+    the centroid, so the entry point is where the last negative coordinate
+    reaches zero. Works elementwise on floats or arrays.
+    """
+    (x1, y1), (x2, y2), (x3, y3) = V
+    area2 = x1*(y2 - y3) + x2*(y3 - y1) + x3*(y1 - y2)
+    l1 = (C*(y2 - y3) + x2*(y3 - H) + x3*(H - y2)) / area2
+    l2 = (x1*(H - y3) + C*(y3 - y1) + x3*(y1 - H)) / area2
+    l3 = 1 - l1 - l2
+    t = np.maximum.reduce([np.where(l < 0, l / (l - 1/3), 0.0) for l in (l1, l2, l3)])
+    t = np.minimum(t * (1 + _CENTROID_EXIT_MARGIN) + _CENTROID_EXIT_MARGIN, 1.0)
+    return C + t * ((x1 + x2 + x3) / 3 - C), H + t * ((y1 + y2 + y3) / 3 - H)
+
+# Structured dtypes of the per-sample compositions. Field order is part of the
+# public API (output_array, to_dict, characterize_batch follow it).
+INPUT_DTYPE = np.dtype([
+    ('C', 'f8'),
+    ('H', 'f8'),
+    ('O', 'f8'),
+    ('N', 'f8'),
+    ('ASH', 'f8'),
+    ('MOIST', 'f8')
+])
+
+OUTPUT_DTYPE = np.dtype([
+    ('CELL', 'f8'),
+    ('HCELL', 'f8'),
+    ('LIGO', 'f8'),
+    ('LIGH', 'f8'),
+    ('LIGC', 'f8'),
+    ('TANN', 'f8'),
+    ('TGL', 'f8'),
+    ('PROTC', 'f8'),
+    ('PROTH', 'f8'),
+    ('PROTO', 'f8'),
+    ('ASH', 'f8'),
+    ('MOIST', 'f8')
+])
+
+PROTEIN_SPLIT_DTYPE = np.dtype([
+    ('protc', 'f8'),
+    ('proth', 'f8'),
+    ('proto', 'f8')
+])
+
+EXTRAPOLATED_DTYPE = np.dtype([
+    ('C', 'f8'),
+    ('H', 'f8'),
+    ('O', 'f8'),
+])
+
+# Fitted splitting-parameter correlations, indexed by optimization index (see
+# set_optimization_index). Row j of each block multiplies (1, C, H) for the five
+# splitting parameters (alpha, beta, gamma, delta, epsilon).
+OPTIMIZATION_PARAMETERS = np.array([
+    # i = 0: Overall 
+    [[-0.586, 0.995, 1.015, 0.294, 0.734],
+    [2.255, -0.012, -0.045, 0.986, -0.372],
+    [0, 0.162, 0.005, 0.002, -0.021]],
+
+    # i = 1: Grass
+    [[0.626, 0.155, 6.944, -2.249, -3.501],
+    [0.877, -2.11, -13.983, 0.731, 3.038],
+    [-8.681, 29.643, 13.707, 33.856, 45.092]],
+
+    # i = 2: Wood
+    [[1.503, 2.079, 12.697, -1.75, -2.339],
+    [-0.037, -2.16, -25.284, 3.428, 1.303],
+    [-13.807, -0.207, 12.461, 13.422, 41.335]]
+])
+# Shared by every BioSUR instance by default; assign a new array to
+# optimization_parameters to use a custom correlation.
+OPTIMIZATION_PARAMETERS.flags.writeable = False
+
+# All per-sample compositions of one BioSUR instance, packed in a single record so
+# an instance costs one allocation; an array of STATE_DTYPE holds many samples.
+STATE_DTYPE = np.dtype([
+    ('input', INPUT_DTYPE),
+    ('output', OUTPUT_DTYPE),
+    ('protein', PROTEIN_SPLIT_DTYPE),
+    ('extrapolated', EXTRAPOLATED_DTYPE),
+])
+
+# Placeholder splitting parameters until the first calculation replaces them.
+_NO_SPLITTING_PARAMETERS = np.zeros((1, 5))
+_NO_SPLITTING_PARAMETERS.flags.writeable = False
+
+
+class ReferenceTriangle:
+    """The three reference mixtures of one sample, factorized once for repeated solves.
+
+    A holds the mixtures' C/H/O mass fractions column-wise (the matrix of
+    solve_linear_system); its inverse and the mixtures' molecular weights are
+    computed once, so mapping any number of (C, H, O) right-hand sides to
+    reference-mixture fractions is one small matrix product. Since the columns of
+    A sum to 1 like the right-hand sides, the mass fractions are also the
+    barycentric coordinates of (C, H) in the triangle (negative outside it).
+
+    Instances are immutable snapshots; get one with BioSUR.reference_triangle()
+    or ReferenceTriangle.for_composition().
+    """
+    __slots__ = ('splitting_parameters', 'mixtures', 'A', 'inverse', 'MW', 'vertices', '_species_moles')
+
+    def __init__(self, mixtures, splitting_parameters=None):
+        self.mixtures = tuple(ReferenceMixture().copy_from(rm) for rm in mixtures)
+        if len(self.mixtures) != 3:
+            raise ValueError("A reference triangle needs exactly three mixtures")
+        self.splitting_parameters = splitting_parameters
+        self.A = np.array([[rm.C_frac for rm in self.mixtures],
+                           [rm.H_frac for rm in self.mixtures],
+                           [rm.O_frac for rm in self.mixtures]])
+        self.inverse = np.linalg.inv(self.A)
+        self.MW = np.array([rm.MW for rm in self.mixtures])
+        self.vertices = np.array([[rm.C_frac, rm.H_frac] for rm in self.mixtures])
+        # Moles of each CHO species per mole of each mixture, (7, 3).
+        self._species_moles = np.array([[rm.composition.get(s, 0.0) for rm in self.mixtures]
+                                        for s in _CHO_SPECIES], dtype=float)
+        for array in (self.A, self.inverse, self.MW, self.vertices, self._species_moles):
+            array.flags.writeable = False
+
+    @classmethod
+    def for_composition(cls, C: float, H: float, biomass_type: 'BiomassType' = None,
+                        optimization_parameters: np.ndarray = None) -> 'ReferenceTriangle':
+        """Triangle the correlation assigns to a sample of the given (C, H)."""
+        b = BioSUR.create(C=C, H=H)
+        if biomass_type is not None:
+            b.set_biomass_type(biomass_type)
+        if optimization_parameters is not None:
+            b.optimization_parameters = optimization_parameters
+        return b.reference_triangle()
+
+    def __repr__(self) -> str:
+        corners = ", ".join(f"({c:.4f}, {h:.4f})" for c, h in self.vertices)
+        return f"ReferenceTriangle({corners})"
+
+    def mass_fractions(self, b) -> np.ndarray:
+        """Reference-mixture mass fractions x solving A x = b for (..., 3) right-hand sides (C, H, O)."""
+        return np.asarray(b, dtype=float) @ self.inverse.T
+
+    def mole_fractions(self, x) -> np.ndarray:
+        """Mass -> mole fractions of the reference mixtures, (..., 3)."""
+        moles = np.asarray(x, dtype=float) / self.MW
+        return moles / (moles[..., 0] + moles[..., 1] + moles[..., 2])[..., None]
+
+    def species_mass_fractions(self, b) -> np.ndarray:
+        """Mass fractions of the CHO species (_CHO_SPECIES order, (..., 7)) for (C, H, O) rows.
+
+        The species part of calculate_output_composition (before protein, ash and
+        moisture scaling) for every right-hand side at once.
+        """
+        moles = self.mole_fractions(self.mass_fractions(b)) @ self._species_moles.T
+        mass = moles * REFERENCE_SPECIES.MW[[REFERENCE_SPECIES.index[s] for s in _CHO_SPECIES]]
+        return mass / mass.sum(axis=-1, keepdims=True)
+
+    def barycentric(self, C, H) -> np.ndarray:
+        """Barycentric coordinates of (C, H) points, (..., 3); see BioSUR.is_outside_triangle."""
+        C = np.asarray(C, dtype=float)
+        H = np.asarray(H, dtype=float)
+        return self.mass_fractions(np.stack([C, H, 1 - C - H], axis=-1))
+
+
+# --- Reference-triangle cache -------------------------------------------------
+#
+# The splitting parameters and the three reference mixtures depend only on the
+# sample's (C, H) and on the correlation row selected by the biomass type, so
+# repeated evaluations of the same point (optimization loops, GUI redraws) can
+# reuse them. Entries are keyed by (C, H, correlation bytes) and hold everything
+# calculate_output_composition needs before the linear solve.
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+_TriangleEntry = namedtuple('_TriangleEntry', ['splitting_parameters', 'triangle'])
+
+
+class _TriangleCache:
+    """Thread-safe bounded LRU mapping of (C, H, correlation) -> _TriangleEntry."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def resize(self, maxsize: int) -> None:
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+
+_TRIANGLE_CACHE = _TriangleCache(maxsize=1024)
+
+
+def set_triangle_cache_size(maxsize: int) -> None:
+    """Bound the reference-triangle cache to maxsize entries; 0 disables it."""
+    if maxsize < 0:
+        raise ValueError("Cache size must be >= 0")
+    _TRIANGLE_CACHE.resize(maxsize)
+
+
+def triangle_cache_info() -> CacheInfo:
+    """Hit/miss counters and occupancy of the reference-triangle cache."""
+    return _TRIANGLE_CACHE.info()
+
+
+def triangle_cache_clear() -> None:
+    """Empty the reference-triangle cache and reset its counters."""
+    _TRIANGLE_CACHE.clear()
+
+
 @dataclass
 class BioSUR:
+    # The four structured compositions below default to views into one STATE_DTYPE
+    # record allocated in __post_init__ (see also from_state / allocate).
+
     # Input composition as structured array
-    input_composition: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=[
-        ('C', 'f8'),
-        ('H', 'f8'),
-        ('O', 'f8'),
-        ('N', 'f8'),
-        ('ASH', 'f8'),
-        ('MOIST', 'f8')
-    ])[0])
+    input_composition: np.ndarray = field(default=None)
 
     # Output composition as structured array
-    output_composition: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=[
-        ('CELL', 'f8'),
-        ('HCELL', 'f8'),
-        ('LIGO', 'f8'),
-        ('LIGH', 'f8'),
-        ('LIGC', 'f8'),
-        ('TANN', 'f8'),
-        ('TGL', 'f8'),
-        ('PROTC', 'f8'),
-        ('PROTH', 'f8'),
-        ('PROTO', 'f8'),
-        ('ASH', 'f8'),
-        ('MOIST', 'f8')
-    ])[0])
+    output_composition: np.ndarray = field(default=None)
 
     # Protein splitting parameter (fraction of protein assigned to each protein
     # reference species); only used when N-rich characterization is enabled.
-    protein_splitting_parameter: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=[
-        ('protc', 'f8'),
-        ('proth', 'f8'),
-        ('proto', 'f8')
-    ])[0])
+    protein_splitting_parameter: np.ndarray = field(default=None)
 
     # Splitting parameters
-    splitting_parameters: np.ndarray = field(default_factory=lambda: np.zeros((1, 5)))
-
-    # Optimization parameters
-    optimization_parameters: np.ndarray = field(default_factory=lambda: np.array([
-        # i = 0: Overall 
-        [[-0.586, 0.995, 1.015, 0.294, 0.734],
-        [2.255, -0.012, -0.045, 0.986, -0.372],
-        [0, 0.162, 0.005, 0.002, -0.021]],
-
-        # i = 1: Grass
-        [[0.626, 0.155, 6.944, -2.249, -3.501],
-        [0.877, -2.11, -13.983, 0.731, 3.038],
-        [-8.681, 29.643, 13.707, 33.856, 45.092]],
-
-        # i = 2: Wood
-        [[1.503, 2.079, 12.697, -1.75, -2.339],
-        [-0.037, -2.16, -25.284, 3.428, 1.303],
-        [-13.807, -0.207, 12.461, 13.422, 41.335]]
-    ]))
+    splitting_parameters: np.ndarray = field(default_factory=lambda: _NO_SPLITTING_PARAMETERS)
+
+    # Optimization parameters (read-only module table unless replaced)
+    optimization_parameters: np.ndarray = field(default_factory=lambda: OPTIMIZATION_PARAMETERS)
 
     use_extrapolation: bool = field(default=False)
     use_N_rich_characterization: bool = field(default=False)
@@ -131,17 +540,18 @@ class BioSUR:
     # Which extrapolation strategy to use when the sample is outside the triangle.
     extrapolation_method: ExtrapolationMethod = field(default=ExtrapolationMethod.CENTROID)
 
+    # CENTROID only: use the historical 1%-step march instead of the closed-form
+    # edge intersection (bit-compatible with tests/golden_composition.json).
+    legacy_centroid_stepping: bool = field(default=False)
+
     # Bookkeeping about the most recent calculate_output_composition() call, read
     # by the GUI to build the status message.
     extrapolation_applied: bool = field(default=False)   # did extrapolation kick in?
     extrapolation_error: float = field(default=0.0)       # C/H distortion of the used comp
     extrapolation_feasible: bool = field(default=True)    # False: SPECIES_HULL, sample beyond hull
+    flags: Flag = field(default=Flag.NONE)                # diagnostics (BioSUR.diagnostics.Flag)
 
-    extrapolated_composition: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=[
-        ('C', 'f8'),
-        ('H', 'f8'),
-        ('O', 'f8'),
-    ])[0])
+    extrapolated_composition: np.ndarray = field(default=None)
 
     optimization_index: int = field(default=0)
 
@@ -154,9 +564,47 @@ class BioSUR:
     RM2: ReferenceMixture = field(default_factory=ReferenceMixture)
     RM3: ReferenceMixture = field(default_factory=ReferenceMixture)
 
+    # ReferenceTriangle of the current reference mixtures, from the triangle cache
+    # or built on demand by reference_triangle(); None whenever the mixtures were
+    # rebuilt in place.
+    _triangle: ReferenceTriangle = field(default=None, init=False, repr=False, compare=False)
+
     def __post_init__(self):
         """Initialize default values after dataclass initialization"""
-        pass
+        if (self.input_composition is None or self.output_composition is None
+                or self.protein_splitting_parameter is None or self.extrapolated_composition is None):
+            state = np.zeros(1, dtype=STATE_DTYPE)[0]
+            if self.input_composition is None:
+                self.input_composition = state['input']
+            if self.output_composition is None:
+                self.output_composition = state['output']
+            if self.protein_splitting_parameter is None:
+                self.protein_splitting_parameter = state['protein']
+            if self.extrapolated_composition is None:
+                self.extrapolated_composition = state['extrapolated']
+
+    @classmethod
+    def from_state(cls, state: np.void) -> 'BioSUR':
+        """Create an instance whose compositions are views into a STATE_DTYPE record.
+
+        Results written by calculate_output_composition land directly in the
+        record, e.g. an element of the array returned by allocate.
+        """
+        return cls(input_composition=state['input'],
+                   output_composition=state['output'],
+                   protein_splitting_parameter=state['protein'],
+                   extrapolated_composition=state['extrapolated'])
+
+    @classmethod
+    def allocate(cls, n: int) -> tuple:
+        """Preallocate n samples: returns (states, instances).
+
+        states is an (n,) STATE_DTYPE array and instances[i] reads and writes
+        states[i], so after the calculations states['output'] holds every
+        output composition without any per-sample copies.
+        """
+        states = np.zeros(n, dtype=STATE_DTYPE)
+        return states, [cls.from_state(states[i]) for i in range(n)]
 
     def initialize(self, C: float = 0.0, H: float = 0.0, N: float = 0.0, ASH: float = 0.0, MOIST: float = 0.0):
         """Initialize the composition values"""
@@ -206,6 +654,51 @@ class BioSUR:
             MOIST=values[5]
         )
 
+    @classmethod
+    def characterize_batch(cls, C, H, N=0.0, ASH=0.0, MOIST=0.0,
+                           biomass_type: BiomassType = BiomassType.OTHERS, **options):
+        """Characterize arrays of samples in one vectorized pass.
+
+        Equivalent to running create -> set_biomass_type -> the enable_* setters
+        -> calculate_output_composition for every row, without building any
+        BioSUR instances. See BioSUR.batch.characterize_batch for the options and
+        return values.
+        """
+        from BioSUR.batch import characterize_batch
+        return characterize_batch(C, H, N, ASH, MOIST, biomass_type, **options)
+
+    @classmethod
+    def locate_in_triangles(cls, C, H, vertices=None, biomass_type: BiomassType = BiomassType.OTHERS):
+        """Array version of is_outside_triangle: (outside mask, barycentric coordinates).
+
+        See BioSUR.batch.locate_in_triangles for testing against the samples' own
+        reference triangles, explicit triangles, or several biomass types at once.
+        """
+        from BioSUR.batch import locate_in_triangles
+        return locate_in_triangles(C, H, vertices, biomass_type)
+
+    @classmethod
+    def propagate_uncertainty(cls, mean, cov, n_samples: int = 100_000, seed=None, **options):
+        """Monte-Carlo distribution of output_composition for uncertain inputs.
+
+        mean / cov describe (C, H, N, ASH, MOIST); see
+        BioSUR.uncertainty.propagate_uncertainty for the options and the returned
+        UncertaintyResult (means, standard deviations, percentiles, covariance).
+        """
+        from BioSUR.uncertainty import propagate_uncertainty
+        return propagate_uncertainty(mean, cov, n_samples, seed, **options)
+
+    @classmethod
+    def fit_composition(cls, target, biomass_type: BiomassType = BiomassType.OTHERS, **options):
+        """Inverse characterization: the inputs that best reproduce target output compositions.
+
+        target holds one or many output compositions (12 fields each); see
+        BioSUR.inverse.fit_composition for the options and the returned
+        InverseResult (fitted C, H, N, ASH, MOIST and convergence statistics).
+        """
+        from BioSUR.inverse import fit_composition
+        return fit_composition(target, biomass_type, **options)
+
     def to_dict(self) -> dict:
         """Convert all compositions to a dictionary"""
         return {
@@ -236,7 +729,7 @@ class BioSUR:
     
     def calculate_ratio_ref_species(self) -> 'BioSUR':
         """Calculate ratio of reference species"""
-        ratios = np.zeros(7)
+        self._triangle = None
 
         #splitting_paramteress = [alpha, beta, gamma, delta, epsilon]
         alpha = self.splitting_parameters[0]
@@ -266,17 +759,53 @@ class BioSUR:
         })
         return self
     
+    def reference_triangle(self) -> ReferenceTriangle:
+        """ReferenceTriangle of the current reference mixtures (loaded if not yet computed)."""
+        if self._triangle is None:
+            if self.RM1.C_frac <= 0 or self.RM2.C_frac <= 0 or self.RM3.C_frac <= 0:
+                self.load_reference_triangle()
+            if self._triangle is None:
+                self._triangle = ReferenceTriangle((self.RM1, self.RM2, self.RM3), self.splitting_parameters)
+        return self._triangle
+
+    def load_reference_triangle(self) -> 'BioSUR':
+        """Splitting parameters and reference mixtures for the current (C, H).
+
+        Same result as calculate_splitting_parameters followed by
+        calculate_ratio_ref_species, served from the reference-triangle cache
+        when this (C, H, correlation) was seen before.
+        """
+        if _TRIANGLE_CACHE.maxsize == 0:
+            self.calculate_splitting_parameters()
+            self.calculate_ratio_ref_species()
+            return self
+
+        key = (float(self.input_composition["C"]), float(self.input_composition["H"]),
+               self.optimization_parameters[self.optimization_index].tobytes())
+        entry = _TRIANGLE_CACHE.get(key)
+        if entry is None:
+            self.calculate_splitting_parameters()
+            self.calculate_ratio_ref_species()
+            splitting_parameters = self.splitting_parameters.copy()
+            splitting_parameters.flags.writeable = False
+            triangle = ReferenceTriangle((self.RM1, self.RM2, self.RM3), splitting_parameters)
+            _TRIANGLE_CACHE.put(key, _TriangleEntry(splitting_parameters, triangle))
+            self._triangle = triangle
+            return self
+
+        self.splitting_parameters = entry.splitting_parameters
+        for rm, cached in zip((self.RM1, self.RM2, self.RM3), entry.triangle.mixtures):
+            rm.copy_from(cached)
+        self._triangle = entry.triangle
+        return self
+
     def solve_linear_system(self) -> 'BioSUR':
         """Solve the linear system of equations"""
         # [ω_C^RM1    ω_C^RM2    ω_C^RM3  ] [x_1] = [ω_C^solid]
         # [ω_H^RM1    ω_H^RM2    ω_H^RM3  ] [x_2] = [ω_H^solid]
         # [ω_O^RM1    ω_O^RM2    ω_O^RM3  ] [x_3] = [ω_O^solid]
 
-        A = np.array([
-            [self.RM1.C_frac, self.RM2.C_frac, self.RM3.C_frac],
-            [self.RM1.H_frac, self.RM2.H_frac, self.RM3.H_frac],
-            [self.RM1.O_frac, self.RM2.O_frac, self.RM3.O_frac]
-        ])
+        triangle = self.reference_triangle()
 
         b = np.array([
             self.input_composition['C'],
@@ -292,7 +821,7 @@ class BioSUR:
                 self.extrapolated_composition['O']
             ])
     
-        x = np.linalg.solve(A, b)
+        x = triangle.mass_fractions(b)
 
         if not math.isclose(np.sum(x), 1):
             raise ValueError("Solution of the linear sistem failed: sum of fractions is not 1")
@@ -301,21 +830,19 @@ class BioSUR:
         #   warnings.warn("Solution of the linear system failed: the biomass sample falls outside the triangle defined by the reference mixtures")
         
         # Convert to mole fractions
-        self.RM1.fraction = x[0] / self.RM1.MW / (x[0]/self.RM1.MW + x[1]/self.RM2.MW + x[2]/self.RM3.MW)
-        self.RM2.fraction = x[1] / self.RM2.MW / (x[0]/self.RM1.MW + x[1]/self.RM2.MW + x[2]/self.RM3.MW)
-        self.RM3.fraction = x[2] / self.RM3.MW / (x[0]/self.RM1.MW + x[1]/self.RM2.MW + x[2]/self.RM3.MW) 
+        self.RM1.fraction, self.RM2.fraction, self.RM3.fraction = triangle.mole_fractions(x).tolist()
         
         return self
 
-    def calculate_output_composition(self) -> 'BioSUR':
-        """Calculate output composition"""
+    def _handle_nitrogen(self) -> tuple:
+        """Nitrogen handling: split off a protein fraction (N-rich case) or drop N
+        by renormalizing C/H/O. Both paths make C+H+O sum to 1 as required by the
+        linear solve. With N == 0 nothing is changed, so the CHO-only behavior is
+        unchanged. Returns (protein fraction, diagnostic flags).
+        """
         ref_species = REFERENCE_SPECIES
-
-        # Nitrogen handling: split off a protein fraction (N-rich case) or drop N
-        # by renormalizing C/H/O. Both paths make C+H+O sum to 1 as required by the
-        # linear solve. With N == 0 this block is skipped entirely, so the CHO-only
-        # behavior is unchanged.
         prot_fraction = 0.0
+        flags = Flag.NONE
         if self.input_composition['N'] > 0:
             if self.use_N_rich_characterization:
                 prot_fraction = self.calculate_protein_fraction()
@@ -339,26 +866,30 @@ class BioSUR:
                     )
                 self.input_composition['O'] = 1 - self.input_composition['C'] - self.input_composition['H']
             else:
-                if self.input_composition['N'] > 0.05:
-                    print("WARNING: The input composition contains a high nitrogen content. "
-                          "Consider enabling N-rich characterization for better results.")
+                if self.input_composition['N'] > HIGH_NITROGEN_THRESHOLD:
+                    flags |= Flag.HIGH_NITROGEN
                 # Ignore N: renormalize C/H over the non-N fraction, O by difference.
                 total_without_N = (self.input_composition['C'] + self.input_composition['H']
                                    + self.input_composition['O'])
                 self.input_composition['C'] /= total_without_N
                 self.input_composition['H'] /= total_without_N
                 self.input_composition['O'] = 1 - self.input_composition['C'] - self.input_composition['H']
+        return prot_fraction, flags
+
+    def calculate_output_composition(self) -> 'BioSUR':
+        """Calculate output composition"""
+        prot_fraction, flags = self._handle_nitrogen()
 
-        self.calculate_splitting_parameters()
-        self.calculate_ratio_ref_species()
+        self.load_reference_triangle()
 
         # Reset extrapolation bookkeeping for this call (read by the GUI status bar).
         self.extrapolation_applied = False
         self.extrapolation_error = 0.0
         self.extrapolation_feasible = True
 
-        outside = self.use_extrapolation and self.is_outside_triangle(
-            self.input_composition["C"], self.input_composition["H"])
+        if self.is_outside_triangle(self.input_composition["C"], self.input_composition["H"]):
+            flags |= Flag.OUTSIDE_TRIANGLE
+        outside = self.use_extrapolation and bool(flags & Flag.OUTSIDE_TRIANGLE)
 
         if outside and self.extrapolation_method == ExtrapolationMethod.SPECIES_HULL:
             # Keep the sample fixed and reparametrize onto the reference-species hull;
@@ -367,7 +898,34 @@ class BioSUR:
             self.extrapolation_applied = True
         else:
             self.solve_linear_system()
+            out_comp = None
 
+            if outside:
+                # CENTROID / NEAREST_POINT moved the sample; record the C/H distortion.
+                self.extrapolation_applied = True
+                self.extrapolation_error = float(np.hypot(
+                    self.input_composition["C"] - self.extrapolated_composition["C"],
+                    self.input_composition["H"] - self.extrapolated_composition["H"]))
+
+        self._assemble_output(out_comp, prot_fraction)
+
+        if self.extrapolation_applied:
+            flags |= Flag.EXTRAPOLATED
+        if not self.extrapolation_feasible:
+            flags |= Flag.EXTRAPOLATION_INFEASIBLE
+        self.flags = flags
+        report_sample(flags)
+
+        return self
+
+    def _assemble_output(self, out_comp, prot_fraction: float) -> None:
+        """Write output_composition from the CHO species mass fractions.
+
+        out_comp is None on the reference-mixture path, where the species mass
+        fractions are first built from the RM mole fractions.
+        """
+        ref_species = REFERENCE_SPECIES
+        if out_comp is None:
             out_comp = {"CELL": 0, "HCELL": 0, "LIGO": 0, "LIGH": 0, "LIGC": 0, "TANN": 0, "TGL": 0}
             for species in out_comp.keys():
                 if species in self.RM1.composition:
@@ -381,13 +939,6 @@ class BioSUR:
 
             out_comp = {key: value * ref_species[key]['MW'] / avg_MW for key, value in out_comp.items()}
 
-            if outside:
-                # CENTROID / NEAREST_POINT moved the sample; record the C/H distortion.
-                self.extrapolation_applied = True
-                self.extrapolation_error = float(np.hypot(
-                    self.input_composition["C"] - self.extrapolated_composition["C"],
-                    self.input_composition["H"] - self.extrapolated_composition["H"]))
-
         # Scale the CHO species down to make room for the protein fraction, then add
         # the protein pseudo-species (already mass fractions of the whole DAF sample).
         out_comp = {key: value * (1 - prot_fraction) for key, value in out_comp.items()}
@@ -403,8 +954,6 @@ class BioSUR:
                 self.output_composition[key] = self.input_composition[key]
             else:
                 self.output_composition[key] = out_comp[key] * solid_fraction
-
-        return self
     
     def enable_extrapolation(self, on:bool) -> 'BioSUR':
         """Enable or disable the extrapolation of the composition"""
@@ -416,6 +965,16 @@ class BioSUR:
         self.extrapolation_method = method
         return self
 
+    def enable_legacy_centroid_stepping(self, on: bool) -> 'BioSUR':
+        """Use the historical 1%-step march for CENTROID extrapolation.
+
+        The march stops at the first step inside the triangle, so it overshoots
+        the edge by up to 1% of the sample-centroid distance; the default closed
+        form lands on the edge itself.
+        """
+        self.legacy_centroid_stepping = on
+        return self
+
     def enable_N_rich_characterization(self, on: bool) -> 'BioSUR':
         """Enable or disable the N-rich (protein) characterization.
 
@@ -453,6 +1012,11 @@ class BioSUR:
         return self.input_composition['N'] / prot_mix_N if prot_mix_N > 0 else 0.0
 
 
+    def _reset_extrapolated_composition(self) -> None:
+        """Start the extrapolated composition from the (unmoved) input C/H/O."""
+        for element in ('C', 'H', 'O'):
+            self.extrapolated_composition[element] = self.input_composition[element]
+
     def extrapolate_composition(self) -> np.ndarray:
         """Move an out-of-triangle sample onto the triangle, per the selected method.
 
@@ -465,11 +1029,18 @@ class BioSUR:
         return self._extrapolate_centroid()
 
     def _extrapolate_centroid(self) -> 'BioSUR':
-        """March the sample toward the triangle centroid until it lands inside."""
-        #check if the input composition in outside the triangle defined by the reference mixtures
-        print("WARNING: The input composition is outside the triangle defined by the reference mixtures. Extrapolating the composition...")
-
-        self.extrapolated_composition = self.input_composition.copy()
+        """Move the sample toward the triangle centroid until it lands inside."""
+        self._reset_extrapolated_composition()
+
+        if not self.legacy_centroid_stepping:
+            C, H = _centroid_ray_exit(
+                float(self.input_composition["C"]), float(self.input_composition["H"]),
+                ((self.RM1.C_frac, self.RM1.H_frac), (self.RM2.C_frac, self.RM2.H_frac),
+                 (self.RM3.C_frac, self.RM3.H_frac)))
+            self.extrapolated_composition["C"] = C
+            self.extrapolated_composition["H"] = H
+            self.extrapolated_composition["O"] = 1 - C - H
+            return self
 
         # Calculate the bariocenter of the triangle defined by the reference mixtures
         bariocenter = np.array([np.sum([self.RM1.C_frac, self.RM2.C_frac, self.RM3.C_frac])/3,
@@ -494,7 +1065,7 @@ class BioSUR:
         it changes the measured (C, H) the least. Closed-form (clamped projection
         onto each of the three edges, nearest wins).
         """
-        self.extrapolated_composition = self.input_composition.copy()
+        self._reset_extrapolated_composition()
 
         P = np.array([self.input_composition["C"], self.input_composition["H"]])
         V = [np.array([self.RM1.C_frac, self.RM1.H_frac]),
@@ -529,43 +1100,25 @@ class BioSUR:
         a regularized NNLS. Sets extrapolation feasibility/error bookkeeping and
         returns the species mass fractions.
         """
-        ref_species = REFERENCE_SPECIES
-        C = float(self.input_composition["C"])
-        H = float(self.input_composition["H"])
-
-        c_row = np.array([ref_species[s]['C_frac'] for s in _CHO_SPECIES], dtype=float)
-        h_row = np.array([ref_species[s]['H_frac'] for s in _CHO_SPECIES], dtype=float)
-        ones = np.ones(len(_CHO_SPECIES))
-
-        # Large weight pins the three equality constraints; a small ridge on the
-        # identity block breaks ties toward the minimum-norm (most balanced) fit.
-        big = 1e3
-        reg = 1e-3
-        A = np.vstack([big * c_row, big * h_row, big * ones, reg * np.eye(len(_CHO_SPECIES))])
-        b = np.concatenate([[big * C, big * H, big * 1.0], np.zeros(len(_CHO_SPECIES))])
-
-        w = _nnls(A, b)
-        total = w.sum()
-        if total > 0:
-            w = w / total  # enforce exact sum-to-1
-
-        # Residual of the reproduced (C, H): ~0 inside the hull, > tol outside it.
-        residual = abs(float(w @ c_row) - C) + abs(float(w @ h_row) - H)
+        w, residual = _species_hull_weights(float(self.input_composition["C"]),
+                                            float(self.input_composition["H"]))
         self.extrapolation_feasible = residual < 1e-4
         self.extrapolation_error = residual
 
         # Method 3 does not move the sample.
-        self.extrapolated_composition = self.input_composition.copy()
+        self._reset_extrapolated_composition()
 
         return {s: float(w[i]) for i, s in enumerate(_CHO_SPECIES)}
 
     def is_outside_triangle(self, C, H) -> bool:
-        """Check if a point is inside the triangle defined by the reference mixtures"""
+        """Check if a point is inside the triangle defined by the reference mixtures
+
+        For arrays of points see BioSUR.locate_in_triangles.
+        """
 
         #if the reference mixtures are not defined, calculate them
         if self.RM1.C_frac <= 0 or self.RM2.C_frac <= 0 or self.RM3.C_frac <= 0:
-            self.calculate_splitting_parameters()
-            self.calculate_ratio_ref_species()
+            self.load_reference_triangle()
 
         # Create point and vertices arrays (V1, V2, V3 are the RM triangle corners)
         P = [C, H]
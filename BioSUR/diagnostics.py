@@ -0,0 +1,209 @@
+"""Structured diagnostics of the characterization.
+
+Every characterized sample carries a Flag bit set (BioSUR.flags, the 'flags'
+column of characterize_batch(full_output=True)). Noteworthy conditions are also
+reported through the standard channels, without printing:
+
+- HIGH_NITROGEN and EXTRAPOLATION_INFEASIBLE raise warnings (subclasses of
+  BioSURWarning), which callers can filter or turn into errors;
+- EXTRAPOLATED and INVALID are logged at INFO on the 'BioSUR' logger.
+
+Reports are aggregated per call (a batch emits one message per condition with
+its count) and rate limited per condition: at most RATE_LIMIT messages per
+RATE_INTERVAL seconds, the rest being counted and mentioned in the next message.
+Inside `with collect() as d:` nothing is emitted per call; the counts are
+accumulated in `d` and logged once when the block exits.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+import warnings
+from collections import Counter
+from contextlib import contextmanager
+from enum import IntFlag
+
+import numpy as np
+
+logger = logging.getLogger('BioSUR')
+
+# N mass fraction above which characterizing without N-rich mode is flagged.
+HIGH_NITROGEN_THRESHOLD = 0.05
+
+RATE_LIMIT = 5
+RATE_INTERVAL = 60.0
+
+
+class Flag(IntFlag):
+    """Per-sample diagnostic bits."""
+    NONE = 0
+    OUTSIDE_TRIANGLE = 1            # (C, H) outside the reference-mixture triangle
+    EXTRAPOLATED = 2                # extrapolation was applied
+    EXTRAPOLATION_INFEASIBLE = 4    # SPECIES_HULL: sample beyond the species hull
+    HIGH_NITROGEN = 8               # N > HIGH_NITROGEN_THRESHOLD without N-rich mode
+    INVALID = 16                    # not characterized (batch errors='nan')
+
+
+class BioSURWarning(UserWarning):
+    """Base class of the warnings issued by BioSUR."""
+
+
+class HighNitrogenWarning(BioSURWarning):
+    """Nitrogen-rich sample characterized with nitrogen ignored."""
+
+
+class ExtrapolationWarning(BioSURWarning):
+    """Extrapolation could not represent the sample exactly."""
+
+
+# How each reportable flag is emitted: (message for n samples, warning category or None to log).
+_CHANNELS = {
+    Flag.HIGH_NITROGEN: (
+        "{n} sample(s) with high nitrogen content (N > {threshold:.0%}) characterized with "
+        "nitrogen ignored; consider enabling N-rich characterization",
+        HighNitrogenWarning),
+    Flag.EXTRAPOLATION_INFEASIBLE: (
+        "{n} sample(s) outside the reference-species hull; species-hull extrapolation is "
+        "approximate (see extrapolation_error)",
+        ExtrapolationWarning),
+    Flag.EXTRAPOLATED: (
+        "{n} sample(s) outside the reference-mixture triangle were extrapolated", None),
+    Flag.INVALID: (
+        "{n} sample(s) could not be characterized", None),
+}
+
+
+class Diagnostics:
+    """Counts of flagged samples, by flag."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def add(self, counts: dict, samples: int) -> None:
+        with self._lock:
+            self.counts.update({flag: n for flag, n in counts.items() if n})
+            self.samples += samples
+
+    def summary(self) -> dict:
+        """{flag name: number of samples}, for the flags that occurred."""
+        return {flag.name: n for flag, n in sorted(self.counts.items())}
+
+    def __repr__(self) -> str:
+        return f"Diagnostics(samples={self.samples}, {self.summary()})"
+
+
+class _RateLimiter:
+    """At most `limit` emissions per `interval` seconds per key; counts the rest."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows = {}       # key -> [window start, emitted, suppressed]
+
+    def allow(self, key) -> tuple:
+        """(emit?, number of suppressed reports to mention)."""
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= RATE_INTERVAL:
+                suppressed = window[2] if window is not None else 0
+                self._windows[key] = [now, 1, 0]
+                return True, suppressed
+            if window[1] < RATE_LIMIT:
+                window[1] += 1
+                suppressed, window[2] = window[2], 0
+                return True, suppressed
+            window[2] += 1
+            return False, 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._windows.clear()
+
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+_LIMITER = _RateLimiter()
+_STATE = threading.local()
+
+
+def reset_rate_limits() -> None:
+    """Forget previously emitted reports (mainly for tests)."""
+    _LIMITER.reset()
+
+
+def _caller_stacklevel() -> int:
+    """stacklevel pointing warnings at the first frame outside the BioSUR package."""
+    frame, level = sys._getframe(1), 1
+    while frame is not None and frame.f_code.co_filename.startswith(_PACKAGE_DIR):
+        frame, level = frame.f_back, level + 1
+    return level
+
+
+def _emit(flag: Flag, n: int) -> None:
+    allowed, suppressed = _LIMITER.allow(flag)
+    if not allowed:
+        return
+    template, category = _CHANNELS[flag]
+    message = template.format(n=n, threshold=HIGH_NITROGEN_THRESHOLD)
+    if suppressed:
+        message += f" ({suppressed} similar report(s) suppressed)"
+    if category is not None:
+        warnings.warn(message, category, stacklevel=_caller_stacklevel())
+    else:
+        logger.info(message)
+
+
+def report(counts: dict, samples: int) -> None:
+    """Report per-flag sample counts of one characterization call.
+
+    counts maps Flag -> number of samples carrying it. Goes to the active
+    collect() block if any, otherwise to the rate-limited warnings/logging.
+    """
+    collector = getattr(_STATE, 'collector', None)
+    if collector is not None:
+        collector.add(counts, samples)
+        return
+    for flag in _CHANNELS:
+        n = counts.get(flag, 0)
+        if n:
+            _emit(flag, n)
+
+
+def report_sample(flags: Flag) -> None:
+    """report() for a single sample's flag bits (scalar path, no array work)."""
+    collector = getattr(_STATE, 'collector', None)
+    if collector is not None:
+        collector.add({flag: 1 for flag in Flag if flag & flags}, 1)
+        return
+    for flag in _CHANNELS:
+        if flags & flag:
+            _emit(flag, 1)
+
+
+def count_flags(flags) -> dict:
+    """{Flag: number of samples} for an array (or a single value) of flag bits."""
+    flags = np.asarray(flags, dtype=np.int64)
+    return {flag: int(np.count_nonzero(flags & flag)) for flag in Flag if flag}
+
+
+@contextmanager
+def collect(log_level: int = logging.WARNING):
+    """Aggregate the diagnostics of every call in the block (current thread).
+
+    Yields a Diagnostics whose counts are logged once, at log_level, on exit.
+    """
+    previous = getattr(_STATE, 'collector', None)
+    collector = Diagnostics()
+    _STATE.collector = collector
+    try:
+        yield collector
+    finally:
+        _STATE.collector = previous
+        if collector.counts:
+            logger.log(log_level, "Diagnostics for %d sample(s): %s",
+                       collector.samples, ", ".join(f"{k}={v}" for k, v in collector.summary().items()))
+        if previous is not None:
+            previous.add(collector.counts, collector.samples)
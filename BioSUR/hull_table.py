@@ -0,0 +1,199 @@
+"""Precomputed species-hull decomposition on a (C, H) grid.
+
+The SPECIES_HULL decomposition depends on (C, H) only. Within the region where
+one passive set of the NNLS is optimal, the unnormalized NNLS solution is an
+affine function of (C, H); the table stores it at the grid nodes, and a grid
+cell whose four corners share a passive set (the region is convex, so the whole
+cell lies in it) is reproduced by bilinear interpolation of that solution,
+normalized to sum 1 afterwards, to rounding error. Cells whose corners disagree
+(the cell straddles a region boundary, e.g. near the hull edge) and points off
+the grid fall back to the exact solve.
+
+The measured bound is stored with the table (SpeciesHullTable.max_error: the
+largest weight difference versus the exact solve over all interpolated cell
+centres and edge midpoints at build time, and at least ROUNDING_ERROR). Like the
+warm-started solver, the table may settle on the other side of a near-tie
+between two passive sets that both fit within the solver tolerance.
+
+Typical use::
+
+    from BioSUR.core import set_species_hull_table
+    set_species_hull_table("species_hull_table.npz")   # load, or build and save
+"""
+import hashlib
+import os
+
+import numpy as np
+
+from BioSUR.core import _CHO_SPECIES, _SPECIES_HULL, HullSolution
+
+# Bumped whenever the file layout or the decomposition changes meaning.
+TABLE_VERSION = 2
+
+# Floor of max_error: interpolated weights differ from the exact solve by rounding
+# only, which the probes sample but do not bound everywhere.
+ROUNDING_ERROR = 1e-12
+
+
+def _solver_fingerprint() -> str:
+    """Hash of everything the decomposition depends on (species data and weights)."""
+    h = hashlib.sha256()
+    h.update(repr(_CHO_SPECIES).encode())
+    for array in (_SPECIES_HULL.A, np.array([_SPECIES_HULL.tol])):
+        h.update(np.ascontiguousarray(array, dtype=float).tobytes())
+    return h.hexdigest()
+
+
+def _default_bounds() -> tuple:
+    """Bounding box of the reference-species hull with a small margin."""
+    c, h = _SPECIES_HULL.c_row, _SPECIES_HULL.h_row
+    return (float(c.min()) - 0.01, float(c.max()) + 0.01,
+            float(h.min()) - 0.005, float(h.max()) + 0.005)
+
+
+class SpeciesHullTable:
+    """Species-hull weights on a regular (C, H) grid with exact fallback.
+
+    solution holds the unnormalized NNLS solution of every node, shape
+    (len(C_axis), len(H_axis), 7) in _CHO_SPECIES order, and passive its
+    optimal passive set as a bitmask.
+    """
+
+    def __init__(self, C_axis, H_axis, solution, passive, max_error: float, fingerprint: str):
+        self.C_axis = np.asarray(C_axis, dtype=float)
+        self.H_axis = np.asarray(H_axis, dtype=float)
+        self.solution = np.asarray(solution, dtype=float)
+        self.passive = np.asarray(passive, dtype=np.int64)
+        self.max_error = float(max_error)
+        self.fingerprint = fingerprint
+        self._bits = 1 << np.arange(len(_CHO_SPECIES))
+
+    def __repr__(self) -> str:
+        return (f"SpeciesHullTable({len(self.C_axis)}x{len(self.H_axis)} nodes, "
+                f"C {self.C_axis[0]:.3f}-{self.C_axis[-1]:.3f}, "
+                f"H {self.H_axis[0]:.3f}-{self.H_axis[-1]:.3f}, max_error={self.max_error:.1e})")
+
+    @classmethod
+    def build(cls, resolution: float = 1e-3, bounds: tuple = None) -> 'SpeciesHullTable':
+        """Solve the decomposition on a grid with the given (C, H) spacing.
+
+        bounds is (C_min, C_max, H_min, H_max); defaults to the bounding box of
+        the reference species. The default grid (~40k nodes) builds in under a
+        second.
+        """
+        c_min, c_max, h_min, h_max = bounds if bounds is not None else _default_bounds()
+        C_axis = np.linspace(c_min, c_max, int(round((c_max - c_min) / resolution)) + 1)
+        H_axis = np.linspace(h_min, h_max, int(round((h_max - h_min) / resolution)) + 1)
+        CC, HH = np.meshgrid(C_axis, H_axis, indexing='ij')
+        C, H = CC.ravel(), HH.ravel()
+        passive = _SPECIES_HULL.solve(C, H).passive
+        # The least-squares solution on the optimal passive set, before normalization.
+        x = _SPECIES_HULL._least_squares(passive, _SPECIES_HULL._rhs(C, H))
+        shape = CC.shape
+        bits = 1 << np.arange(len(_CHO_SPECIES))
+        table = cls(C_axis, H_axis, x.reshape(shape + (-1,)),
+                    (passive @ bits).reshape(shape), np.inf, _solver_fingerprint())
+        table.max_error = table._measure_error()
+        return table
+
+    def _measure_error(self) -> float:
+        """Largest weight error of the interpolation at cell centres and edge midpoints,
+        at least ROUNDING_ERROR."""
+        dc = np.diff(self.C_axis)
+        dh = np.diff(self.H_axis)
+        probes = []
+        for fc, fh in ((0.5, 0.5), (0.5, 0.0), (0.0, 0.5)):
+            C = self.C_axis[:-1] + fc * dc
+            H = self.H_axis[:-1] + fh * dh
+            CC, HH = np.meshgrid(C, H, indexing='ij')
+            probes.append((CC.ravel(), HH.ravel()))
+        C = np.concatenate([c for c, _ in probes])
+        H = np.concatenate([h for _, h in probes])
+        weights, interpolated = self._interpolate(C, H)
+        if not interpolated.any():
+            return ROUNDING_ERROR
+        exact = _SPECIES_HULL.solve(C[interpolated], H[interpolated]).weights
+        return max(float(np.abs(weights[interpolated] - exact).max()), ROUNDING_ERROR)
+
+    def _interpolate(self, C, H) -> tuple:
+        """Weights where the enclosing cell has a single passive set.
+
+        The unnormalized solution is affine over such a cell, so its bilinear
+        interpolation is exact; only the interpolated solution is normalized.
+        """
+        n = C.size
+        i = np.searchsorted(self.C_axis, C, side='right') - 1
+        j = np.searchsorted(self.H_axis, H, side='right') - 1
+        on_grid = (i >= 0) & (i < len(self.C_axis) - 1) & (j >= 0) & (j < len(self.H_axis) - 1)
+        i = np.where(on_grid, i, 0)
+        j = np.where(on_grid, j, 0)
+        corners = self.passive[i, j]
+        same = (on_grid & (self.passive[i + 1, j] == corners) & (self.passive[i, j + 1] == corners)
+                & (self.passive[i + 1, j + 1] == corners))
+        weights = np.zeros((n, len(_CHO_SPECIES)))
+        if same.any():
+            i, j = i[same], j[same]
+            tx = ((C[same] - self.C_axis[i]) / (self.C_axis[i + 1] - self.C_axis[i]))[:, None]
+            ty = ((H[same] - self.H_axis[j]) / (self.H_axis[j + 1] - self.H_axis[j]))[:, None]
+            x = self.solution
+            w = ((1 - tx) * (1 - ty) * x[i, j] + tx * (1 - ty) * x[i + 1, j]
+                 + (1 - tx) * ty * x[i, j + 1] + tx * ty * x[i + 1, j + 1])
+            weights[same] = w / w.sum(axis=1, keepdims=True)
+        return weights, same
+
+    def decompose(self, C, H) -> HullSolution:
+        """Species-hull decomposition from the table (exact solve where needed).
+
+        Returns a HullSolution like the exact solver; interpolated samples report
+        0 iterations and the passive set of their cell.
+        """
+        C, H = np.broadcast_arrays(np.atleast_1d(np.asarray(C, dtype=float)).ravel(),
+                                   np.atleast_1d(np.asarray(H, dtype=float)).ravel())
+        weights, interpolated = self._interpolate(C, H)
+        passive = np.zeros(weights.shape, dtype=bool)
+        iterations = np.zeros(C.size, dtype=int)
+        if interpolated.any():
+            i = np.searchsorted(self.C_axis, C[interpolated], side='right') - 1
+            j = np.searchsorted(self.H_axis, H[interpolated], side='right') - 1
+            passive[interpolated] = (self.passive[i, j][:, None] & self._bits) != 0
+        exact = ~interpolated
+        if exact.any():
+            solution = _SPECIES_HULL.solve(C[exact], H[exact])
+            weights[exact] = solution.weights
+            passive[exact] = solution.passive
+            iterations[exact] = solution.iterations
+        residual = np.abs(weights @ _SPECIES_HULL.c_row - C) + np.abs(weights @ _SPECIES_HULL.h_row - H)
+        return HullSolution(weights, residual, passive, iterations)
+
+    def save(self, path) -> None:
+        """Write the table to an .npz file."""
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, version=TABLE_VERSION, C_axis=self.C_axis, H_axis=self.H_axis,
+                                solution=self.solution, passive=self.passive,
+                                max_error=self.max_error, fingerprint=self.fingerprint)
+
+    @classmethod
+    def load(cls, path) -> 'SpeciesHullTable':
+        """Read a table written by save; ValueError if it is stale or incompatible."""
+        with np.load(path) as data:
+            if int(data['version']) != TABLE_VERSION:
+                raise ValueError(f"{path}: species-hull table version {int(data['version'])}, "
+                                 f"expected {TABLE_VERSION}")
+            fingerprint = str(data['fingerprint'])
+            if fingerprint != _solver_fingerprint():
+                raise ValueError(f"{path}: species-hull table was built for different reference "
+                                 f"species or solver settings; rebuild it")
+            return cls(data['C_axis'], data['H_axis'], data['solution'], data['passive'],
+                       float(data['max_error']), fingerprint)
+
+    @classmethod
+    def load_or_build(cls, path, resolution: float = 1e-3) -> 'SpeciesHullTable':
+        """Load the table at path, or build it and save it there if missing or stale."""
+        if os.path.exists(path):
+            try:
+                return cls.load(path)
+            except (ValueError, KeyError, OSError):
+                pass
+        table = cls.build(resolution)
+        table.save(path)
+        return table
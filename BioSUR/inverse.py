@@ -0,0 +1,180 @@
+"""Inverse characterization: elemental composition from a target surrogate.
+
+Given desired output compositions (the 12 output_composition fields), finds the
+(C, H, N, ASH, MOIST) that calculate_output_composition maps closest to each
+target. ASH and MOIST pass straight through the characterization, and with
+N-rich characterization N follows in closed form from the protein
+pseudo-species, so only (C, H) is fitted: a Levenberg-Marquardt least-squares
+fit of the normalized CHO species fractions, vectorized over the targets, with
+the exact Jacobian of the map (batch._cho_fractions_jacobian) in place of
+finite differences.
+
+The starting point is the (C, H) mass balance of the target species; for
+targets BioSUR can produce exactly, that is already the answer up to rounding
+and the fit stops within one or two steps. Other targets converge to the
+least-squares compromise, slowly (tens of steps) when it lies on a kink of the
+map where a splitting parameter reaches its clip at 0 or 1. The fit uses the
+inside-triangle map without extrapolation.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from BioSUR.batch import (_ATOMIC_MASS, _FRAC, _SPECIES_ATOMS, _SPECIES_MW, _cho_fractions_jacobian,
+                          _protein_mix_nitrogen, characterize_batch)
+from BioSUR.core import BiomassType, OUTPUT_DTYPE, _CHO_SPECIES
+
+_N_CHO = len(_CHO_SPECIES)
+
+
+@dataclass
+class InverseResult:
+    """Best-fit inputs for every target, with per-target convergence data.
+
+    residual is the Euclidean norm of (fitted - target) over the 12 output
+    fields; iterations counts Jacobian evaluations. Targets that cannot be
+    fitted (no CHO species, ASH + MOIST >= 1) have NaN inputs and are not
+    converged.
+    """
+    C: np.ndarray
+    H: np.ndarray
+    N: np.ndarray
+    ASH: np.ndarray
+    MOIST: np.ndarray
+    residual: np.ndarray
+    iterations: np.ndarray
+    converged: np.ndarray
+    fitted: np.ndarray = field(default=None, repr=False)   # (n, 12) output of the fitted inputs
+
+    def inputs(self) -> np.ndarray:
+        """(n, 5) array of (C, H, N, ASH, MOIST)."""
+        return np.column_stack([self.C, self.H, self.N, self.ASH, self.MOIST])
+
+    def summary(self) -> dict:
+        """Convergence statistics over all targets."""
+        ok = np.isfinite(self.residual)
+        return {
+            'targets': int(self.converged.size),
+            'converged': int(np.count_nonzero(self.converged)),
+            'mean_iterations': float(self.iterations.mean()) if self.iterations.size else 0.0,
+            'max_iterations': int(self.iterations.max()) if self.iterations.size else 0,
+            'max_residual': float(self.residual[ok].max()) if ok.any() else float('nan'),
+        }
+
+
+def _as_targets(target) -> np.ndarray:
+    """(n, 12) float array from an (n, 12)/(12,) array or an OUTPUT_DTYPE array."""
+    target = np.asarray(target)
+    if target.dtype.names is not None:
+        target = np.column_stack([np.asarray(target[name], dtype=float).ravel()
+                                  for name in OUTPUT_DTYPE.names])
+    target = np.atleast_2d(np.asarray(target, dtype=float))
+    if target.ndim != 2 or target.shape[1] != len(OUTPUT_DTYPE.names):
+        raise ValueError(f"target must have the {len(OUTPUT_DTYPE.names)} output_composition "
+                         f"fields, got shape {target.shape}")
+    return target
+
+
+def _fit_cho(t, bt, max_iter: int, tol: float) -> tuple:
+    """Levenberg-Marquardt fit of (C, H) to normalized CHO fractions t (n, 7)."""
+    n = len(t)
+    # Element balance of the target: species moles (tabulated MW) -> element masses
+    # (atomic MW), as the RM system accounts them.
+    element_mass = (t / _SPECIES_MW) @ (_SPECIES_ATOMS * _ATOMIC_MASS[:, None]).T
+    x = element_mass[:, :2] / element_mass.sum(axis=1, keepdims=True)
+    damping = np.full(n, 1e-3)
+    iterations = np.zeros(n, dtype=int)
+    converged = np.zeros(n, dtype=bool)
+    active = np.arange(n)
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        xa, ta, ba = x[active], t[active], bt[active]
+        y, J = _cho_fractions_jacobian(xa[:, 0], xa[:, 1], ba)
+        iterations[active] += 1
+        r = y - ta
+        cost = np.einsum('ni,ni->n', r, r)
+        g = np.einsum('nik,ni->nk', J, r)
+        JTJ = np.einsum('nik,nil->nkl', J, J)
+        M = JTJ + damping[active, None, None] * np.einsum('nkk->nk', JTJ)[:, :, None] * np.eye(2)
+        det = M[:, 0, 0] * M[:, 1, 1] - M[:, 0, 1] * M[:, 1, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = -np.column_stack([M[:, 1, 1] * g[:, 0] - M[:, 0, 1] * g[:, 1],
+                                     M[:, 0, 0] * g[:, 1] - M[:, 1, 0] * g[:, 0]]) / det[:, None]
+        candidate = xa + step
+        inside = (np.isfinite(step).all(axis=1) & (candidate > 0).all(axis=1)
+                  & (candidate.sum(axis=1) < 1))
+        new_cost = np.full(active.size, np.inf)
+        if inside.any():
+            with np.errstate(divide='ignore', invalid='ignore'):
+                y_new = _cho_fractions_jacobian(candidate[inside, 0], candidate[inside, 1], ba[inside])[0]
+            new_cost[inside] = np.where(np.isfinite(y_new).all(axis=1),
+                                        np.einsum('ni,ni->n', y_new - ta[inside], y_new - ta[inside]),
+                                        np.inf)
+        accept = new_cost <= cost
+        x[active[accept]] = candidate[accept]
+        damping[active] = np.where(accept, damping[active] * 0.1, damping[active] * 10)
+        small_step = np.linalg.norm(step, axis=1) <= tol * (tol + np.linalg.norm(xa, axis=1))
+        done = (accept & small_step) | (np.linalg.norm(g, axis=1) <= tol * tol)
+        converged[active[done]] = True
+        stalled = damping[active] > 1e12
+        active = active[~done & ~stalled]
+    return x, iterations, converged
+
+
+def fit_composition(target, biomass_type=BiomassType.OTHERS,
+                    use_N_rich_characterization: bool = False,
+                    protein_splitting_parameter=(1./3., 1./3., 1./3.),
+                    max_iter: int = 100, tol: float = 1e-10) -> InverseResult:
+    """Best-fit elemental composition for one or many target output compositions.
+
+    target is an (n, 12) array in output_composition field order, a single (12,)
+    row, or an OUTPUT_DTYPE structured array; biomass_type is a single type or
+    one per target. With use_N_rich_characterization the protein fields of the
+    target fix N (and the protein_splitting_parameter should be the one the
+    target was produced with); otherwise N is not identifiable, the protein
+    fields are ignored and N is returned as 0.
+
+    The fit stops when the (C, H) step falls below tol (relative) or after
+    max_iter Jacobian evaluations; see InverseResult for the convergence data.
+    """
+    target = _as_targets(target)
+    n = len(target)
+    bt = np.asarray(biomass_type, dtype=int).ravel()
+    bt = np.full(n, bt[0]) if bt.size == 1 else bt
+    if bt.size != n:
+        raise ValueError(f"biomass_type has {bt.size} values, expected {n}")
+
+    ASH, MOIST = target[:, -2].copy(), target[:, -1].copy()
+    solid = 1 - ASH - MOIST
+    cho = target[:, :_N_CHO]
+    cho_total = cho.sum(axis=1)
+    ok = (solid > 0) & (cho_total > 0) & np.isfinite(target).all(axis=1)
+
+    prot_fraction = np.zeros(n)
+    split = np.asarray(protein_splitting_parameter, dtype=float)
+    if use_N_rich_characterization:
+        prot_fraction[ok] = target[ok, _N_CHO:_N_CHO + 3].sum(axis=1) / solid[ok]
+        ok &= prot_fraction < 1
+
+    C = np.full(n, np.nan)
+    H = np.full(n, np.nan)
+    iterations = np.zeros(n, dtype=int)
+    converged = np.zeros(n, dtype=bool)
+    if ok.any():
+        t = cho[ok] / cho_total[ok, None]
+        x, iterations[ok], converged[ok] = _fit_cho(t, bt[ok], max_iter, tol)
+        # Undo the protein removal of calculate_output_composition.
+        p = prot_fraction[ok]
+        C[ok] = x[:, 0] * (1 - p) + p * (split @ [_FRAC['C'][s] for s in ('PROTC', 'PROTH', 'PROTO')])
+        H[ok] = x[:, 1] * (1 - p) + p * (split @ [_FRAC['H'][s] for s in ('PROTC', 'PROTH', 'PROTO')])
+    N = np.where(ok, prot_fraction * _protein_mix_nitrogen(split), np.nan)
+    ASH[~ok] = np.nan
+    MOIST[~ok] = np.nan
+
+    fitted = characterize_batch(C, H, N, ASH, MOIST, bt,
+                                use_N_rich_characterization=use_N_rich_characterization,
+                                protein_splitting_parameter=protein_splitting_parameter,
+                                errors='nan', report_diagnostics=False)
+    residual = np.linalg.norm(fitted - target, axis=1)
+    return InverseResult(C, H, N, ASH, MOIST, residual, iterations, converged, fitted)
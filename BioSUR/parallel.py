@@ -0,0 +1,187 @@
+"""Multi-core execution of the batch characterization.
+
+The input rows are copied once into a shared-memory block, sharded into
+contiguous chunks and characterized by a ProcessPoolExecutor; every worker
+writes its rows straight into a shared output block, so neither inputs nor
+results are pickled per row and the output is in input order by construction.
+"""
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+import numpy as np
+
+from BioSUR.batch import _as_rows, _as_structured, characterize_batch
+from BioSUR.core import BiomassType, OUTPUT_DTYPE
+from BioSUR.diagnostics import count_flags, report
+
+# Layout of the shared blocks (float64 columns).
+_INPUT_COLUMNS = ('C', 'H', 'N', 'ASH', 'MOIST', 'biomass_type')
+_FLAG_COLUMNS = ('extrapolation_applied', 'extrapolation_error', 'extrapolation_feasible', 'valid', 'flags')
+_N_OUT = len(OUTPUT_DTYPE.names)
+
+# Smallest shard worth sending to another process.
+_MIN_CHUNK_SIZE = 1000
+
+
+class ChunkStats(NamedTuple):
+    """Timing of one shard, as reported to the progress callback."""
+    index: int
+    start: int                         # first input row of the shard
+    stop: int                          # one past the last input row
+    seconds: float                     # characterization time inside the worker
+    pid: int
+
+    @property
+    def rows(self) -> int:
+        return self.stop - self.start
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float('inf')
+
+
+def _attach(name: str, shape: tuple):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=float, buffer=shm.buf)
+
+
+def _characterize_chunk(index, in_name, out_name, n, start, stop, options):
+    """Worker: characterize rows [start, stop) of the shared input block."""
+    t0 = time.perf_counter()
+    in_shm, inputs = _attach(in_name, (n, len(_INPUT_COLUMNS)))
+    out_shm, outputs = _attach(out_name, (n, _N_OUT + len(_FLAG_COLUMNS)))
+    try:
+        out, info = characterize_batch(*inputs[start:stop, :5].T, inputs[start:stop, 5].astype(int),
+                                       full_output=True, errors='nan', report_diagnostics=False, **options)
+        outputs[start:stop, :_N_OUT] = out
+        for j, key in enumerate(_FLAG_COLUMNS):
+            outputs[start:stop, _N_OUT + j] = info[key]
+    finally:
+        del inputs, outputs  # release the buffer exports before closing
+        in_shm.close()
+        out_shm.close()
+    return ChunkStats(index, start, stop, time.perf_counter() - t0, os.getpid())
+
+
+def _unknown_types_to_invalid(bt: np.ndarray) -> np.ndarray:
+    """Map unknown biomass types to -1 so they survive the float round trip."""
+    known = (bt >= min(BiomassType)) & (bt <= max(BiomassType))
+    return np.where(known, bt, -1)
+
+
+def characterize_parallel(C, H, N=0.0, ASH=0.0, MOIST=0.0,
+                          biomass_type=BiomassType.OTHERS,
+                          workers: int = None,
+                          chunk_size: int = None,
+                          executor: ProcessPoolExecutor = None,
+                          progress=None,
+                          structured: bool = False,
+                          full_output: bool = False,
+                          errors: str = 'raise',
+                          report_diagnostics: bool = True,
+                          **options):
+    """characterize_batch spread over a process pool.
+
+    Arguments and results match characterize_batch, except that with
+    full_output=True the info dict only holds 'extrapolation_applied',
+    'extrapolation_error', 'extrapolation_feasible', 'valid', 'flags' and
+    'chunks' (the ChunkStats of every shard, in input order). Diagnostics are
+    reported once for the whole input, not per shard.
+
+    workers defaults to os.cpu_count(); chunk_size (rows per shard) defaults to
+    an even split into four shards per worker. Pass an existing `executor` to
+    reuse its processes across calls -- workers then only sizes the shards, so
+    pass the pool's max_workers when it differs from the CPU count. `progress`, if
+    given, is called with each ChunkStats as shards complete. Small inputs, or
+    workers=1, run in the calling process.
+    """
+    if errors not in ('raise', 'nan'):
+        raise ValueError(f"errors must be 'raise' or 'nan', got {errors!r}")
+    if options.get('jacobian'):
+        raise ValueError("characterize_parallel does not return Jacobians; use characterize_batch(jacobian=True)")
+    C = np.asarray(C, dtype=float).ravel()
+    n = C.size
+    bt = np.asarray(biomass_type, dtype=int).ravel()
+    bt = np.full(n, bt[0]) if bt.size == 1 else bt
+    if bt.size != n:
+        raise ValueError(f"biomass_type has {bt.size} values, expected {n}")
+    columns = [C, _as_rows(H, n, 'H'), _as_rows(N, n, 'N'), _as_rows(ASH, n, 'ASH'),
+               _as_rows(MOIST, n, 'MOIST'), _unknown_types_to_invalid(bt)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(_MIN_CHUNK_SIZE, math.ceil(n / (4 * workers)))
+    bounds = [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+
+    if (workers <= 1 and executor is None) or len(bounds) <= 1:
+        t0 = time.perf_counter()
+        result = characterize_batch(*columns[:5], bt, structured=structured,
+                                    full_output=full_output, errors=errors,
+                                    report_diagnostics=report_diagnostics, **options)
+        if full_output:
+            out, info = result
+            stats = ChunkStats(0, 0, n, time.perf_counter() - t0, os.getpid())
+            if progress is not None:
+                progress(stats)
+            return out, _compact_info(info, [stats])
+        return result
+
+    width = _N_OUT + len(_FLAG_COLUMNS)
+    in_shm = shared_memory.SharedMemory(create=True, size=max(1, n * len(_INPUT_COLUMNS) * 8))
+    out_shm = shared_memory.SharedMemory(create=True, size=max(1, n * width * 8))
+    own_executor = executor is None
+    inputs = None
+    try:
+        inputs = np.ndarray((n, len(_INPUT_COLUMNS)), dtype=float, buffer=in_shm.buf)
+        for j, column in enumerate(columns):
+            inputs[:, j] = column
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        futures = [executor.submit(_characterize_chunk, i, in_shm.name, out_shm.name, n, start, stop, options)
+                   for i, (start, stop) in enumerate(bounds)]
+        stats = [None] * len(bounds)
+        for future in as_completed(futures):
+            s = future.result()
+            stats[s.index] = s
+            if progress is not None:
+                progress(s)
+        outputs = np.array(np.ndarray((n, width), dtype=float, buffer=out_shm.buf))
+    finally:
+        del inputs  # release the buffer export before closing
+        if own_executor and executor is not None:
+            executor.shutdown(cancel_futures=True)
+        in_shm.close()
+        in_shm.unlink()
+        out_shm.close()
+        out_shm.unlink()
+
+    flags = {key: outputs[:, _N_OUT + j] for j, key in enumerate(_FLAG_COLUMNS)}
+    if errors == 'raise' and not flags['valid'].all():
+        # Re-run serially so the ValueError names the same row as characterize_batch.
+        return characterize_batch(*columns[:5], bt, structured=structured,
+                                  full_output=full_output, errors=errors,
+                                  report_diagnostics=report_diagnostics, **options)
+
+    flags['flags'] = flags['flags'].astype(np.uint8)
+    if report_diagnostics:
+        report(count_flags(flags['flags']), n)
+    out = np.ascontiguousarray(outputs[:, :_N_OUT])
+    if structured:
+        out = _as_structured(out)
+    if not full_output:
+        return out
+    info = {key: values.astype(bool) if values.dtype == float and key != 'extrapolation_error' else values
+            for key, values in flags.items()}
+    info['chunks'] = stats
+    return out, info
+
+
+def _compact_info(info: dict, stats: list) -> dict:
+    compact = {key: info[key] for key in _FLAG_COLUMNS}
+    compact['chunks'] = stats
+    return compact
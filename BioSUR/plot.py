@@ -47,7 +47,7 @@ def _comp_xy(comp, mode):
 
 def _cho_species_names():
     """Reference-species names that span the characterization triangle (no PROT)."""
-    return [s for s in REFERENCE_SPECIES.characteristics['name'] if not s.startswith('PROT')]
+    return [s for s in REFERENCE_SPECIES.names if not s.startswith('PROT')]
 
 
 def _axis_config(mode, biosur):
@@ -209,8 +209,12 @@ def _set_extrap_visibility(plot_elements, show: bool) -> None:
     plot_elements['extrap_point'].set_label('Extrapolated' if show else '_nolegend_')
 
 
-def update_triangle_plot(biosur: BioSUR, plot_elements):
-    """Update the dynamic elements of the plot in its current coordinate mode."""
+def update_triangle_plot(biosur: BioSUR, plot_elements) -> bool:
+    """Update the dynamic elements of the plot in its current coordinate mode.
+
+    Returns True when the legend was rebuilt (the extrapolated point appeared or
+    disappeared), i.e. when a cached blitting background is out of date.
+    """
     mode = plot_elements.get('mode', 'fraction')
 
     p1, p2, p3 = (_rm_xy(biosur.RM1, mode), _rm_xy(biosur.RM2, mode), _rm_xy(biosur.RM3, mode))
@@ -241,7 +245,79 @@ def update_triangle_plot(biosur: BioSUR, plot_elements):
         ex, ey = _comp_xy(biosur.extrapolated_composition, mode)
         plot_elements['extrap_point'].set_offsets([[ex, ey]])
         plot_elements['extrap_line'].set_data([bx, ex], [by, ey])
+    legend_changed = show_extrap != plot_elements['extrap_point'].get_visible()
     _set_extrap_visibility(plot_elements, show_extrap)
 
-    if 'ax' in plot_elements:
+    # The legend only lists the extrapolated point while it is shown.
+    if legend_changed and 'ax' in plot_elements:
         plot_elements['ax'].legend(loc="upper left", fontsize='small', frameon=True, edgecolor='black')
+    return legend_changed
+
+
+# Artists that move with the sample; everything else (axes, grid, reference
+# species, legend) is static between a mode change and the next legend change.
+_DYNAMIC_ELEMENTS = ('triangle_lines', 'rm_points', 'ref_species_lines', 'biomass_point',
+                     'extrap_line', 'extrap_point', 'hover_annotation')
+
+
+class TriangleBlitter:
+    """Blitting redraw of a triangle plot on an interactive canvas.
+
+    The dynamic artists are marked animated, so a full draw renders only the
+    static part; that is cached as the background on every draw_event (first
+    show, resize, invalidate). redraw() then restores the background and draws
+    the dynamic artists on top instead of re-rendering the whole figure.
+
+        blitter = TriangleBlitter(canvas, plot_elements)
+        if update_triangle_plot(biosur, plot_elements):
+            blitter.invalidate()
+        blitter.redraw()
+
+    After set_plot_mode the artists are new: release() this blitter and make
+    another one for the new plot_elements.
+    """
+
+    def __init__(self, canvas, plot_elements):
+        self.canvas = canvas
+        self.ax = plot_elements['ax']
+        self.artists = []
+        for key in _DYNAMIC_ELEMENTS:
+            element = plot_elements[key]
+            self.artists.extend(element if isinstance(element, list) else [element])
+        for artist in self.artists:
+            artist.set_animated(True)
+        self.background = None
+        self._cid = canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event) -> None:
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self) -> None:
+        for artist in self.artists:
+            if artist.get_visible():
+                self.ax.draw_artist(artist)
+
+    def invalidate(self) -> None:
+        """Discard the cached background (the static part of the plot changed)."""
+        self.background = None
+
+    def redraw(self) -> None:
+        """Show the current state of the dynamic artists.
+
+        Falls back to a full (idle) draw, which recaptures the background,
+        while there is no valid background.
+        """
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_artists()
+        self.canvas.blit(self.canvas.figure.bbox)
+
+    def release(self) -> None:
+        """Stop blitting: disconnect from the canvas and un-animate the artists."""
+        self.canvas.mpl_disconnect(self._cid)
+        for artist in self.artists:
+            artist.set_animated(False)
+        self.background = None
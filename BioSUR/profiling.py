@@ -0,0 +1,149 @@
+"""Opt-in per-stage timing of BioSUR.calculate_output_composition.
+
+Inside ``with profile() as p:`` the stage methods of BioSUR are wrapped with
+timers; every characterization in the block (any thread) is recorded, then the
+original methods are put back. Outside the block nothing is wrapped, so the
+disabled cost is exactly zero.
+
+Stages (name -> BioSUR method):
+
+    characterization      calculate_output_composition (the whole call)
+    nitrogen_handling     _handle_nitrogen
+    triangle_lookup       load_reference_triangle (cache lookup, or the two below)
+    splitting_parameters  calculate_splitting_parameters
+    rm_mixing             calculate_ratio_ref_species
+    triangle_test         is_outside_triangle
+    linear_solve          solve_linear_system
+    extrapolation         extrapolate_composition (CENTROID / NEAREST_POINT)
+    species_hull          _decompose_species_hull (SPECIES_HULL)
+    output_assembly       _assemble_output
+
+Stages nest (e.g. extrapolation runs inside linear_solve), so each stage reports
+its total (inclusive) and self (exclusive) time. p.to_json() dumps the counters;
+p.collapsed() gives the folded-stack format read by flamegraph.pl, speedscope
+and similar tools.
+"""
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from BioSUR.core import BioSUR
+
+STAGES = (
+    ('characterization', 'calculate_output_composition'),
+    ('nitrogen_handling', '_handle_nitrogen'),
+    ('triangle_lookup', 'load_reference_triangle'),
+    ('splitting_parameters', 'calculate_splitting_parameters'),
+    ('rm_mixing', 'calculate_ratio_ref_species'),
+    ('triangle_test', 'is_outside_triangle'),
+    ('linear_solve', 'solve_linear_system'),
+    ('extrapolation', 'extrapolate_composition'),
+    ('species_hull', '_decompose_species_hull'),
+    ('output_assembly', '_assemble_output'),
+)
+
+_ACTIVE = None
+_ACTIVE_LOCK = threading.Lock()
+
+
+class Profile:
+    """Call counts and times per stage, and self time per stage stack."""
+
+    def __init__(self):
+        self.calls = {name: 0 for name, _ in STAGES}
+        self.total = {name: 0.0 for name, _ in STAGES}
+        self.self_time = {name: 0.0 for name, _ in STAGES}
+        self.stacks = {}                   # (outer, ..., stage) -> self seconds
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _timed(self, name: str, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stack = getattr(self._local, 'stack', None)
+            if stack is None:
+                stack = self._local.stack = []
+            frame = [name, 0.0]            # stage, time spent in nested stages
+            stack.append(frame)
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - t0
+                path = tuple(f[0] for f in stack)
+                stack.pop()
+                if stack:
+                    stack[-1][1] += elapsed
+                exclusive = elapsed - frame[1]
+                with self._lock:
+                    self.calls[name] += 1
+                    self.total[name] += elapsed
+                    self.self_time[name] += exclusive
+                    self.stacks[path] = self.stacks.get(path, 0.0) + exclusive
+        return wrapper
+
+    def stats(self) -> dict:
+        """{stage: {'calls', 'total_seconds', 'self_seconds', 'mean_seconds'}} of the stages that ran."""
+        return {name: {'calls': self.calls[name],
+                       'total_seconds': self.total[name],
+                       'self_seconds': self.self_time[name],
+                       'mean_seconds': self.total[name] / self.calls[name]}
+                for name, _ in STAGES if self.calls[name]}
+
+    def to_json(self, path=None, indent: int = 2):
+        """The stats as JSON: returned as a string, or written to `path`."""
+        text = json.dumps({'stages': self.stats(),
+                           'stacks': {';'.join(k): v for k, v in sorted(self.stacks.items())}},
+                          indent=indent)
+        if path is None:
+            return text
+        with open(path, 'w') as f:
+            f.write(text + '\n')
+
+    def collapsed(self, path=None):
+        """Folded stacks ('outer;inner <microseconds>' per line) of the self times."""
+        text = ''.join(f"{';'.join(stack)} {round(seconds * 1e6)}\n"
+                       for stack, seconds in sorted(self.stacks.items()))
+        if path is None:
+            return text
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def report(self) -> str:
+        """Human-readable table of the stats, slowest self time first."""
+        stats = self.stats()
+        lines = [f"{'stage':22s} {'calls':>9s} {'total ms':>10s} {'self ms':>10s} {'mean us':>10s}"]
+        for name, s in sorted(stats.items(), key=lambda item: -item[1]['self_seconds']):
+            lines.append(f"{name:22s} {s['calls']:9d} {s['total_seconds'] * 1e3:10.2f} "
+                         f"{s['self_seconds'] * 1e3:10.2f} {s['mean_seconds'] * 1e6:10.2f}")
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        calls = self.calls['characterization']
+        return f"Profile({calls} characterization(s), {self.total['characterization'] * 1e3:.2f} ms)"
+
+
+@contextmanager
+def profile():
+    """Time the stages of every calculate_output_composition in the block.
+
+    Yields the Profile being filled. Profiling is process-wide (the BioSUR
+    class is instrumented) and cannot be nested.
+    """
+    global _ACTIVE
+    with _ACTIVE_LOCK:
+        if _ACTIVE is not None:
+            raise RuntimeError("profile() is already active")
+        _ACTIVE = Profile()
+        originals = {method: BioSUR.__dict__[method] for _, method in STAGES}
+        for name, method in STAGES:
+            setattr(BioSUR, method, _ACTIVE._timed(name, originals[method]))
+    try:
+        yield _ACTIVE
+    finally:
+        with _ACTIVE_LOCK:
+            for method, func in originals.items():
+                setattr(BioSUR, method, func)
+            _ACTIVE = None
@@ -0,0 +1,335 @@
+"""Persistent, content-addressed cache of batch characterizations.
+
+Rows are stored by content: their inputs (C, H, N, ASH, MOIST, biomass type)
+within a partition named after the options that affect them (extrapolation
+method, N-rich mode and protein split) and model_version(), a digest of
+OPTIMIZATION_PARAMETERS, the REFERENCE_SPECIES table, the species-hull table in
+use and CACHE_VERSION. Rows seen before are read from disk; only new or changed
+rows are characterized, and a change to the model makes every old entry
+unreachable rather than wrong.
+
+Each partition is one .npy file in the cache directory: a table of records
+sorted by a 64-bit hash of the inputs, memory-mapped and searched with
+np.searchsorted, so a lookup is vectorized and only touches the pages it needs.
+A hit also compares the stored inputs bit for bit, so hash collisions cost a
+recomputation, never a wrong row. New rows are written, sorted the same way, to
+a segment file of their own next to the table and looked up alongside it, so a
+batch writes only what it computed. Segments are merged with each other once
+there are more than MAX_SEGMENTS, and into the table by close(). Every file
+appears by an atomic rename; concurrent writers never corrupt one, but a merge
+may drop another writer's additions (they are recomputed next time).
+
+Typical use::
+
+    from BioSUR.result_cache import ResultCache
+
+    cache = ResultCache("feedstock-cache")
+    out = cache.characterize_batch(C, H, N, ASH, MOIST, biomass_type, use_extrapolation=True)
+    print(cache.info())          # CacheInfo(hits=..., misses=..., maxsize=None, currsize=...)
+
+From the command line: ``python -m BioSUR samples.csv --cache feedstock-cache``.
+"""
+import contextlib
+import glob
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from BioSUR import core
+from BioSUR.batch import _as_structured, characterize_batch
+from BioSUR.core import BiomassType, CacheInfo, ExtrapolationMethod, OPTIMIZATION_PARAMETERS, OUTPUT_DTYPE
+from BioSUR.diagnostics import count_flags, report
+from BioSUR.hull_table import TABLE_VERSION
+from BioSUR.species import REFERENCE_SPECIES
+
+# Bumped whenever the stored record or the characterization changes meaning.
+CACHE_VERSION = 2
+
+# Inputs of a row, in key order: C, H, N, ASH, MOIST, biomass type.
+_N_INPUTS = 6
+
+# One stored row: its key, the output composition and the per-row info kept with it.
+TABLE_DTYPE = np.dtype([
+    ('hash', '<u8'),
+    ('inputs', '<f8', (_N_INPUTS,)),
+    ('output', '<f8', (len(OUTPUT_DTYPE.names),)),
+    ('extrapolation_error', '<f8'),
+    ('flags', 'u1'),
+    ('extrapolation_applied', '?'),
+    ('extrapolation_feasible', '?'),
+    ('valid', '?'),
+])
+INFO_KEYS = ('extrapolation_applied', 'extrapolation_error', 'extrapolation_feasible', 'valid', 'flags')
+
+_OPTION_DEFAULTS = {
+    'use_extrapolation': False,
+    'extrapolation_method': ExtrapolationMethod.CENTROID,
+    'legacy_centroid_stepping': False,
+    'use_N_rich_characterization': False,
+    'protein_splitting_parameter': (1./3., 1./3., 1./3.),
+}
+
+# Segments a partition collects before they are merged into one.
+MAX_SEGMENTS = 16
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def model_version() -> str:
+    """Digest of everything a cached result depends on besides its inputs and options."""
+    h = hashlib.sha256(f"BioSUR result cache {CACHE_VERSION}".encode())
+    h.update(np.ascontiguousarray(OPTIMIZATION_PARAMETERS, dtype='<f8').tobytes())
+    h.update(str(REFERENCE_SPECIES.characteristics.dtype).encode())
+    h.update(REFERENCE_SPECIES.characteristics.tobytes())
+    table = core.species_hull_table()
+    if table is None:
+        h.update(b"exact species hull")
+    else:
+        # The interpolated weights are fixed by the table format, the solver
+        # fingerprint and the grid.
+        h.update(f"species hull table {TABLE_VERSION}".encode())
+        h.update(table.fingerprint.encode())
+        for axis in (table.C_axis, table.H_axis):
+            h.update(np.ascontiguousarray(axis, dtype='<f8').tobytes())
+    return h.hexdigest()
+
+
+def _options_key(options: dict) -> bytes:
+    """Canonical bytes of the options that change the result.
+
+    The extrapolation method (and legacy stepping) only matter with extrapolation
+    on, the protein split only in N-rich mode, so rows computed with different
+    but irrelevant settings share their entries.
+    """
+    unknown = set(options) - set(_OPTION_DEFAULTS)
+    if unknown:
+        raise TypeError(f"ResultCache.characterize_batch got unsupported options {sorted(unknown)}")
+    o = {**_OPTION_DEFAULTS, **options}
+    method = ExtrapolationMethod(o['extrapolation_method'])
+    extrapolation = (method.name, bool(o['legacy_centroid_stepping']) and method == ExtrapolationMethod.CENTROID) \
+        if o['use_extrapolation'] else None
+    split = tuple(float(v) for v in o['protein_splitting_parameter']) \
+        if o['use_N_rich_characterization'] else None
+    return repr((extrapolation, bool(o['use_N_rich_characterization']), split)).encode()
+
+
+def _row_hashes(inputs: np.ndarray) -> np.ndarray:
+    """64-bit hash of every row's input bits (splitmix64 over the words)."""
+    words = np.ascontiguousarray(inputs, dtype='<f8').view('<u8')
+    h = np.full(len(words), _GOLDEN, dtype=np.uint64)
+    for j in range(words.shape[1]):
+        h ^= words[:, j]
+        h += _GOLDEN
+        h ^= h >> np.uint64(30)
+        h *= np.uint64(0xBF58476D1CE4E5B9)
+        h ^= h >> np.uint64(27)
+        h *= np.uint64(0x94D049BB133111EB)
+        h ^= h >> np.uint64(31)
+    return h
+
+
+class ResultCache:
+    """Content-addressed characterization results in a directory of .npy tables.
+
+    `compute` is the characterization behind the cache, called for the missing
+    rows with characterize_batch's arguments (full_output=True, errors='nan');
+    for instance functools.partial(characterize_parallel, executor=pool).
+    """
+
+    def __init__(self, path, compute=characterize_batch):
+        self.path = os.fspath(path)
+        self.compute = compute
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.path, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return f"ResultCache({self.path!r}, hits={self.hits}, misses={self.misses})"
+
+    def _tables(self) -> list:
+        return glob.glob(os.path.join(self.path, '*.npy'))
+
+    def info(self) -> CacheInfo:
+        """Hits and misses of this instance, and the number of stored rows."""
+        size = sum(len(table) for table in map(self._load, self._tables()) if table is not None)
+        return CacheInfo(self.hits, self.misses, None, size)
+
+    def clear(self) -> None:
+        """Delete every stored row and reset the counters."""
+        for table in self._tables():
+            os.remove(table)
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        """Merge every partition's segments into its table."""
+        segments = glob.glob(os.path.join(glob.escape(self.path), '*.seg.npy'))
+        for name in sorted({os.path.basename(segment).split('.')[0] for segment in segments}):
+            self._compact(os.path.join(self.path, name + '.npy'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _partition(self, options: dict) -> str:
+        name = hashlib.sha256(model_version().encode() + b'\0' + _options_key(options)).hexdigest()[:32]
+        return os.path.join(self.path, name + '.npy')
+
+    @staticmethod
+    def _segments(path: str) -> list:
+        """Segment files of the partition whose table is at path."""
+        return sorted(glob.glob(glob.escape(path[:-len('.npy')]) + '.*.seg.npy'))
+
+    @staticmethod
+    def _load(path: str):
+        """The table at path, memory-mapped, or None if it is missing or foreign."""
+        try:
+            table = np.load(path, mmap_mode='r')
+        except (FileNotFoundError, EOFError, ValueError):
+            return None
+        return table if table.dtype == TABLE_DTYPE else None
+
+    @classmethod
+    def _lookup(cls, path: str, inputs: np.ndarray, hashes: np.ndarray) -> tuple:
+        """(hit mask, stored records of the hits) of the rows in the table at path."""
+        table = cls._load(path)
+        if table is None or not len(table):
+            return np.zeros(len(inputs), dtype=bool), np.zeros(0, dtype=TABLE_DTYPE)
+        # Searching in hash order walks the table (and its pages) front to back.
+        order = np.argsort(hashes)
+        pos = np.minimum(np.searchsorted(table['hash'], hashes[order]), len(table) - 1)
+        candidates = np.empty(len(inputs), dtype=TABLE_DTYPE)
+        candidates[order] = table[pos]
+        hit = (candidates['hash'] == hashes) & np.all(
+            candidates['inputs'].view('<u8') == np.ascontiguousarray(inputs, dtype='<f8').view('<u8'), axis=1)
+        return hit, candidates[hit]
+
+    def _write(self, path: str, table: np.ndarray, tmp_prefix: str = 'tmp') -> None:
+        """Save table to path through a temporary file and an atomic rename."""
+        # A temporary file of its own per writer, thread or process.
+        fd, tmp = tempfile.mkstemp(dir=self.path, prefix=tmp_prefix, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, table)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def _add_segment(self, path: str, records: np.ndarray) -> None:
+        """Write records, sorted by hash, as a new segment of the partition at path."""
+        prefix = path[:-len('.npy')] + '.'
+        fd, name = tempfile.mkstemp(dir=self.path, prefix=os.path.basename(prefix), suffix='.seg.npy')
+        os.close(fd)
+        # The reserved name stays empty (and unreadable, so skipped) until the rename.
+        try:
+            self._write(name, records, tmp_prefix=os.path.basename(prefix))
+        except BaseException:
+            os.remove(name)
+            raise
+
+    def _merged(self, paths: list) -> np.ndarray:
+        """The records of the tables at paths in one table sorted by hash, one per hash."""
+        tables = [table for table in map(self._load, paths) if table is not None]
+        merged = np.concatenate(tables + [np.zeros(0, dtype=TABLE_DTYPE)])
+        merged = merged[np.argsort(merged['hash'], kind='stable')]
+        keep = np.ones(len(merged), dtype=bool)
+        keep[1:] = merged['hash'][1:] != merged['hash'][:-1]
+        return merged[keep]
+
+    def _compact(self, path: str, into_table: bool = True) -> None:
+        """Merge the segments of the partition at path into its table (or one segment)."""
+        segments = self._segments(path)
+        if into_table and segments:
+            self._write(path, self._merged([path] + segments))
+        elif len(segments) > 1:
+            self._add_segment(path, self._merged(segments))
+        else:
+            return
+        # Segments written meanwhile were not listed and are kept.
+        for segment in segments:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(segment)
+
+    def _store(self, path: str, new: np.ndarray) -> None:
+        """Add new records, sorted by hash, to the partition at path."""
+        self._add_segment(path, new)
+        # Only this session's segments are rewritten; the table waits for close().
+        if len(self._segments(path)) > MAX_SEGMENTS:
+            self._compact(path, into_table=False)
+
+    def characterize_batch(self, C, H, N=0.0, ASH=0.0, MOIST=0.0,
+                           biomass_type=BiomassType.OTHERS,
+                           structured: bool = False,
+                           full_output: bool = False,
+                           errors: str = 'raise',
+                           report_diagnostics: bool = True,
+                           **options):
+        """characterize_batch served from the cache where possible.
+
+        Arguments and results match characterize_batch (options: the BioSUR
+        settings, e.g. use_extrapolation, extrapolation_method), except that
+        with full_output=True the info dict only holds INFO_KEYS, as for
+        characterize_parallel. Rows not in the cache are characterized with
+        `compute` and stored; rows that cannot be characterized are stored too
+        and, with errors='raise', raise as characterize_batch does.
+        """
+        if errors not in ('raise', 'nan'):
+            raise ValueError(f"errors must be 'raise' or 'nan', got {errors!r}")
+        C = np.asarray(C, dtype=float).ravel()
+        n = C.size
+        inputs = np.empty((n, _N_INPUTS))
+        inputs[:, 0] = C
+        for j, (name, value) in enumerate((('H', H), ('N', N), ('ASH', ASH), ('MOIST', MOIST),
+                                           ('biomass_type', np.asarray(biomass_type, dtype=int))), start=1):
+            value = np.asarray(value, dtype=float).ravel()
+            if value.size not in (1, n):
+                raise ValueError(f"{name} has {value.size} values, expected {n}")
+            inputs[:, j] = value
+
+        path = self._partition(options)
+        hashes = _row_hashes(inputs)
+        records = np.zeros(n, dtype=TABLE_DTYPE)
+        missing = np.arange(n)
+        for table in [path] + self._segments(path):
+            if not missing.size:
+                break
+            hit, found = self._lookup(table, inputs[missing], hashes[missing])
+            records[missing[hit]] = found
+            missing = missing[~hit]
+        if missing.size:
+            rows = inputs[missing]
+            out, info = self.compute(rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4],
+                                     rows[:, 5].astype(int), full_output=True, errors='nan',
+                                     report_diagnostics=False, **options)
+            computed = np.zeros(missing.size, dtype=TABLE_DTYPE)
+            computed['hash'] = hashes[missing]
+            computed['inputs'] = rows
+            computed['output'] = out
+            for name in INFO_KEYS:
+                computed[name] = info[name]
+            records[missing] = computed
+            # A row repeated within the batch is stored once, in hash order.
+            _, first = np.unique(computed['hash'], return_index=True)
+            self._store(path, computed[first])
+        self.hits += n - missing.size
+        self.misses += missing.size
+
+        if errors == 'raise' and not records['valid'].all():
+            # Let the uncached path raise with the right row number (or, for the
+            # rows it does not reject, return what it would have returned).
+            return characterize_batch(C, H, N, ASH, MOIST, biomass_type, structured=structured,
+                                      full_output=full_output, report_diagnostics=report_diagnostics,
+                                      **options)
+        if report_diagnostics:
+            report(count_flags(records['flags']), n)
+        out = records['output']
+        if structured:
+            out = _as_structured(out)
+        if not full_output:
+            return out
+        return out, {name: records[name].copy() for name in INFO_KEYS}
@@ -0,0 +1,509 @@
+"""Local HTTP/JSON characterization service: ``python -m BioSUR.service [--port 8080]``.
+
+Standard library only (asyncio). Endpoints:
+
+    POST /characterize   one sample object -> one result object,
+                         a list of samples -> a list of results
+    GET  /metrics        throughput, batch and latency histograms (Prometheus text format)
+    GET  /health         {"status": "ok"}
+
+A sample is {"C": .., "H": .., "N": .., "ASH": .., "MOIST": .., "biomass_type":
+.., "extrapolation": .., "n_rich": .., "legacy_centroid": .., "protein_split":
+[PROTC, PROTH, PROTO]}; only C and H are required, the rest default as in the
+command line (biomass type Others, extrapolation "off"). Inputs are parsed like
+the columns of BioSUR.cli, so a sample that cannot be characterized gets a null
+"output" and the reason in "error" rather than failing the request.
+
+Requests arriving together are coalesced into micro-batches: the batcher waits
+at most max_latency seconds after the first queued request, or until
+max_batch_size samples are queued, and characterizes the batch with
+characterize_batch (one call per distinct set of options) in a worker thread,
+so the event loop keeps accepting requests meanwhile.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import sys
+import time
+from collections import deque
+from http import HTTPStatus
+
+from BioSUR.cli import EXTRAPOLATION_CHOICES, characterize_columns, parse_biomass_type
+from BioSUR.core import BiomassType, OUTPUT_DTYPE
+
+logger = logging.getLogger('BioSUR')
+
+SAMPLE_KEYS = ('C', 'H', 'N', 'ASH', 'MOIST', 'biomass_type', 'extrapolation', 'n_rich',
+               'legacy_centroid', 'protein_split')
+
+# path -> HTTP method
+ROUTES = {'/characterize': 'POST', '/metrics': 'GET', '/health': 'GET'}
+
+# Pending connections the kernel queues for us; bursts of clients beyond the
+# default (100) would otherwise wait out SYN retransmission timeouts.
+LISTEN_BACKLOG = 1024
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_HEADER_LINES = 100
+
+# Histogram bucket upper bounds (the +Inf bucket is implicit).
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+# Window of the throughput gauge, in seconds.
+THROUGHPUT_WINDOW = 60.0
+
+
+class RequestError(ValueError):
+    """A request the service rejects as a whole (HTTP 4xx)."""
+
+    def __init__(self, message: str, status: HTTPStatus = HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, help_text: str) -> list:
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum {self.sum:.9g}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class Metrics:
+    """Counters and histograms of a running service, rendered by /metrics."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = {}                     # (path, status) -> count
+        self.samples = 0
+        self.invalid_samples = 0
+        self.batches = 0
+        self.request_latency = Histogram(LATENCY_BUCKETS)
+        self.batch_seconds = Histogram(LATENCY_BUCKETS)
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self._recent = deque()                 # (time, samples) of the batches in the window
+
+    def record_request(self, path: str, status: int, seconds: float) -> None:
+        key = (path, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        self.request_latency.observe(seconds)
+
+    def record_batch(self, samples: int, invalid: int, seconds: float) -> None:
+        self.batches += 1
+        self.samples += samples
+        self.invalid_samples += invalid
+        self.batch_size.observe(samples)
+        self.batch_seconds.observe(seconds)
+        now = time.monotonic()
+        self._recent.append((now, samples))
+        self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        while self._recent and self._recent[0][0] < now - THROUGHPUT_WINDOW:
+            self._recent.popleft()
+
+    def throughput(self) -> float:
+        """Samples per second over the last THROUGHPUT_WINDOW seconds (or the uptime)."""
+        now = time.monotonic()
+        self._prune(now)
+        window = min(THROUGHPUT_WINDOW, now - self.started)
+        return sum(n for _, n in self._recent) / window if window > 0 else 0.0
+
+    def render(self) -> str:
+        lines = ["# HELP biosur_uptime_seconds Seconds since the service started.",
+                 "# TYPE biosur_uptime_seconds gauge",
+                 f"biosur_uptime_seconds {time.monotonic() - self.started:.3f}",
+                 "# HELP biosur_requests_total HTTP requests by path and status.",
+                 "# TYPE biosur_requests_total counter"]
+        for (path, status), count in sorted(self.requests.items()):
+            lines.append(f'biosur_requests_total{{path="{path}",status="{status}"}} {count}')
+        lines += ["# HELP biosur_samples_total Samples characterized.",
+                  "# TYPE biosur_samples_total counter",
+                  f"biosur_samples_total {self.samples}",
+                  "# HELP biosur_invalid_samples_total Samples that could not be characterized.",
+                  "# TYPE biosur_invalid_samples_total counter",
+                  f"biosur_invalid_samples_total {self.invalid_samples}",
+                  "# HELP biosur_batches_total Micro-batches characterized.",
+                  "# TYPE biosur_batches_total counter",
+                  f"biosur_batches_total {self.batches}",
+                  f"# HELP biosur_throughput_samples_per_second Samples per second over the last "
+                  f"{THROUGHPUT_WINDOW:g} s.",
+                  "# TYPE biosur_throughput_samples_per_second gauge",
+                  f"biosur_throughput_samples_per_second {self.throughput():.3f}"]
+        lines += self.batch_size.render("biosur_batch_size", "Samples per micro-batch.")
+        lines += self.batch_seconds.render("biosur_batch_seconds", "Characterization time per micro-batch.")
+        lines += self.request_latency.render("biosur_request_latency_seconds",
+                                             "Time from request received to response sent.")
+        return "\n".join(lines) + "\n"
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _options_key(sample: dict) -> tuple:
+    """The batch-wide characterization options of a sample, validated."""
+    extrapolation = sample.get('extrapolation', 'off')
+    if not isinstance(extrapolation, str) or extrapolation not in EXTRAPOLATION_CHOICES:
+        raise RequestError(f"extrapolation must be one of {list(EXTRAPOLATION_CHOICES)}, "
+                           f"got {extrapolation!r}")
+    flags = []
+    for name in ('n_rich', 'legacy_centroid'):
+        value = sample.get(name, False)
+        if not isinstance(value, bool):
+            raise RequestError(f"{name} must be true or false, got {value!r}")
+        flags.append(value)
+    split = sample.get('protein_split', (1./3., 1./3., 1./3.))
+    if (not isinstance(split, (list, tuple)) or len(split) != 3 or not all(_is_number(v) for v in split)
+            or min(split) < 0 or not math.isclose(sum(split), 1.0, rel_tol=1e-5)):
+        raise RequestError(f"protein_split must be three non-negative numbers summing to 1, got {split!r}")
+    return (extrapolation, flags[0], flags[1], tuple(float(v) for v in split))
+
+
+def _options(key: tuple) -> dict:
+    """characterize_batch keyword options of an _options_key."""
+    extrapolation, n_rich, legacy_centroid, split = key
+    use_extrapolation, method = EXTRAPOLATION_CHOICES[extrapolation]
+    return dict(use_extrapolation=use_extrapolation, extrapolation_method=method,
+                legacy_centroid_stepping=legacy_centroid, use_N_rich_characterization=n_rich,
+                protein_splitting_parameter=split)
+
+
+def validate_sample(sample: dict) -> None:
+    """Raise RequestError unless sample is a well-formed sample object."""
+    unknown = set(sample) - set(SAMPLE_KEYS)
+    if unknown:
+        raise RequestError(f"unknown keys {sorted(unknown)}; expected some of {list(SAMPLE_KEYS)}")
+    if 'C' not in sample or 'H' not in sample:
+        raise RequestError("every sample needs C and H")
+    for name in ('C', 'H', 'N', 'ASH', 'MOIST'):
+        value = sample.get(name)
+        if value is not None and not _is_number(value):
+            raise RequestError(f"{name} must be a number or null, got {value!r}")
+    if 'biomass_type' in sample and parse_biomass_type(sample['biomass_type']) < 0:
+        raise RequestError(f"unknown biomass_type {sample['biomass_type']!r}")
+    _options_key(sample)
+
+
+def parse_samples(body: bytes) -> tuple:
+    """(samples, single) from a request body; single is True for a lone object."""
+    try:
+        payload = json.loads(body)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise RequestError(f"invalid JSON: {e}") from None
+    single = isinstance(payload, dict)
+    samples = [payload] if single else payload
+    if not isinstance(samples, list) or not all(isinstance(s, dict) for s in samples):
+        raise RequestError("body must be a sample object or a list of sample objects")
+    for sample in samples:
+        validate_sample(sample)
+    return samples, single
+
+
+def _json_number(value):
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def _characterize_group(samples: list, rows: list, key: tuple, results: list) -> None:
+    """Fill results[i] for the rows of one options group with one characterize_batch call."""
+    columns = {name: [samples[i].get(name) for i in rows] for name in ('C', 'H', 'N', 'ASH', 'MOIST')}
+    columns['biomass_type'] = [samples[i].get('biomass_type', int(BiomassType.OTHERS)) for i in rows]
+    out = characterize_columns(columns, BiomassType.OTHERS, _options(key))
+    for j, i in enumerate(rows):
+        error = out['error'][j]
+        results[i] = {
+            'output': None if error else {name: _json_number(out[name][j]) for name in OUTPUT_DTYPE.names},
+            'extrapolation_applied': bool(out['extrapolation_applied'][j]),
+            'extrapolation_error': _json_number(out['extrapolation_error'][j]),
+            'extrapolation_feasible': bool(out['extrapolation_feasible'][j]),
+            'flags': int(out['flags'][j]),
+            'error': error,
+        }
+
+
+def characterize_samples(samples: list) -> list:
+    """Result objects of parsed samples, one characterize_batch call per set of options.
+
+    A group whose characterization raises (a bug, not bad input) is retried one
+    sample at a time, so one sample never fails another: only a sample that
+    still raises on its own gets the exception in place of a result.
+    """
+    groups = {}
+    for i, sample in enumerate(samples):
+        groups.setdefault(_options_key(sample), []).append(i)
+    results = [None] * len(samples)
+    for key, rows in groups.items():
+        try:
+            _characterize_group(samples, rows, key, results)
+            continue
+        except Exception as e:
+            if len(rows) == 1:
+                logger.exception("characterization of a sample failed")
+                results[rows[0]] = e
+                continue
+            logger.exception("characterization of %d samples failed; retrying one by one", len(rows))
+        for i in rows:
+            try:
+                _characterize_group(samples, [i], key, results)
+            except Exception as e:
+                logger.exception("characterization of a sample failed")
+                results[i] = e
+    return results
+
+
+class CharacterizationService:
+    """Micro-batching characterization behind an asyncio HTTP server."""
+
+    def __init__(self, max_batch_size: int = 256, max_latency: float = 0.002):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if max_latency < 0:
+            raise ValueError("max_latency must be >= 0")
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.metrics = Metrics()
+        self._queue = None
+        self._carry = None                     # request that did not fit the last batch
+        self._batcher = None
+        self._server = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8080):
+        """Start listening; returns the asyncio Server (port 0 picks a free port)."""
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._run_batches())
+        self._server = await asyncio.start_server(self._handle_connection, host, port,
+                                                  backlog=LISTEN_BACKLOG)
+        return self._server
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+
+    async def characterize(self, samples: list) -> list:
+        """Queue parsed samples for the next micro-batch and wait for their results."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((samples, future))
+        return await future
+
+    # --- Batching ----------------------------------------------------------------
+
+    async def _next_batch(self) -> list:
+        """Queued requests up to max_batch_size samples or max_latency after the first.
+
+        A single request larger than max_batch_size is characterized on its own.
+        """
+        item, self._carry = self._carry, None
+        batch = [item if item is not None else await self._queue.get()]
+        size = len(batch[0][0])
+        deadline = asyncio.get_running_loop().time() + self.max_latency
+        while size < self.max_batch_size:
+            if self._queue.empty():
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self._queue.get_nowait()
+            if size + len(item[0]) > self.max_batch_size:
+                self._carry = item             # opens the next batch
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _run_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            samples = [sample for request, _ in batch for sample in request]
+            t0 = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(None, characterize_samples, samples)
+            except Exception as e:           # a bug, not bad input: fail the batch, keep serving
+                logger.exception("characterization batch failed")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.metrics.record_batch(len(samples),
+                                      sum(1 for r in results if isinstance(r, Exception) or r['error']),
+                                      time.perf_counter() - t0)
+            start = 0
+            for request, future in batch:
+                request_results = results[start:start + len(request)]
+                start += len(request)
+                if future.done():
+                    continue
+                # Only requests with a sample in a failed group fail.
+                error = next((r for r in request_results if isinstance(r, Exception)), None)
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(request_results)
+
+    # --- HTTP --------------------------------------------------------------------
+
+    async def _handle_connection(self, reader, writer) -> None:
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body, error = request
+                t0 = time.perf_counter()
+                if error is not None:
+                    status, payload = error.status, {'error': str(error)}
+                else:
+                    status, payload = await self._route(method, path, body)
+                keep_alive = error is None and headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, payload, keep_alive)
+                self.metrics.record_request(path if path in ROUTES else 'other', int(status),
+                                            time.perf_counter() - t0)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """(method, path, headers, body, error) of the next request; None at EOF."""
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split()
+        except ValueError:
+            return 'GET', '-', {}, b'', RequestError("malformed request line")
+        path = target.split('?', 1)[0]
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            return method, path, headers, b'', RequestError("too many header lines")
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            return method, path, headers, b'', RequestError(
+                "chunked request bodies are not supported; send Content-Length",
+                HTTPStatus.LENGTH_REQUIRED)
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            return method, path, headers, b'', RequestError("invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            return method, path, headers, b'', RequestError(
+                f"body larger than {MAX_BODY_BYTES} bytes", HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await reader.readexactly(length) if length else b''
+        return method, path, headers, body, None
+
+    async def _route(self, method: str, path: str, body: bytes) -> tuple:
+        """(status, payload) of a request; payload is JSON-able or a str."""
+        if path not in ROUTES:
+            return HTTPStatus.NOT_FOUND, {'error': f"unknown path {path}"}
+        if method != ROUTES[path]:
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': f"{path} expects {ROUTES[path]}"}
+        if path == '/metrics':
+            return HTTPStatus.OK, self.metrics.render()
+        if path == '/health':
+            return HTTPStatus.OK, {'status': 'ok'}
+        try:
+            samples, single = parse_samples(body)
+        except RequestError as e:
+            return e.status, {'error': str(e)}
+        if not samples:
+            return HTTPStatus.OK, []
+        try:
+            results = await self.characterize(samples)
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"characterization failed: {e}"}
+        return HTTPStatus.OK, results[0] if single else results
+
+    @staticmethod
+    async def _respond(writer, status: HTTPStatus, payload, keep_alive: bool) -> None:
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), 'text/plain; version=0.0.4'
+        else:
+            body, content_type = json.dumps(payload).encode(), 'application/json'
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m BioSUR.service',
+                                     description="Serve BioSUR characterizations over local HTTP/JSON.")
+    parser.add_argument('--host', default='127.0.0.1', help="interface to bind (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8080, help="port (default: 8080)")
+    parser.add_argument('--max-batch-size', type=int, default=256,
+                        help="samples per micro-batch (default: 256)")
+    parser.add_argument('--max-latency-ms', type=float, default=2.0,
+                        help="longest wait for a micro-batch to fill, in ms (default: 2)")
+    return parser
+
+
+async def serve(host: str, port: int, max_batch_size: int, max_latency: float) -> None:
+    service = CharacterizationService(max_batch_size, max_latency)
+    server = await service.start(host, port)
+    address = server.sockets[0].getsockname()
+    print(f"BioSUR: serving on http://{address[0]}:{address[1]}", file=sys.stderr, flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.max_batch_size < 1 or args.max_latency_ms < 0:
+        raise SystemExit("--max-batch-size must be >= 1 and --max-latency-ms >= 0")
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch_size, args.max_latency_ms / 1e3))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,12 @@
 from dataclasses import dataclass, field
+from types import MappingProxyType
 import numpy as np
-from typing import Dict
+from typing import Dict, Mapping
 import math
 
+# Numeric columns of the reference-species table, exposed as float64 arrays.
+_NUMERIC_COLUMNS = ('C', 'H', 'O', 'N', 'MW', 'C_frac', 'H_frac', 'O_frac', 'N_frac')
+
 @dataclass
 class ReferenceSpecies:
     characteristics: np.ndarray = field(default_factory=lambda: np.array([
@@ -31,12 +35,47 @@ class ReferenceSpecies:
         ('N_frac', 'f4')
     ]))
 
-    def __getitem__(self, key):
-        mask = self.characteristics['name'] == key
-        if not np.any(mask):
-            raise KeyError(f"Species '{key}' not found")
-        return {name: self.characteristics[mask][0][i]
-                for i, name in enumerate(self.characteristics.dtype.names)}
+    # Derived lookup structures, built once from `characteristics` in __post_init__:
+    # name -> row index, species names in table order, one read-only float64 column
+    # per numeric field (REFERENCE_SPECIES.C_frac[REFERENCE_SPECIES.index['CELL']])
+    # and one read-only record per species (what __getitem__ returns).
+    index: Dict[str, int] = field(init=False, repr=False, compare=False)
+    names: tuple = field(init=False, repr=False, compare=False)
+    C: np.ndarray = field(init=False, repr=False, compare=False)
+    H: np.ndarray = field(init=False, repr=False, compare=False)
+    O: np.ndarray = field(init=False, repr=False, compare=False)
+    N: np.ndarray = field(init=False, repr=False, compare=False)
+    MW: np.ndarray = field(init=False, repr=False, compare=False)
+    C_frac: np.ndarray = field(init=False, repr=False, compare=False)
+    H_frac: np.ndarray = field(init=False, repr=False, compare=False)
+    O_frac: np.ndarray = field(init=False, repr=False, compare=False)
+    N_frac: np.ndarray = field(init=False, repr=False, compare=False)
+    _records: tuple = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.names = tuple(str(name) for name in self.characteristics['name'])
+        self.index = {name: i for i, name in enumerate(self.names)}
+        for key in _NUMERIC_COLUMNS:
+            column = np.ascontiguousarray(self.characteristics[key], dtype=np.float64)
+            column.flags.writeable = False
+            setattr(self, key, column)
+
+        # Atom counts and MW stay integers, fractions are the table's float32 values
+        # promoted exactly to float64 (so arithmetic on them matches the table).
+        records = []
+        for i, name in enumerate(self.names):
+            record = {'name': name}
+            for key in _NUMERIC_COLUMNS:
+                value = getattr(self, key)[i]
+                record[key] = int(value) if self.characteristics.dtype[key].kind == 'i' else float(value)
+            records.append(MappingProxyType(record))
+        self._records = tuple(records)
+
+    def __getitem__(self, key) -> Mapping:
+        try:
+            return self._records[self.index[key]]
+        except KeyError:
+            raise KeyError(f"Species '{key}' not found") from None
 
 # Shared singleton: the reference-species table is constant, so build it once
 # instead of reconstructing the structured array on every use.
@@ -78,12 +117,25 @@ class ReferenceMixture:
     def mix_species(self, species_weights: Dict[str, float]) -> None:
         ref_species = REFERENCE_SPECIES
         self.composition = species_weights.copy() # Save the composition
-        self.C = sum(w * ref_species[name]['C'] for name, w in species_weights.items())
-        self.H = sum(w * ref_species[name]['H'] for name, w in species_weights.items())
-        self.O = sum(w * ref_species[name]['O'] for name, w in species_weights.items())
+        records = [(w, ref_species[name]) for name, w in species_weights.items()]
+        self.C = sum(w * record['C'] for w, record in records)
+        self.H = sum(w * record['H'] for w, record in records)
+        self.O = sum(w * record['O'] for w, record in records)
         self.validate()
         self.calculate_fractions()
 
+    def copy_from(self, other: 'ReferenceMixture') -> 'ReferenceMixture':
+        """Copy another mixture's composition and elemental data (not its fraction)."""
+        self.C = other.C
+        self.H = other.H
+        self.O = other.O
+        self.MW = other.MW
+        self.C_frac = other.C_frac
+        self.H_frac = other.H_frac
+        self.O_frac = other.O_frac
+        self.composition = other.composition.copy()
+        return self
+
     @classmethod
     def from_fractions(cls, C_frac: float, H_frac: float, O_frac: float) -> 'ReferenceMixture':
         if not math.isclose(sum([C_frac, H_frac, O_frac]), 1.0, rel_tol=1e-5):
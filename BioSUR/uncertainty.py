@@ -0,0 +1,121 @@
+"""Monte-Carlo propagation of ultimate-analysis uncertainty.
+
+Draws (C, H, N, ASH, MOIST) from a multivariate normal, characterizes every draw
+with the vectorized batch path and summarizes the distribution of the output
+composition.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from BioSUR.batch import characterize_batch, invalid_rows
+from BioSUR.core import BiomassType, OUTPUT_DTYPE
+
+# Order of the uncertain inputs in `mean` / `cov`.
+INPUT_NAMES = ('C', 'H', 'N', 'ASH', 'MOIST')
+
+
+@dataclass
+class UncertaintyResult:
+    """Distribution statistics of output_composition under input uncertainty.
+
+    Arrays are indexed like `names` (the output_composition fields); percentiles
+    has one row per entry of `percentile_levels`.
+    """
+    names: tuple
+    mean: np.ndarray
+    std: np.ndarray
+    cov: np.ndarray
+    percentile_levels: tuple
+    percentiles: np.ndarray
+    n_samples: int                     # accepted draws the statistics are based on
+    n_rejected: int                    # draws discarded as unrepresentable
+    samples: np.ndarray = field(default=None, repr=False)  # (n_samples, 12) if kept
+
+    def to_dict(self) -> dict:
+        """Per-field summary: {field: {'mean', 'std', 'p<level>'...}}."""
+        summary = {}
+        for j, name in enumerate(self.names):
+            entry = {'mean': float(self.mean[j]), 'std': float(self.std[j])}
+            for k, level in enumerate(self.percentile_levels):
+                entry[f'p{level:g}'] = float(self.percentiles[k, j])
+            summary[name] = entry
+        return summary
+
+
+def _normal_factor(cov) -> np.ndarray:
+    """Matrix L with L @ L.T == cov; accepts a covariance matrix or std devs.
+
+    Uses an eigendecomposition rather than Cholesky so that singular
+    covariances (e.g. an element measured without uncertainty) are allowed.
+    """
+    cov = np.asarray(cov, dtype=float)
+    if cov.ndim == 1:
+        cov = np.diag(cov ** 2)
+    if cov.shape != (len(INPUT_NAMES), len(INPUT_NAMES)):
+        raise ValueError(f"cov must be 5x5 (or 5 standard deviations) for {INPUT_NAMES}")
+    if not np.allclose(cov, cov.T):
+        raise ValueError("cov must be symmetric")
+    w, V = np.linalg.eigh(cov)
+    if np.any(w < -1e-12 * max(1.0, float(np.abs(w).max()))):
+        raise ValueError("cov must be positive semi-definite")
+    return V * np.sqrt(np.clip(w, 0, None))
+
+
+def propagate_uncertainty(mean, cov, n_samples: int = 100_000, seed=None,
+                          biomass_type: BiomassType = BiomassType.OTHERS,
+                          percentiles=(2.5, 50.0, 97.5),
+                          chunk_size: int = 250_000,
+                          keep_samples: bool = False,
+                          **options) -> UncertaintyResult:
+    """Propagate normal input uncertainty through the characterization.
+
+    mean holds (C, H, N, ASH, MOIST) -- a sequence in that order or a mapping by
+    name (missing entries are 0) -- and cov is their 5x5 covariance or a vector
+    of standard deviations. n_samples draws are generated with
+    np.random.default_rng(seed) and characterized chunk by chunk with
+    characterize_batch(**options).
+
+    Draws with a negative component, ASH + MOIST > 1, or that
+    characterize_batch would reject (see invalid_rows) are discarded, i.e. the
+    input distribution is truncated to the physical domain; their count is
+    reported as n_rejected.
+    """
+    if hasattr(mean, 'items'):
+        mean = [mean.get(name, 0.0) for name in INPUT_NAMES]
+    mean = np.asarray(mean, dtype=float)
+    if mean.shape != (len(INPUT_NAMES),):
+        raise ValueError(f"mean must have 5 values for {INPUT_NAMES}")
+    L = _normal_factor(cov)
+    rng = np.random.default_rng(seed)
+
+    outputs = np.empty((n_samples, len(OUTPUT_DTYPE.names)))
+    accepted = 0
+    for start in range(0, n_samples, chunk_size):
+        draws = mean + rng.standard_normal((min(chunk_size, n_samples - start), len(INPUT_NAMES))) @ L.T
+        C, H, N, ASH, MOIST = draws.T
+        keep = (np.all(draws >= 0, axis=1) & (ASH + MOIST <= 1)
+                & ~invalid_rows(C, H, N, options.get('use_N_rich_characterization', False),
+                                options.get('protein_splitting_parameter', (1./3., 1./3., 1./3.))))
+        if not keep.any():
+            continue
+        out = characterize_batch(C[keep], H[keep], N[keep], ASH[keep], MOIST[keep],
+                                 biomass_type, **options)
+        outputs[accepted:accepted + len(out)] = out
+        accepted += len(out)
+
+    if accepted == 0:
+        raise ValueError("Every draw was rejected as unrepresentable; check mean and cov")
+    outputs = outputs[:accepted]
+    levels = tuple(float(q) for q in percentiles)
+    return UncertaintyResult(
+        names=OUTPUT_DTYPE.names,
+        mean=outputs.mean(axis=0),
+        std=outputs.std(axis=0, ddof=1) if accepted > 1 else np.zeros(outputs.shape[1]),
+        cov=np.atleast_2d(np.cov(outputs, rowvar=False)) if accepted > 1 else np.zeros((outputs.shape[1],) * 2),
+        percentile_levels=levels,
+        percentiles=np.percentile(outputs, levels, axis=0),
+        n_samples=accepted,
+        n_rejected=n_samples - accepted,
+        samples=outputs if keep_samples else None,
+    )
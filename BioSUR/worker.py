@@ -0,0 +1,119 @@
+"""Long-lived JSON-lines worker: ``python -m BioSUR.worker [--max-batch-size N]``.
+
+Reads one JSON sample object per line on stdin and writes one JSON result per
+line on stdout, in input order, so a caller in any language pays interpreter
+start-up and import once and then streams requests through a pipe.
+
+Samples and results are those of the HTTP service (BioSUR.service): a sample is
+{"C", "H", optional "N", "ASH", "MOIST", "biomass_type", "extrapolation",
+"n_rich", "legacy_centroid", "protein_split"}; a result holds "output" (the
+output_composition of calculate_output_composition, null when the sample cannot
+be characterized), "extrapolation_applied", "extrapolation_error",
+"extrapolation_feasible", "flags" and "error" ("" on success). An optional "id"
+of any JSON type is echoed back. A line that is not a valid sample gets a result
+with a null output and the reason in "error", as does one whose characterization
+fails; the other lines are unaffected and the worker keeps going. Blank lines are
+ignored.
+
+Requests are pipelined: a reader thread queues lines as they arrive, and every
+batch takes whatever is queued (up to --max-batch-size lines) through
+characterize_batch, then writes and flushes the results. A caller that waits for
+each answer gets it immediately; one that streams ahead gets batched throughput.
+The worker exits at end of input.
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+
+from BioSUR.diagnostics import Flag
+from BioSUR.service import RequestError, characterize_samples, validate_sample
+
+_EOF = object()
+
+
+def _parse_line(line: str) -> tuple:
+    """(id, sample, error) of one request line; sample is None when invalid."""
+    try:
+        sample = json.loads(line)
+    except json.JSONDecodeError as e:
+        return None, None, f"invalid JSON: {e}"
+    if not isinstance(sample, dict):
+        return None, None, "each line must be a JSON sample object"
+    request_id = sample.pop('id', None)
+    try:
+        validate_sample(sample)
+    except RequestError as e:
+        return request_id, None, str(e)
+    return request_id, sample, None
+
+
+def process_lines(lines: list) -> list:
+    """Result lines (without newlines) of a batch of request lines."""
+    parsed = [_parse_line(line) for line in lines]
+    samples = [sample for _, sample, _ in parsed if sample is not None]
+    results = iter(characterize_samples(samples) if samples else ())
+    out = []
+    for request_id, sample, error in parsed:
+        result = next(results) if sample is not None else None
+        if isinstance(result, Exception):
+            # Its options group failed; the other lines of the batch are unaffected.
+            error = f"characterization failed: {result}"
+        if sample is None or error is not None:
+            result = {'output': None, 'extrapolation_applied': False, 'extrapolation_error': None,
+                      'extrapolation_feasible': False, 'flags': int(Flag.INVALID), 'error': error}
+        if request_id is not None:
+            result = {'id': request_id, **result}
+        out.append(json.dumps(result))
+    return out
+
+
+def _read_into(stream, lines: queue.Queue) -> None:
+    for line in stream:
+        if line.strip():
+            lines.put(line)
+    lines.put(_EOF)
+
+
+def serve(stdin, stdout, max_batch_size: int = 1024) -> int:
+    """Answer every request line of stdin on stdout; returns the number of requests."""
+    lines = queue.Queue()
+    threading.Thread(target=_read_into, args=(stdin, lines), name="BioSUR-stdin", daemon=True).start()
+    handled = 0
+    done = False
+    while not done:
+        batch = [lines.get()]
+        while len(batch) < max_batch_size:
+            try:
+                batch.append(lines.get_nowait())
+            except queue.Empty:
+                break
+        if batch[-1] is _EOF:
+            batch.pop()
+            done = True
+        if batch:
+            stdout.write('\n'.join(process_lines(batch)) + '\n')
+            stdout.flush()
+            handled += len(batch)
+    return handled
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m BioSUR.worker',
+                                     description="Characterize JSON-lines samples from stdin to stdout.")
+    parser.add_argument('--max-batch-size', type=int, default=1024,
+                        help="most request lines characterized together (default: 1024)")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.max_batch_size < 1:
+        raise SystemExit("--max-batch-size must be >= 1")
+    serve(sys.stdin, sys.stdout, args.max_batch_size)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
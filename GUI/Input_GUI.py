@@ -48,9 +48,10 @@ class InputElement(customtkinter.CTkFrame):
         if self.label.cget("text") in ["C", "H", "N"]:
             self.input_frame.calculate_and_update_O()
         
+        # Typing fires one event per key; let the window coalesce them.
         parent = self.winfo_toplevel()
-        if hasattr(parent, "update_window"):
-            parent.update_window()
+        if hasattr(parent, "schedule_update"):
+            parent.schedule_update()
     
     @staticmethod
     def validate_number(value: str) -> bool:
@@ -1,11 +1,14 @@
+import sys
 import customtkinter
 from GUI.config import AppConfig
-from BioSUR.plot import create_triangle_plot, update_triangle_plot, set_plot_mode, handle_hover
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 class PlotFrame(customtkinter.CTkFrame):
-    """Frame for displaying and managing the triangle plot."""
+    """Frame for displaying and managing the triangle plot.
+
+    matplotlib, its Tk backend and BioSUR.plot are imported by initial_plot, not
+    at module import; the window calls it once it is on screen, and the other
+    plot methods do nothing until then.
+    """
 
     # Segmented-button label -> plot.py coordinate mode.
     VIEW_MODES = {
@@ -58,19 +61,31 @@ class PlotFrame(customtkinter.CTkFrame):
         self.ax = None
         self.canvas = None
         self.plot_elements = None
+        self.blitter = None
 
-        # Create initial plot
-        self.initial_plot()
+        # Placeholder until the window calls initial_plot.
+        self.loading_label = customtkinter.CTkLabel(
+            self.frame,
+            text="Loading plot…",
+            text_color=AppConfig.COLORS["SECONDARY_TEXT"],
+            font=AppConfig.FONTS["DEFAULT"]
+        )
+        self.loading_label.pack(expand=True, fill='both')
 
     def initial_plot(self) -> None:
         """Create and display the initial triangle plot."""
         try:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            from BioSUR.plot import create_triangle_plot, TriangleBlitter
+
             # Create the plot with proper styling
             self.figure, self.ax, self.plot_elements = create_triangle_plot(
                 self.master.biosur, self.plot_mode)
 
             # Configure and display the canvas
             self.canvas = FigureCanvasTkAgg(self.figure, self.frame)
+            # Sample updates and hover only redraw the moving artists.
+            self.blitter = TriangleBlitter(self.canvas, self.plot_elements)
             self.canvas.draw()
 
             # Hover tooltips for the reference-species points.
@@ -82,6 +97,7 @@ class PlotFrame(customtkinter.CTkFrame):
                 background=AppConfig.COLORS["SECONDARY_BACKGROUND"],
                 highlightthickness=0
             )
+            self.loading_label.destroy()
             canvas_widget.pack(expand=True, fill='both')
 
         except Exception as e:
@@ -89,12 +105,16 @@ class PlotFrame(customtkinter.CTkFrame):
 
     def _on_mode_change(self, value: str) -> None:
         """Switch the plot between the C/H-fraction and Van Krevelen views."""
+        # Recorded even before the first plot, which is then drawn in this mode.
+        self.plot_mode = self.VIEW_MODES.get(value, "fraction")
         if self.canvas is None or self.plot_elements is None:
             return
-        self.plot_mode = self.VIEW_MODES.get(value, "fraction")
         try:
+            from BioSUR.plot import set_plot_mode, TriangleBlitter
+            self.blitter.release()
             self.plot_elements = set_plot_mode(
                 self.master.biosur, self.plot_elements, self.plot_mode)
+            self.blitter = TriangleBlitter(self.canvas, self.plot_elements)
             self.canvas.draw_idle()
         except Exception as e:
             print(f"Error switching plot mode: {e}")
@@ -104,8 +124,9 @@ class PlotFrame(customtkinter.CTkFrame):
         if self.plot_elements is None:
             return
         try:
+            from BioSUR.plot import handle_hover
             if handle_hover(event, self.plot_elements):
-                self.canvas.draw_idle()
+                self.blitter.redraw()
         except Exception as e:
             print(f"Error handling hover: {e}")
 
@@ -115,16 +136,19 @@ class PlotFrame(customtkinter.CTkFrame):
             return
             
         try:
-            update_triangle_plot(
-                self.master.biosur,
-                self.plot_elements,
-            )
-            self.canvas.draw_idle()
+            from BioSUR.plot import update_triangle_plot
+            if update_triangle_plot(self.master.biosur, self.plot_elements):
+                self.blitter.invalidate()
+            self.blitter.redraw()
         except Exception as e:
             print(f"Error updating plot: {e}")
 
     def cleanup(self) -> None:
         """Clean up plot resources to prevent memory leaks."""
+        plt = sys.modules.get("matplotlib.pyplot")
+        if plt is None:  # the plot was never created
+            return
+
         try:
             if self.canvas is not None:
                 self.canvas.get_tk_widget().destroy()
@@ -12,6 +12,11 @@ class AppConfig:
     ENTRY_WIDTH: int = 100
     CORNER_RADIUS: int = 6
     DEFAULT_PLACEHOLDER: str = "0.0"
+
+    # Quiet period after the last keystroke before the composition is recomputed
+    UPDATE_DELAY_MS: int = 150
+    # How often the window checks for a finished background characterization
+    WORKER_POLL_MS: int = 15
     
     # Color scheme inspired by the dark green UI
     COLORS = {
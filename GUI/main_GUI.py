@@ -4,19 +4,36 @@ from GUI.config import AppConfig
 from GUI.Output_GUI import OutputFrame
 from GUI.Plot_GUI import PlotFrame
 from GUI.Message_GUI import MessageFrame
-from BioSUR.core import BioSUR, BiomassType
-import matplotlib.pyplot as plt
+from GUI.worker import CharacterizationWorker
+from BioSUR.core import BioSUR, BiomassType, HIGH_NITROGEN_THRESHOLD
 import numpy as np
+import copy
 import platform
+import time
 import tkinter as tk
 import os
 import sys
 
 class GUIBioSUR(customtkinter.CTk):
     """Main application window."""
-    
-    def __init__(self):
-        """Initialize the main application."""
+
+    # Startup stages: frames built, first characterization shown, plot drawn.
+    STARTUP_STAGES = ("window", "first_result", "plot")
+
+    def __init__(self, started: float = None, startup_report=None):
+        """Initialize the main application.
+
+        The window and its frames are built here; matplotlib and the first plot
+        render are deferred to an idle callback (_load_plot) so the window shows
+        up without waiting for them. started is the time.perf_counter() the
+        startup timings count from (main.py passes the moment it began running,
+        so interpreter start-up and unpacking a one-file build are not
+        included; default: now); startup_report, if given, is called with the
+        report text once the window is fully up.
+        """
+        self._started = time.perf_counter() if started is None else started
+        self._startup_report = startup_report
+        self.startup_times = {}
         super().__init__()
 
         # Configure main window
@@ -99,79 +116,191 @@ class GUIBioSUR(customtkinter.CTk):
             columnspan=2
         )
 
+        # Change tracking for update_window: the last inputs computed and what
+        # is currently on screen, so unchanged results are not redrawn.
+        self._update_after_id = None
+        self._last_inputs = None
+        self._last_message = None
+        self._last_output = None
+        self._last_plot_state = None
+
+        # Characterization runs off the Tk thread; results come back through
+        # _collect_result, polled with after() while a request is in flight.
+        self._worker_biosur = BioSUR()
+        self._poll_after_id = None
+        self.worker = CharacterizationWorker(self._characterize)
+
         # Initial update
         self.update_window()
 
         # Set close handler
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
-    def update_window(self) -> None:
-        """Update all components with current data."""
-        try:
-            # Get current values
-            input_composition = self.input_frame.get_all_values()
-            biomass_type = self.input_frame.get_biomass_type()
-
-            n_rich = self.input_frame.get_n_rich()
-
-            # Update BioSUR instance
-            self.biosur = BioSUR.create(
-                C=input_composition["C"],
-                H=input_composition["H"],
-                N=input_composition["N"],
-                ASH=input_composition["ASH"],
-                MOIST=input_composition["MOIST"]
-            )
-            self.biosur.set_biomass_type(biomass_type)
-            self.biosur.enable_extrapolation(self.input_frame.get_extrapolation())
-            self.biosur.set_extrapolation_method(self.input_frame.get_extrapolation_method())
-            self.biosur.enable_N_rich_characterization(n_rich)
-            self.biosur.calculate_output_composition()
-
-            # Check validity and update UI accordingly. Priority: species-hull
-            # infeasibility, outside-triangle error, extrapolation info, the
-            # high-nitrogen nudge, then success.
-            values_array = self.biosur.output_array
-            if not self.biosur.extrapolation_feasible:
-                self.output_frame.set_output_color(AppConfig.COLORS["ERROR"])
-                self.message_frame.set_message(
-                    "Sample outside the reference-species hull — cannot characterize "
+        # The plot is the slow part of startup: draw it once the window is up.
+        self._mark_startup("window")
+        self.after_idle(self._load_plot)
+
+    def _load_plot(self) -> None:
+        """Idle callback: import matplotlib and draw the first plot."""
+        self.plot_frame.initial_plot()
+        # initial_plot drew the current results.
+        self._last_plot_state = self._plot_state()
+        self._mark_startup("plot")
+
+    def _mark_startup(self, stage: str) -> None:
+        """Record the first time a startup stage is reached."""
+        if stage in self.startup_times:
+            return
+        self.startup_times[stage] = time.perf_counter() - self._started
+        if (self._startup_report is not None
+                and all(s in self.startup_times for s in self.STARTUP_STAGES)):
+            self._startup_report(self.startup_timing_report())
+
+    def startup_timing_report(self) -> str:
+        """One line with the startup stages reached so far, in ms since `started`."""
+        stages = sorted(self.startup_times.items(), key=lambda item: item[1])
+        return "Startup (since main.py began): " + " · ".join(f"{stage} {seconds * 1e3:.0f} ms" for stage, seconds in stages)
+
+    def schedule_update(self) -> None:
+        """Recompute once the input has been quiet for AppConfig.UPDATE_DELAY_MS.
+
+        Every call restarts the countdown, so a burst of keystrokes costs one
+        update_window instead of one per key.
+        """
+        if self._update_after_id is not None:
+            self.after_cancel(self._update_after_id)
+        self._update_after_id = self.after(AppConfig.UPDATE_DELAY_MS, self.update_window)
+
+    def _read_inputs(self) -> tuple:
+        """Everything the characterization depends on, as a comparable key."""
+        values = self.input_frame.get_all_values()
+        return (values["C"], values["H"], values["N"], values["ASH"], values["MOIST"],
+                self.input_frame.get_biomass_type(),
+                self.input_frame.get_extrapolation(),
+                self.input_frame.get_extrapolation_method(),
+                self.input_frame.get_n_rich())
+
+    def _status_message(self, N: float, n_rich: bool) -> tuple:
+        """(message, message color, output color) for the current results.
+
+        Priority: species-hull infeasibility, outside-triangle error,
+        extrapolation info, the high-nitrogen nudge, then success.
+        """
+        if not self.biosur.extrapolation_feasible:
+            return ("Sample outside the reference-species hull — cannot characterize "
                     "with this method; try a different extrapolation method.",
-                    AppConfig.COLORS["ERROR"]
-                )
-            elif np.any(values_array < 0):
-                self.output_frame.set_output_color(AppConfig.COLORS["ERROR"])
-                self.message_frame.set_message(
-                    "The sample composition lies outside the characterization triangle!",
-                    AppConfig.COLORS["ERROR"]
-                )
-            elif self.biosur.extrapolation_applied:
-                used = self.biosur.extrapolated_composition
-                self.output_frame.set_output_color(AppConfig.COLORS["SUCCESS"])
-                self.message_frame.set_message(
-                    f"Extrapolated · {self.input_frame.get_extrapolation_method_label()} · "
+                    AppConfig.COLORS["ERROR"], AppConfig.COLORS["ERROR"])
+        if np.any(self.biosur.output_array < 0):
+            return ("The sample composition lies outside the characterization triangle!",
+                    AppConfig.COLORS["ERROR"], AppConfig.COLORS["ERROR"])
+        if self.biosur.extrapolation_applied:
+            used = self.biosur.extrapolated_composition
+            return (f"Extrapolated · {self.input_frame.get_extrapolation_method_label()} · "
                     f"used C={float(used['C']):.4f} H={float(used['H']):.4f} O={float(used['O']):.4f} "
                     f"· Δ={self.biosur.extrapolation_error:.2e}",
-                    AppConfig.COLORS["WARNING"]
-                )
-            elif input_composition["N"] > 0.05 and not n_rich:
-                self.output_frame.set_output_color(AppConfig.COLORS["SUCCESS"])
-                self.message_frame.set_message(
-                    "High nitrogen content (>5%). Consider enabling N-rich composition.",
-                    AppConfig.COLORS["WARNING"]
-                )
-            else:
-                self.output_frame.set_output_color(AppConfig.COLORS["SUCCESS"])
-                self.message_frame.set_message("Done!", AppConfig.COLORS["SUCCESS"])
+                    AppConfig.COLORS["WARNING"], AppConfig.COLORS["SUCCESS"])
+        if N > HIGH_NITROGEN_THRESHOLD and not n_rich:
+            return (f"High nitrogen content (>{HIGH_NITROGEN_THRESHOLD:.0%}). "
+                    "Consider enabling N-rich composition.",
+                    AppConfig.COLORS["WARNING"], AppConfig.COLORS["SUCCESS"])
+        return "Done!", AppConfig.COLORS["SUCCESS"], AppConfig.COLORS["SUCCESS"]
 
-            # Update output and plot
-            self.output_frame.print_output_composition(
-                self.biosur.output_composition,
-                self.biosur.biomass_type
+    def _plot_state(self) -> tuple:
+        """What the triangle plot draws: sample, reference mixtures and extrapolation."""
+        return (self.biosur.input_array.tobytes(),
+                self.biosur.extrapolated_composition.tobytes(),
+                np.asarray(self.biosur.splitting_parameters).tobytes(),
+                self.biosur.use_extrapolation,
+                self.biosur.extrapolation_method)
+
+    def _characterize(self, inputs: tuple) -> BioSUR:
+        """Worker thread: characterize inputs, return a snapshot for the UI.
+
+        The worker re-initializes its own BioSUR in place (the reference
+        triangle comes from the triangle cache when (C, H, biomass type) are
+        unchanged) and hands the main thread a copy, so the plot never reads an
+        instance that is being recomputed.
+        """
+        C, H, N, ASH, MOIST, biomass_type, extrapolation, method, n_rich = inputs
+        biosur = self._worker_biosur
+        biosur.initialize(C=C, H=H, N=N, ASH=ASH, MOIST=MOIST)
+        biosur.set_biomass_type(biomass_type)
+        biosur.enable_extrapolation(extrapolation)
+        biosur.set_extrapolation_method(method)
+        biosur.enable_N_rich_characterization(n_rich)
+        biosur.calculate_output_composition()
+        return copy.deepcopy(biosur)
+
+    def update_window(self) -> None:
+        """Recompute the characterization for the current inputs.
+
+        The computation runs on the worker thread; _collect_result applies it
+        once it is done. Nothing is recomputed when the inputs are unchanged,
+        and inputs that change again before their result arrives supersede it.
+        """
+        if self._update_after_id is not None:
+            # Called directly (switch, combobox) while keystrokes are pending.
+            self.after_cancel(self._update_after_id)
+            self._update_after_id = None
+        try:
+            inputs = self._read_inputs()
+        except Exception as e:
+            self.message_frame.set_message(
+                f"Error updating window: {str(e)}",
+                AppConfig.COLORS["ERROR"]
             )
-            self.plot_frame.update_plot()
+            return
+        if inputs == self._last_inputs:
+            return
+        self._last_inputs = inputs
+        self.worker.submit(inputs)
+        if self._poll_after_id is None:
+            self._poll_after_id = self.after(AppConfig.WORKER_POLL_MS, self._collect_result)
+
+    def _collect_result(self) -> None:
+        """Main thread: apply the newest result, keep polling while one is due."""
+        self._poll_after_id = None
+        done = self.worker.poll()
+        if done is not None:
+            self._apply_result(*done)
+        if self.worker.busy:
+            self._poll_after_id = self.after(AppConfig.WORKER_POLL_MS, self._collect_result)
+
+    def _apply_result(self, inputs: tuple, biosur: BioSUR, error: Exception) -> None:
+        """Show a finished characterization, redrawing only what changed."""
+        try:
+            if error is not None:
+                raise error
+            self.biosur = biosur
+            N, n_rich = inputs[2], inputs[8]
+
+            message = self._status_message(N, n_rich)
+            if message != self._last_message:
+                text, message_color, output_color = message
+                self.output_frame.set_output_color(output_color)
+                self.message_frame.set_message(text, message_color)
+                self._last_message = message
+
+            # Update output and plot
+            output = (self.biosur.output_array.tobytes(), self.biosur.biomass_type)
+            if output != self._last_output:
+                self.output_frame.print_output_composition(
+                    self.biosur.output_composition,
+                    self.biosur.biomass_type
+                )
+                self._last_output = output
+
+            plot_state = self._plot_state()
+            if plot_state != self._last_plot_state:
+                self.plot_frame.update_plot()
+                if self.plot_frame.canvas is not None:
+                    self._last_plot_state = plot_state
+
+            self._mark_startup("first_result")
 
         except Exception as e:
+            # Force a full refresh next time: the screen no longer shows the results.
+            self._last_inputs = self._last_message = None
             self.message_frame.set_message(
                 f"Error updating window: {str(e)}",
                 AppConfig.COLORS["ERROR"]
@@ -187,15 +316,21 @@ class GUIBioSUR(customtkinter.CTk):
                 except Exception as e:
                     print(f"Error canceling after event {after_id}: {e}")
             
+            if hasattr(self, 'worker'):
+                self.worker.close()
+
             # Cleanup matplotlib
             if hasattr(self, 'plot_frame'):
                 try:
                     self.plot_frame.cleanup()
                 except Exception as e:
                     print(f"Error cleaning up plot frame: {e}")
-            
-            plt.close('all')
-            
+
+            # pyplot is only loaded once the plot has been created.
+            plt = sys.modules.get('matplotlib.pyplot')
+            if plt is not None:
+                plt.close('all')
+
         except Exception as e:
             print(f"Error during cleanup: {e}")
         
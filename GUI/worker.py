@@ -0,0 +1,75 @@
+import threading
+
+
+class CharacterizationWorker:
+    """Runs a compute function on a background thread, latest request wins.
+
+    submit() replaces any request that has not started yet, so a burst of input
+    changes costs at most the computation in progress plus the newest one.
+    poll() only ever returns the result of the newest request; results of
+    superseded requests are dropped. Nothing here touches Tk: the window polls
+    from its main loop (via after) and applies the result there.
+    """
+
+    def __init__(self, compute):
+        """compute(inputs) -> result, called on the worker thread."""
+        self._compute = compute
+        self._condition = threading.Condition()
+        self._generation = 0          # id of the newest submitted request
+        self._pending = None          # (generation, inputs) not yet started
+        self._running = False
+        self._done = None             # (generation, inputs, result, error)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="BioSUR-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, inputs) -> int:
+        """Queue inputs for computation, superseding older requests; returns its id."""
+        with self._condition:
+            self._generation += 1
+            self._pending = (self._generation, inputs)
+            self._condition.notify()
+            return self._generation
+
+    @property
+    def busy(self) -> bool:
+        """Whether the newest request has not been collected by poll() yet."""
+        with self._condition:
+            return (self._pending is not None or self._running
+                    or (self._done is not None and self._done[0] == self._generation))
+
+    def poll(self):
+        """(inputs, result, error) of the newest request once it is done, else None."""
+        with self._condition:
+            done, self._done = self._done, None
+            if done is None or done[0] != self._generation:
+                return None
+        return done[1:]
+
+    def close(self, timeout: float = 1.0) -> None:
+        """Stop the thread after the computation in progress, if any."""
+        with self._condition:
+            self._closed = True
+            self._pending = None
+            self._condition.notify()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                (generation, inputs), self._pending = self._pending, None
+                self._running = True
+            result = error = None
+            try:
+                result = self._compute(inputs)
+            except Exception as e:
+                error = e
+            with self._condition:
+                self._running = False
+                # A newer request already queued makes this result stale.
+                if generation == self._generation:
+                    self._done = (generation, inputs, result, error)
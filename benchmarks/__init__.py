@@ -0,0 +1 @@
+"""Performance benchmarks of the BioSUR characterization (see runner.py)."""
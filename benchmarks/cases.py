@@ -0,0 +1,230 @@
+"""Benchmark cases: every characterization path, scalar and batched.
+
+Each case is a setup function registered with @case; it builds its inputs and
+returns the callable to time (plus, for batched cases, the number of rows one
+call processes). Setup is not timed.
+"""
+import os
+import subprocess
+import sys
+import warnings
+
+import numpy as np
+
+from BioSUR.batch import characterize_batch, locate_in_triangles
+from BioSUR.core import BioSUR, BiomassType, ExtrapolationMethod, _nnls, _SPECIES_HULL, triangle_cache_clear
+
+CASES = {}
+
+# Rows per call of the batched cases.
+BATCH_ROWS = 10_000
+
+# (C, H) inside every reference triangle, and outside every triangle but inside
+# the reference-species hull (so SPECIES_HULL is feasible for all biomass types).
+INSIDE = (0.50, 0.06)
+OUTSIDE = (0.47, 0.066)
+
+
+def case(name: str):
+    """Register a setup function under `name`."""
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def _scalar(C, H, biomass_type=BiomassType.OTHERS, N=0.0, method=None, n_rich=False, cached=False):
+    """One scalar characterization; the triangle cache is emptied first unless cached.
+
+    Repeating the same (C, H) would otherwise hit the cache on every call after
+    the first and skip the splitting parameters, mixing and triangle inverse.
+    """
+    def run():
+        if not cached:
+            triangle_cache_clear()
+        biosur = BioSUR.create(C=C, H=H, N=N, ASH=0.05, MOIST=0.08).set_biomass_type(biomass_type)
+        if method is not None:
+            biosur.enable_extrapolation(True).set_extrapolation_method(method)
+        if n_rich:
+            biosur.enable_N_rich_characterization(True)
+        biosur.calculate_output_composition()
+    return run
+
+
+def _rows(where, biomass_type=BiomassType.OTHERS, n=BATCH_ROWS, seed=0):
+    """n (C, H) points near `where`, all on the same side of their triangle."""
+    rng = np.random.default_rng(seed)
+    outside_wanted = where == OUTSIDE
+    C, H = np.empty(0), np.empty(0)
+    while C.size < n:
+        c = where[0] + rng.uniform(-0.005, 0.005, 2 * n)
+        h = where[1] + rng.uniform(-0.001, 0.001, 2 * n)
+        keep = locate_in_triangles(c, h, biomass_type=biomass_type)[0] == outside_wanted
+        C, H = np.concatenate([C, c[keep]]), np.concatenate([H, h[keep]])
+    return C[:n], H[:n]
+
+
+def _batch(where, biomass_type=BiomassType.OTHERS, **options):
+    C, H = _rows(where, biomass_type)
+
+    def run():
+        characterize_batch(C, H, 0.0, 0.05, 0.08, biomass_type, report_diagnostics=False, **options)
+    return run, C.size
+
+
+for _type in BiomassType:
+    case(f"scalar/{_type.name.lower()}")(lambda t=_type: _scalar(*INSIDE, biomass_type=t))
+    case(f"batch/{_type.name.lower()}")(lambda t=_type: _batch(INSIDE, t))
+
+for _method in ExtrapolationMethod:
+    for _where, _point in (('inside', INSIDE), ('outside', OUTSIDE)):
+        case(f"scalar/extrapolation/{_method.name.lower()}/{_where}")(
+            lambda m=_method, p=_point: _scalar(*p, method=m))
+        case(f"batch/extrapolation/{_method.name.lower()}/{_where}")(
+            lambda m=_method, p=_point: _batch(p, use_extrapolation=True, extrapolation_method=m))
+
+
+@case("scalar/n_rich")
+def _scalar_n_rich():
+    return _scalar(*INSIDE, N=0.02, n_rich=True)
+
+
+@case("scalar/cached")
+def _scalar_cached():
+    return _scalar(*INSIDE, cached=True)
+
+
+@case("batch/n_rich")
+def _batch_n_rich():
+    C, H = _rows(INSIDE)
+
+    def run():
+        characterize_batch(C, H, 0.02, 0.05, 0.08, report_diagnostics=False,
+                           use_N_rich_characterization=True)
+    return run, C.size
+
+
+@case("scalar/is_outside_triangle")
+def _is_outside_triangle():
+    biosur = BioSUR.create(C=INSIDE[0], H=INSIDE[1])
+    biosur.calculate_output_composition()
+    return lambda: biosur.is_outside_triangle(*OUTSIDE)
+
+
+@case("batch/locate_in_triangles")
+def _locate_in_triangles():
+    C, H = _rows(OUTSIDE)
+    return (lambda: locate_in_triangles(C, H)), C.size
+
+
+@case("scalar/nnls")
+def _nnls_case():
+    b = np.concatenate([[_SPECIES_HULL.big * OUTSIDE[0], _SPECIES_HULL.big * OUTSIDE[1],
+                         _SPECIES_HULL.big], np.zeros(_SPECIES_HULL.A.shape[1])])
+    return lambda: _nnls(_SPECIES_HULL.A, b)
+
+
+def _plot_sample():
+    import matplotlib
+    matplotlib.use('Agg')
+    biosur = BioSUR.create(C=OUTSIDE[0], H=OUTSIDE[1]).enable_extrapolation(True)
+    biosur.calculate_output_composition()
+    return biosur
+
+
+@case("plot/create_triangle_plot")
+def _create_triangle_plot():
+    biosur = _plot_sample()
+    import matplotlib.pyplot as plt
+    from BioSUR.plot import create_triangle_plot
+
+    def run():
+        fig, _, _ = create_triangle_plot(biosur)
+        plt.close(fig)
+    return run
+
+
+@case("plot/update_triangle_plot")
+def _update_triangle_plot():
+    biosur = _plot_sample()
+    from BioSUR.plot import create_triangle_plot, update_triangle_plot
+    fig, _, elements = create_triangle_plot(biosur)
+    return lambda: update_triangle_plot(biosur, elements)
+
+
+@case("plot/blit_update")
+def _blit_update():
+    biosur = _plot_sample()
+    from BioSUR.plot import TriangleBlitter, create_triangle_plot, update_triangle_plot
+    fig, _, elements = create_triangle_plot(biosur)
+    blitter = TriangleBlitter(fig.canvas, elements)
+    fig.canvas.draw()
+
+    def run():
+        if update_triangle_plot(biosur, elements):
+            blitter.invalidate()
+        blitter.redraw()
+    return run
+
+
+@case("plot/set_plot_mode")
+def _set_plot_mode():
+    biosur = _plot_sample()
+    from BioSUR.plot import create_triangle_plot, set_plot_mode
+    fig, _, elements = create_triangle_plot(biosur)
+    modes = ('vankrevelen', 'fraction')
+    i = 0
+
+    def run():
+        nonlocal elements, i
+        elements = set_plot_mode(biosur, elements, modes[i & 1])
+        i += 1
+    return run
+
+
+@case("plot/handle_hover")
+def _handle_hover():
+    biosur = _plot_sample()
+    from matplotlib.backend_bases import MouseEvent
+    from BioSUR.plot import create_triangle_plot, handle_hover
+    fig, ax, elements = create_triangle_plot(biosur)
+    fig.canvas.draw()
+    x, y = ax.transData.transform(elements['ref_species_points'].get_offsets()[0])
+    events = [MouseEvent('motion_notify_event', fig.canvas, x, y),
+              MouseEvent('motion_notify_event', fig.canvas, x + 40, y + 40)]
+    i = 0
+
+    def run():
+        nonlocal i
+        handle_hover(events[i & 1], elements)
+        i += 1
+    return run
+
+
+@case("plot/draw")
+def _draw():
+    biosur = _plot_sample()
+    from BioSUR.plot import create_triangle_plot
+    fig, _, _ = create_triangle_plot(biosur)
+    return fig.canvas.draw
+
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _cold_import(module: str):
+    """A fresh interpreter importing `module` (interpreter start-up included)."""
+    command = [sys.executable, "-c", f"import {module}"]
+    return lambda: subprocess.run(command, cwd=_ROOT, check=True)
+
+
+for _module in ("numpy", "BioSUR.core", "BioSUR.batch", "BioSUR.plot"):
+    case(f"import/{_module}")(lambda m=_module: _cold_import(m))
+
+
+def setup(name: str):
+    """(callable, rows per call) of a registered case."""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        result = CASES[name]()
+    return result if isinstance(result, tuple) else (result, 1)
@@ -0,0 +1,151 @@
+"""Benchmark runner: ``python -m benchmarks [-o results.json] [--compare baseline.json]``.
+
+Times every case of benchmarks.cases (or those matching -k), writes the results
+as JSON and, given a baseline file from another commit, flags every case whose
+best time per call got slower by more than --threshold (exit status 1).
+"""
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.cases import CASES, setup
+
+RESULTS_VERSION = 1
+
+
+def time_case(func, min_time: float = 0.1, rounds: int = 5) -> dict:
+    """Best and median seconds per call over `rounds` rounds of >= min_time each."""
+    func()                                     # warm up caches and lazy imports
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed * 1.2) + 1))
+    per_call = [elapsed / number]
+    for _ in range(rounds - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        per_call.append((time.perf_counter() - t0) / number)
+    return {'min': min(per_call), 'median': float(np.median(per_call)),
+            'calls_per_round': number, 'rounds': rounds}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names, min_time: float = 0.1, rounds: int = 5, progress=None) -> dict:
+    """Time the named cases; returns the JSON-ready results document."""
+    results = {}
+    for name in names:
+        func, rows = setup(name)
+        stats = time_case(func, min_time, rounds)
+        stats['rows'] = rows
+        if rows > 1:
+            stats['rows_per_second'] = rows / stats['min']
+        results[name] = stats
+        if progress is not None:
+            progress(name, stats)
+    return {
+        'version': RESULTS_VERSION,
+        'meta': {
+            'commit': _git_commit(),
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.2) -> list:
+    """[(name, baseline s, current s, ratio, status)] for the cases in both documents.
+
+    status is 'regression' when the best time per call grew by more than
+    threshold (0.2 = 20%), 'improvement' when it shrank by as much, else 'ok'.
+    """
+    rows = []
+    for name, stats in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        ratio = stats['min'] / old['min']
+        status = ('regression' if ratio > 1 + threshold
+                  else 'improvement' if ratio < 1 / (1 + threshold) else 'ok')
+        rows.append((name, old['min'], stats['min'], ratio, status))
+    return rows
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (('s', 1.0), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description="Time the BioSUR characterization paths.")
+    parser.add_argument('-o', '--output', help="write the results as JSON to this file")
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help="results JSON of another commit to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative slowdown counted as a regression (default 0.2 = 20%%)")
+    parser.add_argument('-k', dest='pattern', action='append', default=[],
+                        help="only run cases whose name contains this text (repeatable)")
+    parser.add_argument('--min-time', type=float, default=0.1,
+                        help="minimum seconds per timing round (default 0.1)")
+    parser.add_argument('--rounds', type=int, default=5, help="timing rounds per case (default 5)")
+    parser.add_argument('--list', action='store_true', help="list the cases and exit")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = _parser().parse_args(argv)
+    names = [name for name in CASES if not args.pattern or any(p in name for p in args.pattern)]
+    if args.list:
+        print("\n".join(names))
+        return 0
+    if not names:
+        print("No benchmark matches the -k patterns", file=sys.stderr)
+        return 2
+
+    def progress(name, stats):
+        rate = f"  {stats['rows_per_second']:12,.0f} rows/s" if 'rows_per_second' in stats else ''
+        print(f"{name:45s} {_format_time(stats['min'])}{rate}", flush=True)
+
+    current = run(names, args.min_time, args.rounds, progress)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(current, baseline, args.threshold)
+        print(f"\nCompared with {args.compare} (commit {baseline['meta'].get('commit')}):")
+        for name, old, new, ratio, status in rows:
+            marker = {'regression': '  <-- REGRESSION', 'improvement': '  (faster)'}.get(status, '')
+            print(f"{name:45s} {_format_time(old)} -> {_format_time(new)}  x{ratio:5.2f}{marker}")
+        regressions = [row for row in rows if row[-1] == 'regression']
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
@@ -1,7 +1,30 @@
+import sys
+import time
+
+# Startup timings count from here: interpreter start-up and, in the one-file
+# build, unpacking the archive happen before and are not included.
+_STARTED = time.perf_counter()
+
 from BioSUR.core import BioSUR
-from GUI.main_GUI import GUIBioSUR
-import matplotlib.pyplot as plt
-from BioSUR.plot import create_triangle_plot
+
+
+def _startup_report_writer(argv):
+    """Writer for --startup-timing (print) or --startup-timing=FILE (append), or None.
+
+    The packaged app has no console, so the FILE form is the one to use there.
+    """
+    for arg in argv:
+        if arg == "--startup-timing":
+            return print
+        if arg.startswith("--startup-timing="):
+            path = arg.split("=", 1)[1]
+
+            def append(report):
+                with open(path, "a") as f:
+                    f.write(report + "\n")
+            return append
+    return None
+
 
 if __name__ == "__main__":
     ## Example of how to use the BioSUR class without the GUI
@@ -23,9 +46,12 @@ if __name__ == "__main__":
     # print(biosur.output_composition)
 
     # # Plot the characterization triangle
+    # import matplotlib.pyplot as plt
+    # from BioSUR.plot import create_triangle_plot
     # fig, ax, plot_elements = create_triangle_plot(biosur)
     # plt.show()
 
-    ## Using the GUI
-    app = GUIBioSUR()
+    ## Using the GUI (imported here so scripted use never loads Tk or matplotlib)
+    from GUI.main_GUI import GUIBioSUR
+    app = GUIBioSUR(started=_STARTED, startup_report=_startup_report_writer(sys.argv[1:]))
     app.mainloop()
@@ -0,0 +1,179 @@
+"""Tests for the vectorized batch characterization (BioSUR.characterize_batch)."""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from BioSUR.core import BioSUR, BiomassType, ExtrapolationMethod, OUTPUT_DTYPE
+from BioSUR.diagnostics import Flag
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "golden_composition.json")
+
+with open(GOLDEN_PATH) as _f:
+    GOLDEN = json.load(_f)
+
+
+@pytest.mark.parametrize("extrapolation", [False, True])
+def test_batch_reproduces_golden_exactly(extrapolation):
+    records = [r for r in GOLDEN if r["input"]["extrapolation"] == extrapolation]
+    inp = [r["input"] for r in records]
+    out, info = BioSUR.characterize_batch(
+        [i["C"] for i in inp], [i["H"] for i in inp], 0.0,
+        [i["ASH"] for i in inp], [i["MOIST"] for i in inp],
+        [i["biomass_type"] for i in inp],
+        use_extrapolation=extrapolation, legacy_centroid_stepping=True,
+        structured=True, full_output=True)
+
+    for k, r in enumerate(records):
+        for key, exp in r["output"].items():
+            assert out[key][k] == exp, f"row {k} output[{key}]"
+        assert list(info["splitting_parameters"][k]) == r["splitting_parameters"]
+        for j, name in enumerate(("RM1", "RM2", "RM3")):
+            got = [info["RM_fraction"][k, j], info["RM_C_frac"][k, j],
+                   info["RM_H_frac"][k, j], info["RM_O_frac"][k, j]]
+            assert got == r["RM"][name], f"row {k} {name}"
+        assert bool(info["is_outside"][k]) == r["is_outside"]
+        assert list(info["extrapolated"][k]) == r["extrapolated"]
+
+
+def _scalar(C, H, N, ASH, MOIST, bt, method, n_rich):
+    b = BioSUR.create(C=C, H=H, N=N, ASH=ASH, MOIST=MOIST)
+    b.set_biomass_type(bt).enable_extrapolation(True).set_extrapolation_method(method)
+    b.enable_N_rich_characterization(n_rich)
+    b.calculate_output_composition()
+    return b
+
+
+@pytest.mark.filterwarnings("ignore::BioSUR.diagnostics.ExtrapolationWarning")
+@pytest.mark.parametrize("method", list(ExtrapolationMethod))
+@pytest.mark.parametrize("n_rich", [False, True])
+def test_batch_matches_scalar_for_every_option(method, n_rich):
+    rng = np.random.default_rng(0)
+    n = 40
+    C = rng.uniform(0.42, 0.78, n)
+    H = rng.uniform(0.02, 0.12, n)
+    N = np.where(rng.random(n) < 0.5, rng.uniform(0, 0.06, n), 0.0)
+    ASH = rng.uniform(0, 0.1, n)
+    MOIST = rng.uniform(0, 0.1, n)
+    bt = rng.integers(0, 4, n)
+
+    out, info = BioSUR.characterize_batch(
+        C, H, N, ASH, MOIST, bt, use_extrapolation=True, extrapolation_method=method,
+        use_N_rich_characterization=n_rich, full_output=True)
+
+    for i in range(n):
+        b = _scalar(C[i], H[i], N[i], ASH[i], MOIST[i], int(bt[i]), method, n_rich)
+        assert np.allclose(out[i], b.output_array, rtol=0, atol=1e-14)
+        assert info["extrapolation_applied"][i] == b.extrapolation_applied
+        assert info["extrapolation_feasible"][i] == b.extrapolation_feasible
+        assert info["extrapolation_error"][i] == pytest.approx(b.extrapolation_error, abs=1e-14)
+
+
+def test_batch_output_shapes_and_broadcasting():
+    out = BioSUR.characterize_batch([0.50, 0.52, 0.53], 0.06, biomass_type=BiomassType.HARDWOOD)
+    assert out.shape == (3, len(OUTPUT_DTYPE.names))
+    rec = BioSUR.characterize_batch([0.50, 0.52], 0.06, structured=True)
+    assert rec.dtype == OUTPUT_DTYPE and rec.shape == (2,)
+
+
+def test_batch_invalid_row_raises_with_index():
+    with pytest.raises(ValueError, match="row 1"):
+        BioSUR.characterize_batch([0.5, 0.8], [0.06, 0.3])
+
+
+def test_batch_errors_nan_marks_invalid_rows():
+    out, info = BioSUR.characterize_batch([0.5, 0.8, np.nan, 0.5], [0.06, 0.3, 0.06, 0.06],
+                                          biomass_type=[2, 2, 2, 7], errors="nan", full_output=True)
+    assert list(info["valid"]) == [True, False, False, False]
+    assert np.all(np.isnan(out[1:])) and not info["extrapolation_applied"][1:].any()
+    assert np.array_equal(out[0], BioSUR.characterize_batch(0.5, 0.06, biomass_type=2)[0])
+
+
+def test_batch_degenerate_reference_mixtures_are_invalid():
+    # N-rich hardwood whose splitting parameters clip to [0, 0, 0, 1, 1]: RM2 and
+    # RM3 are both pure LIGC, so the reference triangle has no area.
+    C, H, N = [0.5, 0.7502695254570502], [0.06, 0.10158546137407039], [0.01, 0.06427879947052599]
+    options = dict(biomass_type=BiomassType.HARDWOOD, use_N_rich_characterization=True)
+    out, info = BioSUR.characterize_batch(C, H, N, errors="nan", full_output=True, **options)
+    assert list(info["valid"]) == [True, False] and info["flags"][1] == Flag.INVALID
+    assert np.isnan(out[1]).all()
+    assert np.array_equal(out[0], BioSUR.characterize_batch(C[0], H[0], N[0], **options)[0])
+    with pytest.raises(ValueError, match="row 1 are degenerate"):
+        BioSUR.characterize_batch(C, H, N, **options)
+
+
+def test_locate_in_triangles_matches_scalar_test():
+    rng = np.random.default_rng(1)
+    C = rng.uniform(0.40, 0.80, 200)
+    H = rng.uniform(0.02, 0.12, 200)
+    types = np.array([[t] for t in BiomassType])
+    outside, coords = BioSUR.locate_in_triangles(C, H, biomass_type=types)
+    assert outside.shape == (4, 200) and coords.shape == (4, 200, 3)
+    assert np.allclose(coords.sum(axis=-1), 1.0)
+    for t in BiomassType:
+        for i in range(0, 200, 7):
+            b = BioSUR.create(C=C[i], H=H[i]).set_biomass_type(t)
+            b.load_reference_triangle()
+            assert outside[t, i] == b.is_outside_triangle(C[i], H[i])
+
+
+def test_barycentric_coordinates_broadcast_against_many_triangles():
+    unit = np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0]])
+    triangles = np.stack([unit, unit + 0.5])[:, None]            # (2, 1, 3, 2)
+    outside, coords = BioSUR.locate_in_triangles([0.25, 0.9], [0.25, 0.9], vertices=triangles)
+    assert outside.tolist() == [[False, True], [True, False]]
+    assert np.allclose(coords[0, 0], [0.5, 0.25, 0.25])
+
+
+def test_decompose_species_hull_matches_reference_nnls():
+    from BioSUR.batch import decompose_species_hull
+    from BioSUR.core import _SPECIES_HULL, _nnls
+
+    rng = np.random.default_rng(2)
+    C = rng.uniform(0.40, 0.90, 300)
+    H = rng.uniform(0.02, 0.13, 300)
+    sol = decompose_species_hull(C, H)
+    assert sol.weights.shape == (300, 7) and np.allclose(sol.weights.sum(axis=1), 1.0)
+    assert np.all(sol.iterations >= 1)
+    for i in range(0, 300, 10):
+        b = np.concatenate([[1e3 * C[i], 1e3 * H[i], 1e3], np.zeros(7)])
+        x = _nnls(_SPECIES_HULL.A, b)
+        assert np.allclose(sol.weights[i], x / x.sum(), atol=1e-10)
+
+    # Restarting from the final passive sets confirms them in a single solve.
+    warm = decompose_species_hull(C, H, warm_start=sol.passive)
+    assert np.array_equal(warm.weights, sol.weights)
+    assert np.all(warm.iterations == 1)
+
+    # Seeding from neighbours charges each cold seed solve to its own sample.
+    seeded = decompose_species_hull(C, H, warm_start='neighbours')
+    assert seeded.iterations.max() <= sol.iterations.max() + 1
+
+
+@pytest.mark.filterwarnings("ignore::BioSUR.diagnostics.ExtrapolationWarning")
+@pytest.mark.parametrize("method", [ExtrapolationMethod.CENTROID, ExtrapolationMethod.NEAREST_POINT,
+                                    ExtrapolationMethod.SPECIES_HULL])
+@pytest.mark.parametrize("n_rich", [False, True])
+def test_batch_jacobian_matches_finite_differences(method, n_rich):
+    rng = np.random.default_rng(1)
+    X = np.column_stack([rng.uniform(0.42, 0.60, 200), rng.uniform(0.05, 0.075, 200),
+                         rng.uniform(0.001, 0.03, 200), rng.uniform(0.0, 0.1, 200),
+                         rng.uniform(0.0, 0.1, 200)])
+    bt = np.arange(200) % len(BiomassType)
+    options = dict(use_extrapolation=True, extrapolation_method=method, use_N_rich_characterization=n_rich)
+    out, info = BioSUR.characterize_batch(*X.T, bt, jacobian=True, **options)
+    assert np.array_equal(out, BioSUR.characterize_batch(*X.T, bt, **options))
+    assert info["is_outside"].any() and info["jacobian"].shape == (200, 12, 5)
+
+    def central_difference(h):
+        return np.stack([(BioSUR.characterize_batch(*(X + h * e).T, bt, **options)
+                          - BioSUR.characterize_batch(*(X - h * e).T, bt, **options)) / (2 * h)
+                         for e in np.eye(5)], axis=-1)
+
+    fd, fd_half = central_difference(1e-7), central_difference(5e-8)
+    # Rows whose stencil straddles a kink (e.g. a species-hull passive-set change)
+    # have no two-sided derivative; finite differences disagree with themselves there.
+    smooth = np.abs(fd - fd_half).max(axis=(1, 2)) < 1e-5
+    assert smooth.mean() > 0.95
+    assert np.allclose(info["jacobian"][smooth], fd[smooth], atol=1e-5)
@@ -0,0 +1,41 @@
+"""Tests for the benchmark runner (python -m benchmarks)."""
+import json
+
+from benchmarks.cases import CASES
+from benchmarks.runner import compare, main, run
+from BioSUR.core import triangle_cache_clear, triangle_cache_info
+
+
+def test_cases_cover_every_path():
+    names = set(CASES)
+    for required in ("scalar/hardwood", "batch/extrapolation/species_hull/outside", "scalar/n_rich",
+                     "scalar/is_outside_triangle", "scalar/nnls", "scalar/cached", "plot/create_triangle_plot",
+                     "import/BioSUR.core"):
+        assert required in names
+
+
+def test_scalar_cases_miss_the_triangle_cache():
+    # Only scalar/cached measures the cache-hit path; the others run every stage.
+    for name, hits in (("scalar/hardwood", 0), ("scalar/cached", 2)):
+        run_case = CASES[name]()
+        triangle_cache_clear()
+        for _ in range(3):
+            run_case()
+        assert triangle_cache_info().hits == hits
+
+
+def test_run_writes_comparable_results(tmp_path):
+    results = run(["scalar/is_outside_triangle", "batch/locate_in_triangles"], min_time=0.001, rounds=2)
+    stats = results["results"]["batch/locate_in_triangles"]
+    assert stats["min"] <= stats["median"] and stats["rows_per_second"] > 0
+    assert all(status == "ok" for *_, status in compare(results, results))
+
+    # A baseline ten times as fast makes the current run a regression (exit status 1).
+    baseline = json.loads(json.dumps(results))
+    for stats in baseline["results"].values():
+        stats["min"] /= 10
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(baseline))
+    assert main(["-k", "scalar/is_outside_triangle", "--min-time", "0.001", "--rounds", "2",
+                 "--compare", str(path), "-o", str(tmp_path / "current.json")]) == 1
+    assert "scalar/is_outside_triangle" in json.loads((tmp_path / "current.json").read_text())["results"]
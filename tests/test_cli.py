@@ -0,0 +1,96 @@
+"""Tests for the headless batch runner (python -m BioSUR)."""
+import csv
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from BioSUR.core import BioSUR, BiomassType, OUTPUT_DTYPE
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROWS = [
+    ("a", "0.50", "0.06", "", "0.05", "0.1", "Hardwood"),
+    ("b", "0.72", "0.03", "0", "0", "0", "2"),
+    ("c", "0.8", "0.3", "0", "0", "0", "Grass"),
+    ("d", "x", "0.06", "0", "0", "0", "1"),
+    ("e", "0.5", "0.06", "0.02", "0", "0", "Wood"),
+]
+
+
+@pytest.fixture
+def input_csv(tmp_path):
+    path = tmp_path / "in.csv"
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["id", "C", "H", "N", "ASH", "MOIST", "biomass_type"])
+        w.writerows(ROWS)
+    return path
+
+
+def _run(*args):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    return subprocess.run([sys.executable, "-m", "BioSUR", *map(str, args)],
+                          capture_output=True, text=True, env=env, check=True)
+
+
+def test_cli_writes_composition_and_errors(input_csv, tmp_path):
+    out_path = tmp_path / "out.csv"
+    proc = _run(input_csv, "-o", out_path, "--extrapolation", "centroid", "--chunk-size", 2)
+    assert "5 rows (3 not characterized)" in proc.stderr
+
+    with open(out_path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["id"] for r in rows] == ["a", "b", "c", "d", "e"]
+    assert [r["error"] for r in rows] == ["", "", "composition cannot be represented",
+                                          "missing or non-numeric input", "unknown biomass type"]
+
+    for r, C, H, ASH, MOIST in ((rows[0], 0.50, 0.06, 0.05, 0.1), (rows[1], 0.72, 0.03, 0.0, 0.0)):
+        b = BioSUR.create(C=C, H=H, ASH=ASH, MOIST=MOIST)
+        b.set_biomass_type(BiomassType.HARDWOOD).enable_extrapolation(True)
+        b.calculate_output_composition()
+        got = [float(r[name]) for name in OUTPUT_DTYPE.names]
+        assert np.allclose(got, b.output_array, rtol=0, atol=1e-14)
+        assert r["extrapolation_applied"] == str(b.extrapolation_applied)
+    assert rows[2]["CELL"] == ""
+
+
+def test_cli_stdout_and_default_biomass_type(tmp_path):
+    path = tmp_path / "in.csv"
+    path.write_text("c;h\n0.5;0.06\n")
+    proc = _run(path, "--delimiter", ";", "--biomass-type", "softwood", "-q")
+    assert proc.stderr == ""
+    header, row = list(csv.reader(proc.stdout.splitlines(), delimiter=";"))
+    expected = BioSUR.characterize_batch(0.5, 0.06, biomass_type=BiomassType.SOFTWOOD)[0]
+    assert np.allclose([float(row[header.index(n)]) for n in OUTPUT_DTYPE.names], expected, atol=1e-14)
+
+
+def test_cli_blank_biomass_type_uses_default(tmp_path):
+    path = tmp_path / "in.csv"
+    path.write_text("C,H,N,biomass_type\n0.5,0.06,0,\n0.5,0.06\n0.5,0.06,0,grass\n0.5,0.06,nan,grass\n")
+    proc = _run(path, "--biomass-type", "softwood", "-q")
+    rows = list(csv.DictReader(proc.stdout.splitlines()))
+    # A blank N defaults to 0, an explicit NaN is missing data.
+    assert [r["error"] for r in rows] == ["", "", "", "missing or non-numeric input"]
+    expected = BioSUR.characterize_batch([0.5, 0.5], [0.06, 0.06],
+                                         biomass_type=[BiomassType.SOFTWOOD, BiomassType.GRASS])
+    for r, e in zip(rows, expected[[0, 0, 1]]):
+        assert np.allclose([float(r[n]) for n in OUTPUT_DTYPE.names], e, atol=1e-14)
+
+
+def test_cli_import_does_not_load_gui_or_plotting():
+    code = ("import sys, BioSUR.cli; "
+            "print([m for m in sys.modules if m.split('.')[0] in ('matplotlib', 'customtkinter', 'tkinter')])")
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    assert proc.stdout.strip() == "[]"
+
+
+def test_cli_result_cache(input_csv, tmp_path):
+    cache = tmp_path / "cache"
+    first = _run(input_csv, "-o", tmp_path / "first.csv", "--cache", cache)
+    second = _run(input_csv, "-o", tmp_path / "second.csv", "--cache", cache)
+    assert "cache 0 hits, 5 misses" in first.stderr and "cache 5 hits, 0 misses" in second.stderr
+    assert (tmp_path / "first.csv").read_text() == (tmp_path / "second.csv").read_text()
@@ -4,7 +4,9 @@ import math
 import numpy as np
 import pytest
 
-from BioSUR.core import BioSUR, BiomassType, ExtrapolationMethod, _nnls, _CHO_SPECIES, REFERENCE_SPECIES
+from BioSUR.core import (BioSUR, BiomassType, ExtrapolationMethod, ReferenceTriangle, _nnls, _CHO_SPECIES,
+                         REFERENCE_SPECIES)
+from BioSUR.diagnostics import ExtrapolationWarning, Flag, reset_rate_limits
 
 
 def _make(C=0.53, H=0.06, ASH=0.0, MOIST=0.0, bt=BiomassType.HARDWOOD, extra=False):
@@ -152,6 +154,26 @@ def test_nearest_point_lands_on_triangle_and_beats_centroid():
     assert near.extrapolation_applied and cent.extrapolation_applied
 
 
+def test_closed_form_centroid_lands_on_edge_along_centroid_ray():
+    C, H = 0.75, 0.11
+    exact = _extrap(C, H, ExtrapolationMethod.CENTROID)
+    legacy = BioSUR.create(C=C, H=H).set_biomass_type(BiomassType.HARDWOOD)
+    legacy.enable_extrapolation(True).enable_legacy_centroid_stepping(True)
+    legacy.calculate_output_composition()
+
+    ec, lc = exact.extrapolated_composition, legacy.extrapolated_composition
+    assert not exact.is_outside_triangle(ec["C"], ec["H"])
+    # Both lie on the sample->centroid ray; the 1% march overshoots the edge by
+    # less than one step, so the closed form is the smaller distortion.
+    cross = (ec["C"] - C) * (lc["H"] - H) - (ec["H"] - H) * (lc["C"] - C)
+    assert abs(cross) < 1e-12
+    assert exact.extrapolation_error <= legacy.extrapolation_error
+    G = np.array([sum(rm.C_frac for rm in (exact.RM1, exact.RM2, exact.RM3)) / 3,
+                  sum(rm.H_frac for rm in (exact.RM1, exact.RM2, exact.RM3)) / 3])
+    step = 0.01 * np.hypot(C - G[0], H - G[1])
+    assert legacy.extrapolation_error - exact.extrapolation_error < step
+
+
 def test_species_hull_exact_fit_inside_hull():
     C, H = 0.70, 0.06  # outside the regression triangle but inside the species hull
     b = _extrap(C, H, ExtrapolationMethod.SPECIES_HULL)
@@ -171,7 +193,10 @@ def test_species_hull_exact_fit_inside_hull():
 
 def test_species_hull_infeasible_outside_hull():
     # C well above every reference species -> outside the species hull.
-    b = _extrap(0.90, 0.06, ExtrapolationMethod.SPECIES_HULL)
+    reset_rate_limits()
+    with pytest.warns(ExtrapolationWarning):
+        b = _extrap(0.90, 0.06, ExtrapolationMethod.SPECIES_HULL)
+    assert b.flags & Flag.EXTRAPOLATION_INFEASIBLE
     assert not b.extrapolation_feasible
     assert b.extrapolation_error > 1e-3
 
@@ -182,3 +207,108 @@ def test_nnls_reconstructs_known_mixture():
     x = _nnls(A, A @ x_true)
     assert np.allclose(x, x_true, atol=1e-9)
     assert np.all(x >= 0)
+
+
+# --- Reference-species lookup ------------------------------------------------
+
+def test_reference_species_records_are_cached_and_read_only():
+    rec = REFERENCE_SPECIES["LIGC"]
+    assert rec is REFERENCE_SPECIES["LIGC"]
+    assert rec["C"] == 15 and rec["MW"] == 258
+    with pytest.raises(TypeError):
+        rec["C"] = 0
+    with pytest.raises(KeyError):
+        REFERENCE_SPECIES["NOPE"]
+
+
+def test_reference_species_columns_match_table():
+    i = REFERENCE_SPECIES.index["TGL"]
+    assert REFERENCE_SPECIES.names[i] == "TGL"
+    assert REFERENCE_SPECIES.C_frac.dtype == np.float64
+    assert REFERENCE_SPECIES.C_frac[i] == float(np.float32(0.763))
+    assert not REFERENCE_SPECIES.MW.flags.writeable
+
+
+# --- Reference-triangle cache -----------------------------------------------
+
+@pytest.fixture
+def triangle_cache():
+    from BioSUR import core
+    core.triangle_cache_clear()
+    yield core
+    core.set_triangle_cache_size(1024)
+    core.triangle_cache_clear()
+
+
+def test_triangle_cache_hit_reproduces_uncached_result(triangle_cache):
+    first = _make(C=0.72, H=0.03, extra=True)
+    second = _make(C=0.72, H=0.03, extra=True)
+    info = triangle_cache.triangle_cache_info()
+    assert info.misses == 1 and info.hits >= 1 and info.currsize == 1
+    assert np.array_equal(first.output_array, second.output_array)
+    assert np.array_equal(first.splitting_parameters, second.splitting_parameters)
+    assert second.RM2.fraction == first.RM2.fraction
+    # Another biomass type is a different correlation, hence a different entry.
+    _make(C=0.72, H=0.03, bt=BiomassType.GRASS)
+    assert triangle_cache.triangle_cache_info().currsize == 2
+
+
+def test_triangle_cache_is_bounded_and_can_be_disabled(triangle_cache):
+    triangle_cache.set_triangle_cache_size(2)
+    for C in (0.50, 0.51, 0.52):
+        _make(C=C)
+    assert triangle_cache.triangle_cache_info().currsize == 2
+
+    triangle_cache.set_triangle_cache_size(0)
+    cached = _make(C=0.53)
+    assert triangle_cache.triangle_cache_info().currsize == 0
+    triangle_cache.set_triangle_cache_size(16)
+    assert np.array_equal(_make(C=0.53).output_array, cached.output_array)
+
+
+# --- Shared-buffer state -----------------------------------------------------
+
+def test_allocate_writes_results_into_shared_buffer():
+    states, samples = BioSUR.allocate(3)
+    for b, C in zip(samples, (0.50, 0.52, 0.72)):
+        b.initialize(C, 0.05).set_biomass_type(BiomassType.HARDWOOD)
+        b.enable_extrapolation(True).calculate_output_composition()
+    for i, C in enumerate((0.50, 0.52, 0.72)):
+        ref = _make(C=C, H=0.05, extra=True)
+        assert np.array_equal(
+            np.array(states["output"][i].tolist()), ref.output_array)
+        assert states["extrapolated"][i].tolist() == ref.extrapolated_composition.tolist()
+
+
+def test_optimization_table_is_shared_and_read_only():
+    a, b = BioSUR(), BioSUR()
+    assert a.optimization_parameters is b.optimization_parameters
+    with pytest.raises(ValueError):
+        a.optimization_parameters[0, 0, 0] = 1.0
+
+
+# --- ReferenceTriangle -------------------------------------------------------
+
+def test_reference_triangle_batched_solves_match_scalar_path():
+    b = _make(C=0.53, H=0.06).calculate_output_composition()
+    tri = b.reference_triangle()
+    assert ReferenceTriangle.for_composition(0.53, 0.06, BiomassType.HARDWOOD) is tri  # cached
+
+    rhs = np.array([[0.53, 0.06, 0.41], [0.50, 0.062, 0.438], [0.55, 0.058, 0.392]])
+    x = tri.mass_fractions(rhs)
+    for row, xr in zip(rhs, x):
+        assert np.allclose(xr, np.linalg.solve(tri.A, row), rtol=0, atol=1e-14)
+    moles = tri.mole_fractions(x)
+    assert np.allclose(moles[0], [b.RM1.fraction, b.RM2.fraction, b.RM3.fraction], rtol=0, atol=1e-15)
+    species = tri.species_mass_fractions(rhs)
+    assert np.allclose(species[0], [b.output_composition[s] for s in _CHO_SPECIES], rtol=0, atol=1e-15)
+
+
+def test_reference_triangle_barycentric_matches_outside_test():
+    b = _make(C=0.53, H=0.06)
+    tri = b.reference_triangle()
+    C = np.linspace(0.40, 0.80, 41)
+    H = np.full_like(C, 0.06)
+    coords = tri.barycentric(C, H)
+    assert np.allclose(coords.sum(axis=-1), 1.0)
+    assert [bool((c < -1e-12).any()) for c in coords] == [b.is_outside_triangle(c, h) for c, h in zip(C, H)]
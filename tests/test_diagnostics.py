@@ -0,0 +1,57 @@
+"""Tests for the structured diagnostics (BioSUR.diagnostics)."""
+import logging
+import warnings
+
+import numpy as np
+import pytest
+
+from BioSUR import diagnostics
+from BioSUR.core import BioSUR
+from BioSUR.diagnostics import Flag, HighNitrogenWarning, collect, reset_rate_limits
+
+
+@pytest.fixture(autouse=True)
+def fresh_limits():
+    reset_rate_limits()
+    yield
+    reset_rate_limits()
+
+
+def test_extrapolation_is_flagged_and_logged_not_printed(capsys, caplog):
+    caplog.set_level(logging.INFO, logger="BioSUR")
+    b = BioSUR.create(C=0.72, H=0.03).enable_extrapolation(True)
+    b.calculate_output_composition()
+    assert b.flags == Flag.OUTSIDE_TRIANGLE | Flag.EXTRAPOLATED
+    assert capsys.readouterr().out == ""
+    assert "extrapolated" in caplog.text
+
+
+def test_high_nitrogen_warning_is_rate_limited(monkeypatch):
+    monkeypatch.setattr(diagnostics, "RATE_LIMIT", 3)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        for _ in range(10):
+            b = BioSUR.create(C=0.50, H=0.06, N=0.08)
+            b.calculate_output_composition()
+    assert b.flags & Flag.HIGH_NITROGEN
+    assert [w.category for w in caught] == [HighNitrogenWarning] * 3
+    assert caught[0].filename == __file__
+
+
+def test_batch_reports_once_with_counts():
+    N = np.array([0.0, 0.08, 0.09, 0.0])
+    with pytest.warns(HighNitrogenWarning, match="^2 sample"):
+        out, info = BioSUR.characterize_batch([0.50, 0.50, 0.50, 0.8], [0.06, 0.06, 0.06, 0.3], N,
+                                              errors="nan", full_output=True)
+    assert info["flags"].tolist() == [0, Flag.HIGH_NITROGEN, Flag.HIGH_NITROGEN, Flag.INVALID]
+
+
+def test_collect_aggregates_without_emitting(caplog):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        with collect() as d:
+            BioSUR.characterize_batch([0.50, 0.72], [0.06, 0.03], 0.08, use_extrapolation=True)
+            BioSUR.create(C=0.50, H=0.06, N=0.08).calculate_output_composition()
+    assert d.samples == 3
+    assert d.summary() == {"OUTSIDE_TRIANGLE": 1, "EXTRAPOLATED": 1, "HIGH_NITROGEN": 3}
+    assert "HIGH_NITROGEN=3" in caplog.text
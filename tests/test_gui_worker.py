@@ -0,0 +1,53 @@
+"""Tests for the GUI's background characterization worker (no Tk needed)."""
+import threading
+import time
+
+from BioSUR.core import BioSUR
+from GUI.worker import CharacterizationWorker
+
+
+def _wait(worker, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        done = worker.poll()
+        if done is not None:
+            return done
+        time.sleep(0.001)
+    raise AssertionError("worker produced no result")
+
+
+def test_latest_request_wins():
+    release = threading.Event()
+    computed = []
+
+    def compute(inputs):
+        computed.append(inputs)
+        if inputs == "slow":
+            release.wait(5)
+            return None
+        return BioSUR.create(C=inputs[0], H=inputs[1]).calculate_output_composition()
+
+    worker = CharacterizationWorker(compute)
+    try:
+        worker.submit("slow")
+        time.sleep(0.05)                       # "slow" is now running
+        for C in (0.48, 0.49, 0.50):
+            worker.submit((C, 0.06))           # each supersedes the previous, unstarted one
+        release.set()
+        inputs, result, error = _wait(worker)
+        assert inputs == (0.50, 0.06) and error is None
+        assert float(result.input_composition["C"]) == 0.50
+        assert computed == ["slow", (0.50, 0.06)]
+        assert not worker.busy and worker.poll() is None
+    finally:
+        worker.close()
+
+
+def test_errors_are_returned_not_raised():
+    worker = CharacterizationWorker(lambda inputs: BioSUR.create(C=inputs, H=0.5))
+    try:
+        worker.submit(0.9)                     # C + H > 1
+        inputs, result, error = _wait(worker)
+        assert inputs == 0.9 and result is None and isinstance(error, ValueError)
+    finally:
+        worker.close()
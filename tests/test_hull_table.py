@@ -0,0 +1,63 @@
+"""Tests for the precomputed species-hull table (BioSUR.hull_table)."""
+import numpy as np
+import pytest
+
+from BioSUR.core import (BioSUR, ExtrapolationMethod, _SPECIES_HULL, set_species_hull_table,
+                         species_hull_table)
+from BioSUR.hull_table import SpeciesHullTable
+
+
+@pytest.fixture(scope="module")
+def table():
+    return SpeciesHullTable.build(resolution=0.005)
+
+
+@pytest.fixture
+def no_table():
+    yield
+    set_species_hull_table(None)
+
+
+def test_table_matches_exact_solve_within_bound(table):
+    rng = np.random.default_rng(3)
+    C = rng.uniform(0.45, 0.76, 2000)
+    H = rng.uniform(0.04, 0.11, 2000)
+    sol = table.decompose(C, H)
+    exact = _SPECIES_HULL.solve(C, H)
+    interpolated = sol.iterations == 0
+    assert interpolated.mean() > 0.5
+    assert table.max_error < 1e-10
+    assert np.abs(sol.weights - exact.weights)[interpolated].max() <= table.max_error
+    assert np.array_equal(sol.weights[~interpolated], exact.weights[~interpolated])
+    assert np.allclose(sol.residual, exact.residual, rtol=0, atol=table.max_error)
+
+
+def test_table_round_trip_and_fingerprint(table, tmp_path):
+    path = tmp_path / "hull.npz"
+    table.save(path)
+    loaded = SpeciesHullTable.load(path)
+    assert np.array_equal(loaded.solution, table.solution) and loaded.max_error == table.max_error
+
+    with np.load(path) as data:
+        stale = dict(data)
+    stale["fingerprint"] = "0" * 64
+    with open(path, "wb") as f:
+        np.savez(f, **stale)
+    with pytest.raises(ValueError, match="rebuild"):
+        SpeciesHullTable.load(path)
+
+
+def test_characterization_uses_table_when_set(table, no_table):
+    def hull(C, H):
+        b = BioSUR.create(C=C, H=H).enable_extrapolation(True)
+        b.set_extrapolation_method(ExtrapolationMethod.SPECIES_HULL)
+        b.calculate_output_composition()
+        return b.output_array
+
+    exact = hull(0.70, 0.06)
+    set_species_hull_table(table)
+    assert species_hull_table() is table
+    assert np.allclose(hull(0.70, 0.06), exact, atol=1e-5)
+    out = BioSUR.characterize_batch([0.70], [0.06], use_extrapolation=True,
+                                    extrapolation_method=ExtrapolationMethod.SPECIES_HULL)
+    assert np.allclose(out[0], exact, atol=1e-5)
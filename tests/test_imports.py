@@ -0,0 +1,38 @@
+"""Import cost of the headless modules: no plotting or GUI toolkit, small budget."""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEADLESS_MODULES = ("BioSUR", "BioSUR.core", "BioSUR.batch", "BioSUR.cli", "BioSUR.diagnostics",
+                    "BioSUR.uncertainty", "BioSUR.inverse", "BioSUR.parallel", "BioSUR.hull_table",
+                    "BioSUR.profiling", "BioSUR.service", "BioSUR.worker", "BioSUR.result_cache",
+                    "main")
+HEAVY_MODULES = ("matplotlib", "tkinter", "_tkinter", "customtkinter", "PIL")
+
+# Seconds for importing BioSUR.core once numpy is loaded (about 10 ms on a laptop;
+# the margin absorbs slow CI machines, not new dependencies).
+IMPORT_BUDGET_SECONDS = 0.15
+
+
+def _run(code: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True,
+                         text=True, check=True).stdout
+    return json.loads(out)
+
+
+@pytest.mark.parametrize("module", HEADLESS_MODULES)
+def test_headless_import_loads_no_gui_or_plotting(module):
+    loaded = _run(f"import json, sys, {module}; print(json.dumps(sorted(sys.modules)))")
+    heavy = [m for m in loaded if m.split(".")[0] in HEAVY_MODULES]
+    assert heavy == []
+
+
+def test_core_import_time_budget():
+    seconds = _run("import json, time, numpy; t0 = time.perf_counter(); import BioSUR.core; "
+                   "print(json.dumps(time.perf_counter() - t0))")
+    assert seconds < IMPORT_BUDGET_SECONDS
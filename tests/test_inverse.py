@@ -0,0 +1,65 @@
+"""Tests for inverse characterization (BioSUR.fit_composition)."""
+import numpy as np
+import pytest
+
+from BioSUR.batch import _cho_fractions_jacobian, characterize_batch
+from BioSUR.core import BioSUR, BiomassType
+
+
+def _samples(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(0.45, 0.55, n), rng.uniform(0.055, 0.07, n),
+            rng.uniform(0.0, 0.03, n), rng.uniform(0.0, 0.1, n), rng.uniform(0.0, 0.1, n))
+
+
+@pytest.mark.parametrize("biomass_type", list(BiomassType))
+def test_jacobian_matches_finite_differences(biomass_type):
+    C, H, *_ = _samples(200)
+    bt = np.full(C.size, int(biomass_type))
+    y, J = _cho_fractions_jacobian(C, H, bt)
+    assert np.allclose(y, characterize_batch(C, H, biomass_type=bt)[:, :7], atol=1e-14)
+    h = 1e-7
+    fd = np.stack([(_cho_fractions_jacobian(C + h, H, bt)[0] - _cho_fractions_jacobian(C - h, H, bt)[0]) / (2*h),
+                   (_cho_fractions_jacobian(C, H + h, bt)[0] - _cho_fractions_jacobian(C, H - h, bt)[0]) / (2*h)],
+                  axis=-1)
+    assert np.allclose(J, fd, rtol=1e-5, atol=1e-5)
+
+
+@pytest.mark.parametrize("n_rich", [False, True])
+def test_round_trip_recovers_inputs(n_rich):
+    C, H, N, ASH, MOIST = _samples(500)
+    N = N if n_rich else np.zeros_like(N)
+    bt = np.arange(C.size) % len(BiomassType)
+    target = characterize_batch(C, H, N, ASH, MOIST, bt, use_N_rich_characterization=n_rich)
+    r = BioSUR.fit_composition(target, bt, use_N_rich_characterization=n_rich)
+    assert r.converged.all()
+    assert np.allclose(r.inputs(), np.column_stack([C, H, N, ASH, MOIST]), atol=1e-12)
+    assert r.summary()["max_residual"] < 1e-12
+    assert r.summary()["max_iterations"] <= 5
+
+
+def test_unreachable_targets_are_least_squares_fits():
+    C, H, N, ASH, MOIST = _samples(300, seed=3)
+    target = characterize_batch(C, H, N, ASH, MOIST, BiomassType.HARDWOOD, use_N_rich_characterization=True)
+    target *= 1 + np.random.default_rng(4).normal(0, 0.03, target.shape)
+    r = BioSUR.fit_composition(target, BiomassType.HARDWOOD, use_N_rich_characterization=True)
+    assert r.converged.all()
+    # No small (C, H) perturbation of the fit gets closer to the normalized CHO target.
+    t = target[:, :7] / target[:, :7].sum(axis=1, keepdims=True)
+    bt = np.full(C.size, int(BiomassType.HARDWOOD))
+    prot = target[:, 7:10].sum(axis=1) / (1 - r.ASH - r.MOIST)
+    base = np.column_stack([r.C, r.H])
+    cost = lambda c, h: ((characterize_batch(c, h, r.N, 0, 0, bt, use_N_rich_characterization=True)[:, :7]
+                          / (1 - prot)[:, None] - t) ** 2).sum(axis=1)
+    best = cost(*base.T)
+    for dc, dh in ((1e-4, 0), (-1e-4, 0), (0, 1e-5), (0, -1e-5)):
+        assert np.all(cost(base[:, 0] + dc, base[:, 1] + dh) >= best - 1e-15)
+
+
+def test_unfittable_targets_are_nan():
+    target = np.zeros((2, 12))
+    target[0, 10] = 1.0                        # all ash
+    target[1, 0] = 1.0                         # pure cellulose
+    r = BioSUR.fit_composition(target)
+    assert np.isnan(r.C[0]) and not r.converged[0]
+    assert np.isfinite(r.inputs()[1]).all() and np.isfinite(r.residual[1])
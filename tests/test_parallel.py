@@ -0,0 +1,42 @@
+"""Tests for the process-pool batch characterization (BioSUR.parallel)."""
+import numpy as np
+import pytest
+
+from BioSUR.core import BioSUR, ExtrapolationMethod
+from BioSUR.parallel import characterize_parallel
+
+
+def _inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(0.42, 0.78, n), rng.uniform(0.02, 0.12, n), rng.uniform(0, 0.03, n),
+            rng.uniform(0, 0.1, n), rng.uniform(0, 0.1, n), rng.integers(0, 4, n))
+
+
+@pytest.mark.filterwarnings("ignore::BioSUR.diagnostics.ExtrapolationWarning")
+@pytest.mark.parametrize("method", list(ExtrapolationMethod))
+def test_parallel_matches_batch_in_order(method):
+    C, H, N, ASH, MOIST, bt = _inputs(2500)
+    options = dict(use_extrapolation=True, extrapolation_method=method, use_N_rich_characterization=True)
+    seen = []
+    out, info = characterize_parallel(C, H, N, ASH, MOIST, bt, workers=2, chunk_size=600,
+                                      progress=seen.append, full_output=True, **options)
+    ref, ref_info = BioSUR.characterize_batch(C, H, N, ASH, MOIST, bt, full_output=True, **options)
+
+    assert np.array_equal(out, ref)
+    for key in ("extrapolation_applied", "extrapolation_error", "extrapolation_feasible", "valid"):
+        assert np.array_equal(info[key], ref_info[key])
+    assert [(s.start, s.stop) for s in info["chunks"]] == [(0, 600), (600, 1200), (1200, 1800),
+                                                            (1800, 2400), (2400, 2500)]
+    assert sorted(s.index for s in seen) == [0, 1, 2, 3, 4]
+    assert all(s.rows_per_second > 0 for s in seen)
+
+
+def test_parallel_invalid_rows():
+    C, H, N, ASH, MOIST, bt = _inputs(3000)
+    C[2100] = 0.95
+    out, info = characterize_parallel(C, H, 0.0, ASH, MOIST, bt, workers=2, chunk_size=1000,
+                                      errors="nan", full_output=True)
+    assert not info["valid"][2100] and info["valid"].sum() == 2999
+    assert np.isnan(out[2100]).all()
+    with pytest.raises(ValueError, match="row 2100"):
+        characterize_parallel(C, H, 0.0, ASH, MOIST, bt, workers=2, chunk_size=1000)
@@ -0,0 +1,49 @@
+"""Tests for BioSUR.plot (Agg backend, no window)."""
+import matplotlib
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from BioSUR.core import BioSUR
+from BioSUR.plot import TriangleBlitter, create_triangle_plot, update_triangle_plot
+
+
+def _sample(C, H):
+    return BioSUR.create(C=C, H=H).enable_extrapolation(True).calculate_output_composition()
+
+
+def test_update_rebuilds_legend_only_when_extrapolation_toggles():
+    biosur = _sample(0.50, 0.06)
+    fig, ax, elements = create_triangle_plot(biosur)
+    legend = ax.get_legend()
+
+    biosur.initialize(C=0.52, H=0.061).calculate_output_composition()
+    assert not update_triangle_plot(biosur, elements)
+    assert ax.get_legend() is legend
+
+    biosur.initialize(C=0.47, H=0.066).calculate_output_composition()   # outside: extrapolated
+    assert update_triangle_plot(biosur, elements)
+    assert "Extrapolated" in [t.get_text() for t in ax.get_legend().get_texts()]
+    plt.close(fig)
+
+
+def test_blit_matches_full_redraw():
+    biosur = _sample(0.50, 0.06)
+    fig, _, elements = create_triangle_plot(biosur)
+    blitter = TriangleBlitter(fig.canvas, elements)
+    fig.canvas.draw()
+
+    for C, H in ((0.52, 0.061), (0.47, 0.066), (0.51, 0.058)):
+        biosur.initialize(C=C, H=H).calculate_output_composition()
+        if update_triangle_plot(biosur, elements):
+            blitter.invalidate()
+            fig.canvas.draw()
+        blitter.redraw()
+        blitted = np.asarray(fig.canvas.buffer_rgba()).copy()
+        fig.canvas.draw()
+        np.testing.assert_array_equal(blitted, np.asarray(fig.canvas.buffer_rgba()))
+
+    blitter.release()
+    assert not any(artist.get_animated() for artist in blitter.artists)
+    plt.close(fig)
@@ -0,0 +1,42 @@
+"""Tests for the per-stage profiling hooks (BioSUR.profiling)."""
+import json
+
+import pytest
+
+from BioSUR.core import BioSUR, ExtrapolationMethod
+from BioSUR.profiling import STAGES, profile
+
+
+def _characterize(method, C=0.47, H=0.066):
+    biosur = BioSUR.create(C=C, H=H, N=0.01).enable_extrapolation(True).set_extrapolation_method(method)
+    return biosur.calculate_output_composition()
+
+
+def test_stages_are_counted_and_nested():
+    with profile() as p:
+        for i in range(10):
+            _characterize(ExtrapolationMethod.NEAREST_POINT, C=0.47 + i * 1e-6)
+    stats = p.stats()
+    assert stats["characterization"]["calls"] == 10
+    assert stats["extrapolation"]["calls"] == 10 and "species_hull" not in stats
+    # Self times add up to the total of the outermost stage.
+    assert sum(s["self_seconds"] for s in stats.values()) == pytest.approx(
+        stats["characterization"]["total_seconds"])
+    assert stats["linear_solve"]["total_seconds"] >= stats["extrapolation"]["total_seconds"]
+    folded = p.collapsed().splitlines()
+    assert "characterization;linear_solve;extrapolation" in [line.rsplit(" ", 1)[0] for line in folded]
+    assert json.loads(p.to_json())["stages"].keys() == stats.keys()
+
+
+def test_disabled_profiling_leaves_methods_untouched():
+    originals = {method: BioSUR.__dict__[method] for _, method in STAGES}
+    with profile():
+        assert BioSUR.__dict__["calculate_output_composition"] is not originals["calculate_output_composition"]
+        with pytest.raises(RuntimeError):
+            with profile():
+                pass
+    assert {method: BioSUR.__dict__[method] for _, method in STAGES} == originals
+    # Results are identical with and without instrumentation.
+    with profile():
+        profiled = _characterize(ExtrapolationMethod.SPECIES_HULL).output_array
+    assert (profiled == _characterize(ExtrapolationMethod.SPECIES_HULL).output_array).all()
@@ -0,0 +1,98 @@
+"""Tests for the persistent result cache (BioSUR.result_cache)."""
+import numpy as np
+import pytest
+
+from BioSUR import result_cache
+from BioSUR.batch import characterize_batch
+from BioSUR.core import BiomassType, ExtrapolationMethod
+from BioSUR.result_cache import INFO_KEYS, ResultCache
+
+
+def _inputs(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(0.44, 0.56, n), rng.uniform(0.05, 0.07, n), rng.uniform(0, 0.03, n),
+            rng.uniform(0, 0.05, n), rng.uniform(0, 0.1, n), rng.integers(0, 4, n))
+
+
+def test_cached_rows_match_characterize_batch(tmp_path):
+    C, H, N, ASH, MOIST, bt = _inputs()
+    options = dict(use_extrapolation=True, extrapolation_method=ExtrapolationMethod.NEAREST_POINT)
+    expected, expected_info = characterize_batch(C, H, N, ASH, MOIST, bt, full_output=True, **options)
+
+    with ResultCache(tmp_path / "cache") as cache:
+        out, info = cache.characterize_batch(C, H, N, ASH, MOIST, bt, full_output=True, **options)
+        assert cache.info()[:2] == (0, 200)
+    with ResultCache(tmp_path / "cache") as cache:
+        # Half the rows changed: only those are recomputed, the rest come from disk.
+        C2 = C.copy()
+        C2[::2] += 0.001
+        again, again_info = cache.characterize_batch(C2, H, N, ASH, MOIST, bt, full_output=True, **options)
+        assert cache.info() == (100, 100, None, 300)
+        structured = cache.characterize_batch(C, H, N, ASH, MOIST, bt, structured=True, **options)
+    np.testing.assert_array_equal(out, expected)
+    np.testing.assert_array_equal(structured, characterize_batch(C, H, N, ASH, MOIST, bt, structured=True,
+                                                                 **options))
+    np.testing.assert_array_equal(again[1::2], expected[1::2])
+    np.testing.assert_array_equal(again[::2], characterize_batch(C2[::2], H[::2], N[::2], ASH[::2],
+                                                                 MOIST[::2], bt[::2], **options))
+    for name in INFO_KEYS:
+        assert info[name].dtype == expected_info[name].dtype
+        np.testing.assert_array_equal(info[name], expected_info[name])
+        np.testing.assert_array_equal(again_info[name][1::2], expected_info[name][1::2])
+
+
+def test_key_covers_options_and_model_version(tmp_path, monkeypatch):
+    with ResultCache(tmp_path / "cache") as cache:
+        cache.characterize_batch(0.5, 0.06, 0.02)
+        # Irrelevant settings share entries; relevant ones do not.
+        cache.characterize_batch(0.5, 0.06, 0.02, extrapolation_method=ExtrapolationMethod.SPECIES_HULL)
+        cache.characterize_batch(0.5, 0.06, 0.02, use_N_rich_characterization=True)
+        cache.characterize_batch(0.5, 0.06, 0.02, biomass_type=BiomassType.GRASS)
+        assert cache.info()[:2] == (1, 3)
+
+        monkeypatch.setattr(result_cache, "CACHE_VERSION", result_cache.CACHE_VERSION + 1)
+        cache.characterize_batch(0.5, 0.06, 0.02)
+        assert cache.info()[:2] == (1, 4)
+
+
+def test_invalid_rows_are_cached_and_raise(tmp_path):
+    with ResultCache(tmp_path / "cache") as cache:
+        out, info = cache.characterize_batch([0.5, 0.9], [0.06, 0.2], errors="nan", full_output=True)
+        assert info["valid"].tolist() == [True, False] and np.isnan(out[1]).all()
+        with pytest.raises(ValueError, match="row 1"):
+            cache.characterize_batch([0.5, 0.9], [0.06, 0.2])
+        assert cache.hits == 2
+
+
+def test_concurrent_writers_keep_the_table_readable(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = ResultCache(tmp_path / "cache")
+    C, H, *_ = _inputs(n=400)
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda k: cache.characterize_batch(C[k::4], H[k::4]), range(4)))
+    # Writers may drop each other's rows, but every stored row is intact.
+    out = cache.characterize_batch(C, H)
+    np.testing.assert_array_equal(out, characterize_batch(C, H))
+    assert not list((tmp_path / "cache").glob("*.tmp"))
+
+
+def test_new_rows_go_to_segments_merged_on_close(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "MAX_SEGMENTS", 2)
+    directory = tmp_path / "cache"
+    C, H, *_ = _inputs(n=400)
+    with ResultCache(directory) as cache:
+        cache.characterize_batch(C[:100], H[:100])
+        cache.characterize_batch(C[100:200], H[100:200])
+        assert len(list(directory.glob("*.seg.npy"))) == 2
+        # A third segment is one too many: the segments become one.
+        cache.characterize_batch(C[:300], H[:300])
+        assert len(list(directory.glob("*.seg.npy"))) == 1 and cache.info()[1:] == (300, None, 300)
+        assert len(list(directory.glob("*.npy"))) == 1
+    # Closing merges them into the table, which later segments are looked up with.
+    assert [p.name.count(".") for p in directory.glob("*.npy")] == [1]
+    with ResultCache(directory) as cache:
+        out = cache.characterize_batch(C, H)
+        assert cache.info() == (300, 100, None, 400) and len(list(directory.glob("*.seg.npy"))) == 1
+    np.testing.assert_array_equal(out, characterize_batch(C, H))
+    assert len(list(directory.glob("*.npy"))) == 1 and not list(directory.glob("*.tmp"))
@@ -0,0 +1,130 @@
+"""Tests for the micro-batching HTTP service (BioSUR.service)."""
+import asyncio
+import json
+
+import numpy as np
+
+from BioSUR.core import BioSUR, BiomassType, ExtrapolationMethod
+from BioSUR.service import CharacterizationService
+
+
+async def _request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = b'' if payload is None else json.dumps(payload).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+                 f"Connection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    status = int(head.split()[1])
+    return status, (body.decode() if path == '/metrics' else json.loads(body))
+
+
+def _serve(client, **options):
+    async def run():
+        service = CharacterizationService(**options)
+        server = await service.start(port=0)
+        try:
+            return await client(server.sockets[0].getsockname()[1], service)
+        finally:
+            await service.close()
+    return asyncio.run(run())
+
+
+def test_concurrent_requests_are_batched_and_match_scalar():
+    samples = [{'C': 0.46 + 0.003 * i, 'H': 0.06, 'N': 0.01, 'ASH': 0.02, 'MOIST': 0.05,
+                'biomass_type': ['Hardwood', 2, 'grass', 0][i % 4],
+                'extrapolation': ['off', 'centroid', 'species-hull'][i % 3]} for i in range(30)]
+
+    async def client(port, service):
+        replies = await asyncio.gather(*(_request(port, 'POST', '/characterize', s) for s in samples))
+        metrics = (await _request(port, 'GET', '/metrics'))[1]
+        return replies, metrics, service.metrics.batches
+
+    replies, metrics, batches = _serve(client, max_batch_size=64, max_latency=0.05)
+    assert batches < len(samples)
+    assert 'biosur_samples_total 30' in metrics and 'biosur_request_latency_seconds_bucket' in metrics
+    methods = {'centroid': ExtrapolationMethod.CENTROID, 'species-hull': ExtrapolationMethod.SPECIES_HULL}
+    for sample, (status, result) in zip(samples, replies):
+        assert status == 200 and result['error'] == ''
+        biosur = BioSUR.create(C=sample['C'], H=sample['H'], N=sample['N'], ASH=sample['ASH'],
+                               MOIST=sample['MOIST'])
+        biosur.set_biomass_type(BiomassType[str(sample['biomass_type']).upper()]
+                                if isinstance(sample['biomass_type'], str) else sample['biomass_type'])
+        if sample['extrapolation'] != 'off':
+            biosur.enable_extrapolation(True).set_extrapolation_method(methods[sample['extrapolation']])
+        biosur.calculate_output_composition()
+        np.testing.assert_allclose([result['output'][k] for k in biosur.output_composition.dtype.names],
+                                   biosur.output_array, rtol=1e-12, atol=1e-15)
+
+
+def test_bad_requests_and_invalid_rows():
+    async def client(port, service):
+        return [await _request(port, 'POST', '/characterize', [{'C': 0.5, 'H': 0.06}, {'C': 0.9, 'H': 0.2}]),
+                await _request(port, 'POST', '/characterize', {'C': 0.5}),
+                await _request(port, 'POST', '/characterize', {'C': 0.5, 'H': 0.06, 'extrapolation': 'up'}),
+                await _request(port, 'POST', '/characterize', {'C': 0.5, 'H': 0.06, 'biomass_type': True}),
+                await _request(port, 'GET', '/characterize'),
+                await _request(port, 'GET', '/health')]
+
+    (ok, rows), missing, bad_option, bool_type, wrong_method, health = _serve(client)
+    assert ok == 200 and rows[0]['error'] == '' and rows[1]['output'] is None and rows[1]['error']
+    assert missing[0] == bad_option[0] == 400 and 'extrapolation' in bad_option[1]['error']
+    assert bool_type[0] == 400 and 'biomass_type' in bool_type[1]['error']
+    assert wrong_method[0] == 405 and health == (200, {'status': 'ok'})
+
+
+def test_bad_request_does_not_fail_its_batch(monkeypatch):
+    from BioSUR import service
+    characterize_columns = service.characterize_columns
+
+    def failing_for_legacy(columns, biomass_type, options):
+        if options['legacy_centroid_stepping']:
+            raise RuntimeError("boom")
+        return characterize_columns(columns, biomass_type, options)
+    monkeypatch.setattr(service, 'characterize_columns', failing_for_legacy)
+
+    good = [{'C': 0.48 + 0.01 * i, 'H': 0.06} for i in range(3)]
+    bad = [{'C': 0.5, 'H': 0.06, 'N': 0.02, 'n_rich': True, 'protein_split': [0.5, 0.5, 0.5]},
+           {'C': [0.5], 'H': 0.06}, {'C': 0.5, 'H': True}]
+    failing = {'C': 0.5, 'H': 0.06, 'extrapolation': 'centroid', 'legacy_centroid': True}
+
+    async def client(port, service):
+        return await asyncio.gather(*(_request(port, 'POST', '/characterize', s)
+                                      for s in good + bad + [failing])), service.metrics.batches
+
+    replies, batches = _serve(client, max_batch_size=64, max_latency=0.05)
+    assert batches == 1
+    assert all(status == 200 and result['error'] == '' for status, result in replies[:3])
+    assert [status for status, _ in replies[3:6]] == [400, 400, 400]
+    assert 'protein_split' in replies[3][1]['error'] and 'C must be a number' in replies[4][1]['error']
+    assert replies[6][0] == 500 and 'boom' in replies[6][1]['error']
+
+
+def test_failing_sample_does_not_fail_same_options(monkeypatch):
+    from BioSUR import service
+    characterize_columns = service.characterize_columns
+
+    def failing_for_c061(columns, biomass_type, options):
+        if 0.61 in columns['C']:
+            raise RuntimeError("boom")
+        return characterize_columns(columns, biomass_type, options)
+    monkeypatch.setattr(service, 'characterize_columns', failing_for_c061)
+
+    # Same options throughout: a degenerate N-rich hardwood sample (an invalid
+    # row), one that makes its group raise, and good ones.
+    options = {'N': 0.02, 'biomass_type': 'Hardwood', 'n_rich': True}
+    samples = [{'C': 0.50, 'H': 0.06, **options}, {'C': 0.61, 'H': 0.06, **options},
+               {**options, 'C': 0.7502695254570502, 'H': 0.10158546137407039, 'N': 0.06427879947052599},
+               {'C': 0.52, 'H': 0.06, **options}]
+
+    async def client(port, service):
+        return await asyncio.gather(*(_request(port, 'POST', '/characterize', s) for s in samples)), \
+            service.metrics.batches
+
+    replies, batches = _serve(client, max_batch_size=64, max_latency=0.05)
+    assert batches == 1
+    assert [status for status, _ in replies] == [200, 500, 200, 200]
+    assert replies[0][1]['error'] == replies[3][1]['error'] == ''
+    assert replies[2][1]['output'] is None and replies[2][1]['error']
@@ -0,0 +1,37 @@
+"""Tests for Monte-Carlo uncertainty propagation (BioSUR.propagate_uncertainty)."""
+import numpy as np
+import pytest
+
+from BioSUR.core import BioSUR, BiomassType
+
+MEAN = [0.50, 0.06, 0.0, 0.05, 0.08]
+
+
+def test_zero_uncertainty_reproduces_point_estimate():
+    r = BioSUR.propagate_uncertainty(MEAN, np.zeros(5), n_samples=50, seed=0,
+                                     biomass_type=BiomassType.HARDWOOD)
+    point = BioSUR.create(C=0.50, H=0.06, ASH=0.05, MOIST=0.08)
+    point.set_biomass_type(BiomassType.HARDWOOD).calculate_output_composition()
+    assert np.allclose(r.mean, point.output_array, atol=1e-15)
+    assert np.allclose(r.std, 0.0, atol=1e-15)
+    assert r.n_samples == 50 and r.n_rejected == 0
+
+
+def test_statistics_are_seeded_and_consistent():
+    kwargs = dict(n_samples=20_000, seed=42, biomass_type=BiomassType.GRASS, use_extrapolation=True)
+    a = BioSUR.propagate_uncertainty(MEAN, [0.01, 0.003, 0.0, 0.005, 0.01], **kwargs)
+    b = BioSUR.propagate_uncertainty(MEAN, [0.01, 0.003, 0.0, 0.005, 0.01], **kwargs)
+    assert np.array_equal(a.mean, b.mean)
+    assert np.all(a.percentiles[0] <= a.percentiles[1]) and np.all(a.percentiles[1] <= a.percentiles[2])
+    assert np.allclose(np.sqrt(np.diag(a.cov)), a.std)
+    # ASH and MOIST pass straight through, so their spread is the input spread.
+    assert a.std[-2] == pytest.approx(0.005, rel=0.05)
+    assert set(a.to_dict()["CELL"]) == {"mean", "std", "p2.5", "p50", "p97.5"}
+
+
+def test_unphysical_draws_are_rejected():
+    # Zero-mean N with a spread: about half the draws are negative and dropped.
+    r = BioSUR.propagate_uncertainty({"C": 0.5, "H": 0.06}, [0, 0, 0.01, 0, 0],
+                                     n_samples=2_000, seed=1, keep_samples=True)
+    assert 0 < r.n_rejected < 2_000
+    assert r.samples.shape == (r.n_samples, 12)
@@ -0,0 +1,101 @@
+"""Tests for the JSON-lines worker (python -m BioSUR.worker)."""
+import io
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from BioSUR.core import BioSUR, ExtrapolationMethod
+from BioSUR.diagnostics import Flag
+from BioSUR.worker import serve
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_results_match_scalar_in_input_order():
+    samples = [{'id': i, 'C': 0.44 + 0.004 * i, 'H': 0.062, 'N': 0.02, 'ASH': 0.01, 'MOIST': 0.1,
+                'extrapolation': 'nearest-point', 'n_rich': bool(i % 2)} for i in range(25)]
+    stdin = io.StringIO("".join(json.dumps(s) + "\n" for s in samples) + "\nnot json\n" + '{"C": 0.5}\n')
+    stdout = io.StringIO()
+    assert serve(stdin, stdout, max_batch_size=8) == 27
+
+    results = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    for sample, result in zip(samples, results):
+        biosur = (BioSUR.create(C=sample['C'], H=sample['H'], N=sample['N'], ASH=sample['ASH'],
+                                MOIST=sample['MOIST'])
+                  .enable_extrapolation(True).set_extrapolation_method(ExtrapolationMethod.NEAREST_POINT)
+                  .enable_N_rich_characterization(sample['n_rich'])
+                  .calculate_output_composition())
+        assert result['id'] == sample['id'] and result['error'] == ''
+        assert result['extrapolation_applied'] == biosur.extrapolation_applied
+        assert result['extrapolation_error'] == biosur.extrapolation_error
+        assert result['flags'] == int(biosur.flags)
+        np.testing.assert_allclose([result['output'][k] for k in biosur.output_composition.dtype.names],
+                                   biosur.output_array, rtol=1e-12, atol=1e-15)
+    assert results[25]['output'] is None and 'invalid JSON' in results[25]['error']
+    assert results[26]['output'] is None and 'C and H' in results[26]['error']
+    assert results[25]['flags'] == results[26]['flags'] == int(Flag.INVALID)
+
+
+def test_pipelined_subprocess():
+    proc = subprocess.Popen([sys.executable, "-m", "BioSUR.worker"], cwd=ROOT, text=True,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    # Request/response: each answer arrives before the next request is sent.
+    for C in (0.50, 0.52):
+        proc.stdin.write(json.dumps({'C': C, 'H': 0.06}) + "\n")
+        proc.stdin.flush()
+        assert json.loads(proc.stdout.readline())['error'] == ''
+    out, _ = proc.communicate("".join(json.dumps({'id': i, 'C': 0.5, 'H': 0.06}) + "\n" for i in range(500)))
+    assert proc.returncode == 0
+    assert [json.loads(line)['id'] for line in out.splitlines()] == list(range(500))
+
+
+def test_bad_line_does_not_drop_its_batch(monkeypatch):
+    from BioSUR import service
+    characterize_columns = service.characterize_columns
+
+    def failing_for_legacy(columns, biomass_type, options):
+        if options['legacy_centroid_stepping']:
+            raise RuntimeError("boom")
+        return characterize_columns(columns, biomass_type, options)
+    monkeypatch.setattr(service, 'characterize_columns', failing_for_legacy)
+
+    lines = [{'id': 1, 'C': 0.5, 'H': 0.06},
+             {'id': 2, 'C': 0.5, 'H': 0.06, 'N': 0.02, 'n_rich': True, 'protein_split': [0.5, 0.5, 0.5]},
+             {'id': 3, 'C': 0.5, 'H': 0.06, 'extrapolation': 'centroid', 'legacy_centroid': True},
+             {'id': 4, 'C': 0.52, 'H': 0.06}]
+    stdout = io.StringIO()
+    assert serve(io.StringIO("".join(json.dumps(line) + "\n" for line in lines)), stdout) == 4
+
+    results = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert [r['id'] for r in results] == [1, 2, 3, 4]
+    assert results[0]['error'] == results[3]['error'] == '' and results[3]['output'] is not None
+    assert results[1]['output'] is None and 'protein_split' in results[1]['error']
+    assert results[2]['output'] is None and 'boom' in results[2]['error']
+
+
+def test_failing_line_does_not_fail_lines_with_same_options(monkeypatch):
+    from BioSUR import service
+    characterize_columns = service.characterize_columns
+
+    def failing_for_c061(columns, biomass_type, options):
+        if 0.61 in columns['C']:
+            raise RuntimeError("boom")
+        return characterize_columns(columns, biomass_type, options)
+    monkeypatch.setattr(service, 'characterize_columns', failing_for_c061)
+
+    options = {'N': 0.02, 'biomass_type': 'Hardwood', 'n_rich': True}
+    lines = [{'id': 1, 'C': 0.50, 'H': 0.06, **options},
+             {'id': 2, 'C': 0.61, 'H': 0.06, **options},
+             {'id': 3, **options, 'C': 0.7502695254570502, 'H': 0.10158546137407039, 'N': 0.06427879947052599},
+             {'id': 4, 'C': 0.52, 'H': 0.06, **options}]
+    stdout = io.StringIO()
+    assert serve(io.StringIO("".join(json.dumps(line) + "\n" for line in lines)), stdout) == 4
+
+    results = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert [r['id'] for r in results] == [1, 2, 3, 4]
+    assert results[0]['error'] == results[3]['error'] == '' and results[3]['output'] is not None
+    assert 'boom' in results[1]['error'] and results[1]['flags'] == int(Flag.INVALID)
+    assert results[2]['output'] is None and results[2]['flags'] == int(Flag.INVALID)